@@ -0,0 +1,295 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import time
+import logging
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Any, Tuple
+
+from rsscast.synchronized import synchronized
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+## hours of night limit (local time), from start (inclusive) to end (exclusive)
+DEFAULT_NIGHT_HOURS = (0, 6)
+
+## share of limit kept free for RSS server clients when they are active
+DEFAULT_SERVE_RESERVE = 0.3
+
+## serving is considered active for given time (in seconds) after last sent data
+SERVE_ACTIVE_TIME = 10.0
+
+## maximum amount of tokens collected by idle bucket, in seconds of transfer
+BURST_TIME = 1.0
+
+## weight of new sample in throughput average of job
+RATE_WEIGHT = 0.3
+
+## minimal time (in seconds) between throughput samples of job
+RATE_PERIOD = 1.0
+
+## name of job collecting downloads made outside of any job
+OTHER_JOB = "other"
+
+## downloads outside of jobs are reported for given time (in seconds) after last sample
+OTHER_ACTIVE_TIME = 10.0
+
+
+class TokenBucket():
+    """Token bucket allowing to transfer 'rate' bytes per second.
+
+    Tokens are reserved in advance (bucket can go below zero), so each caller
+    waits only for its own amount and callers are served in order of arrival.
+    """
+
+    def __init__(self, rate=0, clock=time.monotonic):
+        self.clock  = clock
+        self.rate   = 0
+        self.burst  = 0
+        self.tokens = 0.0
+        self.stamp  = clock()
+        self.setRate( rate )
+
+    @synchronized
+    def setRate(self, rate):
+        """Set rate in bytes per second, 0 means unlimited."""
+        rate = max( rate or 0, 0 )
+        if rate == self.rate:
+            return
+        self._refill()
+        self.rate  = rate
+        self.burst = rate * BURST_TIME
+        self.tokens = min( self.tokens, self.burst )
+
+    @synchronized
+    def reserve(self, amount) -> float:
+        """Take tokens and return time (in seconds) caller has to wait before transfer."""
+        if self.rate < 1:
+            return 0.0
+        self._refill()
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def _refill(self):
+        now = self.clock()
+        elapsed = max( now - self.stamp, 0.0 )
+        self.stamp = now
+        if self.rate > 0:
+            self.tokens = min( self.tokens + elapsed * self.rate, self.burst )
+
+
+class JobMeter():
+    """Throughput of single transfer job."""
+
+    def __init__(self, name, now):
+        self.name       = name
+        self.started    = now
+        self.total      = 0
+        self.rate       = 0.0               ## average in bytes per second
+        self.sampleTime = now
+        self.sampleSize = 0
+
+    def update(self, amount, now):
+        self.total      += amount
+        self.sampleSize += amount
+        elapsed = now - self.sampleTime
+        if elapsed < RATE_PERIOD:
+            return
+        sample_rate = self.sampleSize / elapsed
+        if self.rate > 0.0:
+            self.rate = ( 1.0 - RATE_WEIGHT ) * self.rate + RATE_WEIGHT * sample_rate
+        else:
+            self.rate = sample_rate
+        self.sampleTime = now
+        self.sampleSize = 0
+
+    def averageRate(self, now):
+        elapsed = now - self.started
+        if elapsed <= 0.0:
+            return 0.0
+        return self.total / elapsed
+
+
+class BandwidthGovernor():
+    """Process-wide limit of download bandwidth shared by all download paths.
+
+    Limit differs for day and night. When RSS server is sending data, part
+    of limit ('serve_reserve') is left free for server clients. Downloads
+    are accounted to current job (see 'job()') or to shared job 'other'.
+    """
+
+    def __init__(self, clock=time.time, sleep=time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self.dayLimit   = 0                 ## bytes per second, 0 means unlimited
+        self.nightLimit = 0
+        self.nightHours: Tuple[int, int] = DEFAULT_NIGHT_HOURS
+        self.serveReserve = DEFAULT_SERVE_RESERVE
+        self.lastServed = None
+        self.bucket = TokenBucket( clock=clock )
+        self._jobs: Dict[int, JobMeter] = {}           ## running jobs by id of meter
+        self._otherJob = JobMeter( OTHER_JOB, clock() )
+        self._current = contextvars.ContextVar( "bandwidth_job", default=None )
+
+    @synchronized
+    def configure(self, day_limit=None, night_limit=None, night_hours=None, serve_reserve=None):
+        if day_limit is not None:
+            self.dayLimit = max( day_limit, 0 )
+        if night_limit is not None:
+            self.nightLimit = max( night_limit, 0 )
+        if night_hours is not None:
+            self.nightHours = tuple( night_hours )
+        if serve_reserve is not None:
+            self.serveReserve = min( max( serve_reserve, 0.0 ), 1.0 )
+
+    @synchronized
+    def getLimit(self, now=None):
+        """Return current download limit in bytes per second (0 means unlimited)."""
+        if now is None:
+            now = self.clock()
+        limit = self.dayLimit
+        if is_night( now, self.nightHours ):
+            limit = self.nightLimit
+        if limit < 1:
+            return 0
+        if self.lastServed is not None and now - self.lastServed < SERVE_ACTIVE_TIME:
+            limit = limit * ( 1.0 - self.serveReserve )
+        return max( int( limit ), 1 )
+
+    def throttle(self, amount):
+        """Account downloaded data and wait if limit is exceeded."""
+        if amount < 1:
+            return
+        meter = self.currentJob()
+        self.bucket.setRate( self.getLimit() )
+        wait_time = self.bucket.reserve( amount )
+        if wait_time > 0.0:
+            self.sleep( wait_time )
+        ## data is considered transferred after waiting
+        self._updateJob( meter, amount, self.clock() )
+
+    def reserve(self, amount, meter: JobMeter = None) -> float:
+        """Account downloaded data to job and return time (in seconds) transfer should be paused.
+
+        Does not wait, so can be used by transfers driven by event loop (see 'curlengine').
+        If 'meter' is not given, then data is accounted to current job.
+        """
+        if amount < 1:
+            return 0.0
+        if meter is None:
+            meter = self.currentJob()
+        self.bucket.setRate( self.getLimit() )
+        wait_time = self.bucket.reserve( amount )
+        ## data is considered transferred after pause
+        self._updateJob( meter, amount, self.clock() + wait_time )
+        return wait_time
+
+    @synchronized
+    def noteServed(self, amount):
+        """Called by RSS server on data sent to clients."""
+        if amount > 0:
+            self.lastServed = self.clock()
+
+    @contextmanager
+    def job(self, name):
+        """Account downloads of current context to job of given name.
+
+        Job is stored in context variable, so it follows coroutines and
+        blocking functions passed to workers with copy of context.
+        """
+        meter = JobMeter( name, self.clock() )
+        self._addJob( meter )
+        token = self._current.set( meter )
+        try:
+            yield meter
+        finally:
+            self._current.reset( token )
+            self._removeJob( meter )
+            if meter.total > 0:
+                now = self.clock()
+                _LOGGER.info( "job %s: downloaded %.2f MB, average %.1f KB/s",
+                              name, meter.total / 1048576, meter.averageRate( now ) / 1024 )
+
+    def currentJob(self) -> JobMeter:
+        """Return meter of job of current context or meter of downloads outside of jobs."""
+        meter = self._current.get()
+        if meter is None:
+            meter = self._otherJob
+        return meter
+
+    @synchronized
+    def getStats(self) -> Dict[str, Any]:
+        """Return current throughput (bytes per second) of running jobs."""
+        jobs = {}
+        other = self._otherJob
+        if other.total > 0 and self.clock() - other.sampleTime < OTHER_ACTIVE_TIME:
+            jobs[ other.name ] = other.rate
+        jobs.update( { meter.name: meter.rate for meter in self._jobs.values() } )
+        return { "limit": self.getLimit(), "jobs": jobs }
+
+    @synchronized
+    def _addJob(self, meter: JobMeter):
+        self._jobs[ id( meter ) ] = meter
+
+    @synchronized
+    def _removeJob(self, meter: JobMeter):
+        self._jobs.pop( id( meter ), None )
+
+    @synchronized
+    def _updateJob(self, meter: JobMeter, amount, now):
+        meter.update( amount, now )
+
+
+def is_night( timestamp, night_hours ) -> bool:
+    hour = time.localtime( timestamp ).tm_hour
+    start, end = night_hours
+    if start <= end:
+        return start <= hour < end
+    ## range over midnight, e.g. (22, 6)
+    return hour >= start or hour < end
+
+
+# parse hours range in format '22-6'
+def parse_hours( hours_text ) -> Tuple[int, int]:
+    start, end = hours_text.split( "-", 1 )
+    return ( int( start ) % 24, int( end ) % 24 )
+
+
+## process-wide governor of download bandwidth
+BANDWIDTH = BandwidthGovernor()
+
+
+# limits are given in KiB per second
+def configure_bandwidth( day_limit=None, night_limit=None, night_hours=None, serve_reserve=None ):
+    if day_limit is not None:
+        day_limit *= 1024
+    if night_limit is not None:
+        night_limit *= 1024
+    if isinstance( night_hours, str ):
+        night_hours = parse_hours( night_hours )
+    BANDWIDTH.configure( day_limit, night_limit, night_hours, serve_reserve )
@@ -0,0 +1,100 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import os
+import logging
+import weakref
+
+from rsscast import CACHE_DIR, persist
+from rsscast.synchronized import synchronized
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+## all created caches -- allows to store them together with user data
+_CACHES: weakref.WeakSet = weakref.WeakSet()
+
+
+class PersistentDict():
+    """Dictionary stored in cache directory.
+
+    Data is loaded on first access and stored on 'store()' call.
+    """
+
+    def __init__(self, cacheName, cachePath=None):
+        if cachePath is None:
+            cachePath = os.path.join( CACHE_DIR, f"{cacheName}.obj" )
+        self.cacheName = cacheName
+        self.cachePath = cachePath
+        self._data = None
+        self._changed = False
+        _CACHES.add( self )
+
+    @synchronized
+    def get(self, key, default=None):
+        data = self._getData()
+        return data.get( key, default )
+
+    @synchronized
+    def set(self, key, value):
+        data = self._getData()
+        data[ key ] = value
+        self._changed = True
+
+    @synchronized
+    def pop(self, key, default=None):
+        data = self._getData()
+        if key not in data:
+            return default
+        self._changed = True
+        return data.pop( key )
+
+    @synchronized
+    def size(self):
+        data = self._getData()
+        return len( data )
+
+    @synchronized
+    def clear(self):
+        self._data = {}
+        self._changed = True
+
+    @synchronized
+    def store(self):
+        if self._changed is False:
+            return False
+        persist.store_object( self._data, self.cachePath )
+        self._changed = False
+        return True
+
+    def _getData(self):
+        if self._data is None:
+            self._data = persist.load_object_simple( self.cachePath, {}, silent=True )
+        return self._data
+
+
+def store_all():
+    """Store all caches created so far."""
+    for cache in list( _CACHES ):
+        cache.store()
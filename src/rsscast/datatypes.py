@@ -28,9 +28,10 @@ import re
 from typing import List
 from collections import Counter
 
-from rsscast import persist
+from rsscast import persist, cache
 from rsscast.rss.rsschannel import RSSChannel, RSSItem, get_channel_output_dir
 from rsscast.rss.rssgenerator import generate_channel_rss, remove_item_data
+from rsscast.rss.audioformat import DEFAULT_AUDIO_FORMAT
 from rsscast.source.parser import parse_url
 
 
@@ -43,7 +44,9 @@ class FeedEntry( persist.Versionable ):
     ## 0 - first version
     ## 1 - add 'enabled' field
     ## 2 - add 'channel' field
-    _class_version = 2
+    ## 3 - add 'nextDue' field
+    ## 4 - add 'audioFormat' field
+    _class_version = 4
 
     def __init__(self):
         self.feedName            = None            ## defined by user
@@ -51,6 +54,8 @@ class FeedEntry( persist.Versionable ):
         self.url                 = None
         self.channel: RSSChannel = RSSChannel()
         self.enabled             = True
+        self.nextDue             = None            ## timestamp of next poll in daemon mode
+        self.audioFormat         = DEFAULT_AUDIO_FORMAT    ## format of downloaded media
 
     def _convertstate_( self, dict_, dictVersion_ ):
         _LOGGER.info( "converting object from version %s to %s", dictVersion_, self._class_version )
@@ -68,6 +73,14 @@ class FeedEntry( persist.Versionable ):
             dict_["channel"] = RSSChannel()
             dictVersion_ = 2
 
+        if dictVersion_ == 2:
+            dict_["nextDue"] = None
+            dictVersion_ = 3
+
+        if dictVersion_ == 3:
+            dict_["audioFormat"] = DEFAULT_AUDIO_FORMAT
+            dictVersion_ = 4
+
         # pylint: disable=W0201
         self.__dict__ = dict_
 
@@ -99,19 +112,15 @@ class FeedEntry( persist.Versionable ):
         channelPath = self.getChannelLocalDir()
         ret_list = []
         for rssItem in self.channel.items:
-            videoId = rssItem.videoId()
-            postLocalPath = get_local_path( channelPath, videoId )
+            postLocalPath = get_local_path( channelPath, rssItem )
             ret_list.append( (rssItem, postLocalPath) )
         return ret_list
 
     def updateLocalData(self):
-        """Read media size from files stored locally."""
+        """Read media size and duration from files stored locally."""
         local_items = self.getLocalPaths()
         for rssItem, postLocalPath in local_items:
-            if os.path.exists(postLocalPath):
-                rssItem.mediaSize = os.path.getsize( postLocalPath )
-            else:
-                rssItem.mediaSize = -1
+            rssItem.updateMediaInfo( postLocalPath )
 
     def fixRepeatedTitles( self ):
         if self.channel is None:
@@ -141,9 +150,15 @@ class FeedEntry( persist.Versionable ):
 def fetch_feed( feed: FeedEntry ):
     """Download channel's source RSS."""
     current_links = feed.getItemsURLs()
-    rssChannel: RSSChannel = parse_url( feed.feedId, feed.url, known_items=current_links, write_content=False )
-    _LOGGER.info( "updating feed %s with %s new items", feed.feedId, rssChannel.size() )
-    feed.update( rssChannel )
+    ## conditional request makes sense only if there is previous data
+    conditional = len( current_links ) > 0
+    rssChannel: RSSChannel = parse_url( feed.feedId, feed.url, known_items=current_links, write_content=False,
+                                        conditional=conditional )
+    if rssChannel is None:
+        _LOGGER.info( "feed %s not modified", feed.feedId )
+    else:
+        _LOGGER.info( "updating feed %s with %s new items", feed.feedId, rssChannel.size() )
+        feed.update( rssChannel )
     feed.updateLocalData()
     feed.fixRepeatedTitles()
 
@@ -151,11 +166,11 @@ def fetch_feed( feed: FeedEntry ):
 def parse_feed( feed: FeedEntry ):
     """Fetch media and generate converted RSS."""
     fetch_feed( feed )
-    generate_channel_rss( feed.feedId, feed.channel )
+    generate_channel_rss( feed.feedId, feed.channel, audioFormat=feed.audioFormat )
 
 
-def get_local_path(channelPath, videoId):
-    return f"{channelPath}/{videoId}.mp3"
+def get_local_path(channelPath, rssItem: RSSItem):
+    return f"{channelPath}/{rssItem.mediaFileName()}"
 
 
 ## ========================================================
@@ -251,6 +266,9 @@ class UserContainer():
         if persist.store_object( self.feed, outputFile ) is True:
             changed = True
 
+        ## caches are stored together with feed data to keep them consistent
+        cache.store_all()
+
         ## backup data
         objFiles = glob.glob( outputDir + "/*.obj" )
         storedZipFile = outputDir + "/data.zip"
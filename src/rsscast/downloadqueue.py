@@ -0,0 +1,138 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import asyncio
+import logging
+import contextvars
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, Callable, Any
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from rsscast.synchronized import synchronized
+from rsscast.eventloop import FutureSemaphore
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+## number of media downloads executed concurrently (across all feeds)
+DEFAULT_DOWNLOAD_JOBS = 4
+
+## number of concurrent downloads using single converter (service)
+DEFAULT_CONVERTER_JOBS = 2
+
+
+class DownloadQueue():
+    """Process-wide queue of media downloads shared by all feeds.
+
+    Global number of workers limits total parallelism of blocking steps, while
+    semaphores limit number of concurrent jobs using the same converter, so single
+    service is not flooded with requests. Slots can be awaited in coroutines
+    (see 'eventloop.EVENT_LOOP'), so waiting does not occupy any worker.
+    """
+
+    def __init__(self, jobs=DEFAULT_DOWNLOAD_JOBS, converter_jobs=DEFAULT_CONVERTER_JOBS):
+        self.jobs = jobs
+        self.converterJobs = converter_jobs
+        self.converterLimits: Dict[str, int] = {}
+        self._executor: ThreadPoolExecutor = None
+        self._semaphores: Dict[str, FutureSemaphore] = {}
+
+    @synchronized
+    def configure(self, jobs=None, converter_jobs=None, converter_limits: Dict[str, int] = None):
+        """Set limits. Change of number of jobs applies to executor created after shutdown."""
+        if jobs is not None:
+            self.jobs = max( jobs, 1 )
+        if converter_jobs is not None:
+            self.converterJobs = max( converter_jobs, 1 )
+            ## uniform limit overrides specific ones
+            self.converterLimits = {}
+        if converter_limits is not None:
+            self.converterLimits.update( converter_limits )
+        self._semaphores = {}
+
+    def submit(self, function: Callable[..., Any], *args, **kwargs) -> Future:
+        executor = self._getExecutor()
+        return executor.submit( function, *args, **kwargs )
+
+    async def runInWorker(self, function: Callable[..., Any], *args, **kwargs):
+        """Await blocking function executed by worker. Context variables (e.g. bandwidth job) are passed to worker."""
+        context = contextvars.copy_context()
+        return await asyncio.wrap_future( self.submit( context.run, function, *args, **kwargs ) )
+
+    @contextmanager
+    def converterSlot(self, converter_name):
+        """Wait for free slot of given converter."""
+        semaphore = self._getSemaphore( converter_name )
+        with semaphore.hold():
+            yield
+
+    @asynccontextmanager
+    async def converterSlotAsync(self, converter_name):
+        """Await free slot of given converter."""
+        semaphore = self._getSemaphore( converter_name )
+        async with semaphore.holdAsync():
+            yield
+
+    @synchronized
+    def getConverterLimit(self, converter_name):
+        return self.converterLimits.get( converter_name, self.converterJobs )
+
+    @synchronized
+    def shutdown(self):
+        if self._executor is None:
+            return
+        self._executor.shutdown( wait=True )
+        self._executor = None
+
+    @synchronized
+    def _getExecutor(self):
+        if self._executor is None:
+            _LOGGER.info( "starting download queue with %s jobs", self.jobs )
+            self._executor = ThreadPoolExecutor( max_workers=self.jobs, thread_name_prefix="Download" )
+        return self._executor
+
+    @synchronized
+    def _getSemaphore(self, converter_name):
+        semaphore = self._semaphores.get( converter_name )
+        if semaphore is None:
+            limit = self.getConverterLimit( converter_name )
+            semaphore = FutureSemaphore( limit )
+            self._semaphores[ converter_name ] = semaphore
+        return semaphore
+
+
+def get_converter_name( converter ) -> str:
+    """Return name of converter function, e.g. 'convert_ddownr_com'."""
+    module_name = getattr( converter, "__module__", None )
+    if not module_name:
+        return converter.__name__
+    return module_name.rsplit( ".", maxsplit=1 )[-1]
+
+
+## process-wide queue of downloads
+DOWNLOAD_QUEUE = DownloadQueue()
+
+
+def configure_downloads( jobs=None, converter_jobs=None ):
+    DOWNLOAD_QUEUE.configure( jobs, converter_jobs )
@@ -0,0 +1,140 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import asyncio
+import logging
+import threading
+import collections
+from contextlib import contextmanager, asynccontextmanager
+from concurrent.futures import Future
+from typing import Deque
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EventLoopThread():
+    """Event loop running in background thread.
+
+    Coroutines can be submitted from any thread. Waiting inside coroutine
+    (e.g. for network transfer or for other future) does not occupy any thread.
+    """
+
+    def __init__(self, name="EventLoop"):
+        self.name = name
+        self._loop: asyncio.AbstractEventLoop = None
+        self._thread: threading.Thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, coroutine) -> Future:
+        """Schedule coroutine in loop and return future of its result."""
+        loop = self._getLoop()
+        return asyncio.run_coroutine_threadsafe( coroutine, loop )
+
+    def stop(self):
+        with self._lock:
+            if self._loop is None:
+                return
+            self._loop.call_soon_threadsafe( self._loop.stop )
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+            self._thread = None
+
+    def _getLoop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread( target=self._loop.run_forever, name=self.name, daemon=True )
+                self._thread.start()
+            return self._loop
+
+
+class FutureSemaphore():
+    """Bounded semaphore granting permits as futures.
+
+    Permit can be awaited in coroutine without blocking event loop or
+    waited for in thread, and both kinds of holders exclude each other.
+    Waiters are served in order of arrival.
+    """
+
+    def __init__(self, value=1):
+        self.limit = value
+        self._value = value
+        self._waiters: Deque[Future] = collections.deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Future:
+        """Return future resolved when permit is granted. Cancelled future does not take permit."""
+        waiter = Future()
+        with self._lock:
+            if self._value > 0 and not self._waiters:
+                self._value -= 1
+                waiter.set_running_or_notify_cancel()
+                waiter.set_result( None )
+                return waiter
+            self._waiters.append( waiter )
+        return waiter
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if waiter.set_running_or_notify_cancel():
+                    ## permit passed directly to waiter
+                    break
+            else:
+                if self._value >= self.limit:
+                    raise ValueError( "semaphore released too many times" )
+                self._value += 1
+                return
+        waiter.set_result( None )
+
+    @contextmanager
+    def hold(self):
+        """Wait for permit in current thread."""
+        self.acquire().result()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def holdAsync(self):
+        """Await permit in coroutine."""
+        granted = self.acquire()
+        try:
+            await asyncio.wrap_future( granted )
+        except asyncio.CancelledError:
+            if not granted.cancel():
+                ## permit was granted meanwhile
+                self.release()
+            raise
+        try:
+            yield
+        finally:
+            self.release()
+
+
+## process-wide loop driving media downloads
+EVENT_LOOP = EventLoopThread()
@@ -0,0 +1,111 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import logging
+from typing import List, Callable, Any
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+## default number of feeds processed concurrently for single host
+DEFAULT_HOST_JOBS = 2
+
+
+class FeedPool():
+    """Execute function on list of feeds using bounded number of worker threads.
+
+    Besides global limit of concurrent jobs there is limit of concurrent jobs
+    accessing the same host, so single service is not flooded with requests.
+    """
+
+    def __init__(self, jobs=1, host_jobs=DEFAULT_HOST_JOBS):
+        self.jobs     = max(jobs, 1)
+        self.hostJobs = max(host_jobs, 1)
+
+    # returns list of results in order of given feeds
+    def execute(self, function: Callable[[Any], Any], feedList: List[Any]) -> List[Any]:
+        if self.jobs < 2:
+            ## serial execution
+            return [ function(feed) for feed in feedList ]
+
+        _LOGGER.info("processing %s feeds using %s jobs (%s per host)", len(feedList), self.jobs, self.hostJobs)
+
+        pending = list( enumerate(feedList) )
+        running = {}                    ## future -> (index, host)
+        hostCounter: Counter = Counter()
+        results = [None] * len(feedList)
+        errors  = [None] * len(feedList)
+
+        with ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="FeedPool") as executor:
+            while pending or running:
+                ## submit jobs not exceeding limits
+                pos = 0
+                while len(running) < self.jobs and pos < len(pending):
+                    index, feed = pending[pos]
+                    host = get_host_key( feed.url )
+                    if hostCounter[host] >= self.hostJobs:
+                        ## host is busy - try next feed
+                        pos += 1
+                        continue
+                    del pending[pos]
+                    hostCounter[host] += 1
+                    future = executor.submit( function, feed )
+                    running[future] = (index, host)
+
+                done, _ = wait( running.keys(), return_when=FIRST_COMPLETED )
+                for future in done:
+                    index, host = running.pop( future )
+                    hostCounter[host] -= 1
+                    try:
+                        results[index] = future.result()
+                    except Exception as exc:           # pylint: disable=W0703
+                        _LOGGER.exception("unable to process feed: %s", feedList[index].url)
+                        errors[index] = exc
+                        if pending:
+                            ## stop as serial execution does - running jobs are finished
+                            _LOGGER.warning("skipping %s remaining feeds", len(pending))
+                            pending.clear()
+
+        ## reraise first error (in order of feeds) as in serial execution
+        for exc in errors:
+            if exc is not None:
+                raise exc
+
+        return results
+
+
+def get_host_key(url) -> str:
+    """Return host name used to group feeds, e.g. 'youtube.com'."""
+    if not url:
+        return ""
+    host = urlsplit( url ).hostname
+    if not host:
+        return ""
+    host = host.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return host
@@ -28,6 +28,7 @@ import datetime
 
 from rsscast.rss.rsschannel import RSSItem
 from rsscast.datatypes import FeedEntry
+from rsscast.mediastore import MEDIA_STORE
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -50,6 +51,8 @@ def remove_old_files(feedList: List[ FeedEntry ], files_limit):
         file_path = item[1]
         _LOGGER.info("removing file %s: %s %s %s", feed.feedId, rss_item.title, file_path, dt_object)
         os.remove(file_path)
+        ## media shared with other feeds is kept
+        MEDIA_STORE.release(rss_item.mediaFileName())
     return True
 
 
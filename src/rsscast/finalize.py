@@ -0,0 +1,148 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+##
+## Finalization of downloaded files.
+##
+## Files are staged next to destination, so they can be committed by atomic
+## rename without rewriting content. If staged file is on other file system,
+## then content is copied by kernel ('copy_file_range' or 'sendfile').
+##
+
+import os
+import errno
+import shutil
+import logging
+
+from rsscast.synchronized import synchronized
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+STAGE_SUFFIX = ".stage"
+
+## errors meaning that kernel copy function is not supported for given files
+UNSUPPORTED_ERRORS = ( errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP )
+
+
+class FinalizeStats():
+    """Counters of finalized files."""
+
+    def __init__(self):
+        self.renamed      = 0
+        self.renamedBytes = 0               ## bytes not copied thanks to rename
+        self.copied       = 0
+        self.copiedBytes  = 0
+
+    @synchronized
+    def addRenamed(self, size):
+        self.renamed      += 1
+        self.renamedBytes += size
+
+    @synchronized
+    def addCopied(self, size):
+        self.copied      += 1
+        self.copiedBytes += size
+
+    @synchronized
+    def getStats(self):
+        return { "renamed": self.renamed, "renamed_bytes": self.renamedBytes,
+                 "copied": self.copied, "copied_bytes": self.copiedBytes }
+
+
+FINALIZE_STATS = FinalizeStats()
+
+
+# returns path of staging file placed in the same directory as destination
+def stage_path( destPath ):
+    return destPath + STAGE_SUFFIX
+
+
+def commit( stagedPath, destPath ):
+    """Move staged file to destination, replacing existing file."""
+    size = os.path.getsize( stagedPath )
+    try:
+        os.replace( stagedPath, destPath )
+        FINALIZE_STATS.addRenamed( size )
+        _LOGGER.debug( "finalized %s by rename, saved %.2f MB of copying", destPath, size / 1048576 )
+        return
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+
+    ## staged on other file system - copy next to destination to keep replace atomic
+    local_stage = stage_path( destPath )
+    try:
+        copy_file( stagedPath, local_stage )
+        os.replace( local_stage, destPath )
+    finally:
+        if os.path.exists( local_stage ):
+            os.remove( local_stage )
+    os.remove( stagedPath )
+    FINALIZE_STATS.addCopied( size )
+    _LOGGER.info( "finalized %s by copy of %.2f MB (staged on other file system)", destPath, size / 1048576 )
+
+
+def copy_file( sourcePath, destPath ) -> int:
+    """Copy file content inside kernel. Returns number of copied bytes."""
+    with open( sourcePath, "rb" ) as in_file, open( destPath, "wb" ) as out_file:
+        size = os.fstat( in_file.fileno() ).st_size
+        copied = kernel_copy( in_file.fileno(), out_file.fileno(), size )
+        if copied < size:
+            ## kernel copy not available - copy remaining data in user space
+            in_file.seek( copied )
+            out_file.seek( copied )
+            shutil.copyfileobj( in_file, out_file )
+    return size
+
+
+# copy from current positions of descriptors, returns number of copied bytes
+def kernel_copy( in_fd, out_fd, size ) -> int:
+    copied = 0
+    copy_functions = []
+    if hasattr( os, "copy_file_range" ):
+        copy_functions.append( lambda count: os.copy_file_range( in_fd, out_fd, count ) )
+    if hasattr( os, "sendfile" ):
+        copy_functions.append( lambda count: os.sendfile( out_fd, in_fd, None, count ) )
+
+    for copy_function in copy_functions:
+        try:
+            while copied < size:
+                sent = copy_function( size - copied )
+                if sent == 0:
+                    break
+                copied += sent
+            return copied
+        except OSError as exc:
+            if exc.errno not in UNSUPPORTED_ERRORS:
+                raise
+            ## positions of descriptors are updated by successful calls only, so next function continues
+    return copied
+
+
+def log_finalize_stats():
+    stats = FINALIZE_STATS.getStats()
+    _LOGGER.info( "finalized files: renamed: %s (%.2f MB not copied) copied: %s (%.2f MB)",
+                  stats["renamed"], stats["renamed_bytes"] / 1048576,
+                  stats["copied"], stats["copied_bytes"] / 1048576 )
@@ -28,6 +28,7 @@ import re
 import unidecode
 
 from rsscast.datatypes import FeedEntry
+from rsscast.rss.audioformat import AUDIO_FORMATS
 
 from rsscast.gui import uiloader
 from rsscast.source.youtube.ytfeedreader import read_yt_rss
@@ -58,6 +59,9 @@ class FeedDialog( QtBaseClass ):           # type: ignore
 
         self.ui.readRSSPB.clicked.connect( self._readURL )
 
+        for formatName in AUDIO_FORMATS:
+            self.ui.formatCB.addItem( formatName )
+
         self.entry: FeedEntry = None
 
         self.finished.connect( self._done )
@@ -73,6 +77,7 @@ class FeedDialog( QtBaseClass ):           # type: ignore
         self.ui.nameLE.setText( self.entry.feedName )
         self.ui.idLE.setText( self.entry.feedId )
         self.ui.urlLE.setText( self.entry.url )
+        self.ui.formatCB.setCurrentText( self.entry.audioFormat )
 
 #         self.adjustSize()
 
@@ -95,3 +100,4 @@ class FeedDialog( QtBaseClass ):           # type: ignore
         self.entry.feedName = self.ui.nameLE.text()
         self.entry.feedId = self.ui.idLE.text()
         self.entry.url = self.ui.urlLE.text()
+        self.entry.audioFormat = self.ui.formatCB.currentText()
@@ -308,7 +308,7 @@ class RSSChannelTable( QTableView ):
         if action == pullAction:
             feedId  = self.feedObject.feedId
             itemsList = [entry]
-            download_items( feedId, itemsList )
+            download_items( feedId, itemsList, audioFormat=self.feedObject.audioFormat )
             channel = self.feedObject.channel
             generate_channel_rss( feedId, channel, downloadContent=False )
         elif action == removeFileAction:
@@ -0,0 +1,217 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import os
+import time
+import json
+import logging
+from typing import Dict, List, Any, Tuple
+
+from rsscast import DATA_DIR
+from rsscast.synchronized import synchronized
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+JOURNAL_FILE = "jobs.jsonl"
+
+STATE_QUEUED  = "queued"
+STATE_RUNNING = "running"
+STATE_DONE    = "done"
+STATE_FAILED  = "failed"
+
+FINISHED_STATES = ( STATE_DONE, STATE_FAILED )
+
+## remote conversions older than given number of seconds are considered expired
+REMOTE_JOB_TTL = 6 * 3600
+
+## failed jobs are kept in journal for given number of seconds
+FAILED_RETENTION = 7 * 24 * 3600
+
+
+class JobJournal():
+    """Append-only journal of download jobs (one JSON record per line).
+
+    Job is identified by path of output file. Every change of job's state is
+    appended and flushed to disk, so after crash the state is restored by
+    replaying the journal. Jobs interrupted while converting keep identifier
+    of remote conversion, so polling can be resumed instead of resubmitting.
+    Journal is compacted on load and periodically (see 'compact()') - finished
+    jobs are dropped.
+    """
+
+    def __init__(self, journalPath=None):
+        if journalPath is None:
+            journalPath = os.path.join( DATA_DIR, JOURNAL_FILE )
+        self.journalPath = journalPath
+        self._jobs: Dict[str, Dict[str, Any]] = None
+        self._file = None
+        self._appended = 0                  ## number of records appended since compaction
+
+    @synchronized
+    def update(self, key, state, **fields):
+        """Append new state of job. Remote conversion is forgotten when job finished."""
+        self._load()
+        record = { "key": key, "state": state, "time": time.time() }
+        record.update( fields )
+        if state in FINISHED_STATES:
+            record[ "remote" ] = None
+        self._apply( record )
+        self._append( record )
+
+    @synchronized
+    def setRemoteJob(self, key, converter, remoteId):
+        """Store identifier of conversion started on remote service. Ignored for jobs not in journal."""
+        self._load()
+        if key not in self._jobs:
+            return
+        record = { "key": key, "state": STATE_RUNNING, "time": time.time(),
+                   "remote": { "converter": converter, "id": remoteId, "time": time.time() } }
+        self._apply( record )
+        self._append( record )
+
+    @synchronized
+    def getRemoteJob(self, key, now=None) -> Tuple[str, Any]:
+        """Return pair of converter name and remote job identifier or None."""
+        self._load()
+        job = self._jobs.get( key )
+        if job is None:
+            return None
+        remote = job.get( "remote" )
+        if not remote:
+            return None
+        if now is None:
+            now = time.time()
+        if now - remote.get( "time", 0 ) > REMOTE_JOB_TTL:
+            return None
+        return ( remote.get( "converter" ), remote.get( "id" ) )
+
+    @synchronized
+    def getJob(self, key) -> Dict[str, Any]:
+        self._load()
+        job = self._jobs.get( key )
+        if job is None:
+            return None
+        return dict( job )
+
+    @synchronized
+    def getUnfinished(self) -> List[Dict[str, Any]]:
+        """Return jobs interrupted before finish (e.g. by crash)."""
+        self._load()
+        return [ dict( job ) for job in self._jobs.values() if job["state"] not in FINISHED_STATES ]
+
+    @synchronized
+    def compact(self):
+        """Rewrite journal dropping finished jobs, so journal of long running process does not grow.
+
+        Nothing is done if no record was appended since previous compaction.
+        """
+        self._load()
+        if self._appended < 1:
+            return
+        self._compact()
+
+    @synchronized
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._jobs = None
+
+    def _load(self):
+        if self._jobs is not None:
+            return
+        self._jobs = {}
+        if not os.path.isfile( self.journalPath ):
+            return
+        with open( self.journalPath, "r", encoding="utf-8" ) as journal_file:
+            for line_num, line in enumerate( journal_file, start=1 ):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads( line )
+                except json.JSONDecodeError:
+                    ## e.g. record partially written during crash
+                    _LOGGER.warning( "invalid record in line %s of journal %s -- skipped",
+                                     line_num, self.journalPath )
+                    continue
+                self._apply( record )
+        self._compact()
+
+    ## rewrite journal keeping current state of relevant jobs
+    def _compact(self, now=None):
+        if now is None:
+            now = time.time()
+        if self._file is not None:
+            ## file is replaced - next record is appended to new file
+            self._file.close()
+            self._file = None
+        for key in list( self._jobs.keys() ):
+            job = self._jobs[ key ]
+            state = job["state"]
+            if state == STATE_DONE or ( state == STATE_FAILED and now - job["time"] > FAILED_RETENTION ):
+                del self._jobs[ key ]
+        tmp_path = self.journalPath + ".tmp"
+        with open( tmp_path, "w", encoding="utf-8" ) as journal_file:
+            for job in self._jobs.values():
+                journal_file.write( json.dumps( job ) + "\n" )
+            journal_file.flush()
+            os.fsync( journal_file.fileno() )
+        os.replace( tmp_path, self.journalPath )
+        self._appended = 0
+
+    def _apply(self, record):
+        key = record.get( "key" )
+        if key is None:
+            return
+        job = self._jobs.get( key )
+        if job is None:
+            job = {}
+            self._jobs[ key ] = job
+        job.update( record )
+
+    def _append(self, record):
+        if self._file is None:
+            dir_path = os.path.dirname( self.journalPath )
+            if dir_path:
+                os.makedirs( dir_path, exist_ok=True )
+            self._file = open( self.journalPath, "a", encoding="utf-8" )      # pylint: disable=R1732
+        self._file.write( json.dumps( record ) + "\n" )
+        self._file.flush()
+        os.fsync( self._file.fileno() )
+        self._appended += 1
+
+
+## process-wide journal of downloads
+JOB_JOURNAL = JobJournal()
+
+
+def log_unfinished_jobs():
+    unfinished = JOB_JOURNAL.getUnfinished()
+    if not unfinished:
+        return
+    _LOGGER.info( "found %s download jobs interrupted in previous run", len( unfinished ) )
+    for job in unfinished:
+        _LOGGER.info( "interrupted job: %s state: %s remote: %s", job["key"], job["state"], job.get( "remote" ) )
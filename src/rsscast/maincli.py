@@ -42,8 +42,21 @@ from rsscast.datatypes import FeedEntry, parse_feed, fetch_feed
 from rsscast.gui.resources import get_user_data_path
 from rsscast.gui.dataobject import DataObject
 from rsscast.filelimit import remove_old_files
+from rsscast.mediastore import MEDIA_STORE
+from rsscast.jobjournal import JOB_JOURNAL, log_unfinished_jobs
+from rsscast.feedpool import FeedPool, DEFAULT_HOST_JOBS
+from rsscast.scheduler import FeedScheduler
+from rsscast.downloadqueue import configure_downloads, DEFAULT_DOWNLOAD_JOBS, DEFAULT_CONVERTER_JOBS
+from rsscast.transcodepool import configure_transcoding, parse_cpu_list, DEFAULT_TRANSCODE_JOBS, \
+    DEFAULT_TRANSCODE_NICE
+from rsscast.bandwidth import configure_bandwidth, DEFAULT_SERVE_RESERVE
 from rsscast.rss.rsschannel import RSSChannel
+from rsscast.rss.audioformat import AUDIO_FORMATS, DEFAULT_AUDIO_FORMAT
 from rsscast.source.parser import parse_url
+from rsscast.source.httpsession import configure_sessions, log_sessions_stats, \
+    DEFAULT_POOL_SIZE as DEFAULT_HTTP_POOL_SIZE, DEFAULT_TIMEOUT as DEFAULT_HTTP_TIMEOUT
+from rsscast.source.curlpool import log_curl_stats
+from rsscast.finalize import log_finalize_stats
 from rsscast.rss.rssgenerator import download_list
 
 
@@ -75,26 +88,34 @@ class CliApp:
         dataPath = get_user_data_path()
         self.data.store( dataPath )
 
-    def fetchRSS(self):
+    def fetchRSS(self, jobs=1, host_jobs=DEFAULT_HOST_JOBS):
         itemsNum = self.data.feed.countItems()
         feedList: List[ FeedEntry ] = self.data.feed.getList()
-        for feed in feedList:
-#             if feed.enabled is False:
-#                 continue
-            fetch_feed( feed )
+        pool = FeedPool( jobs, host_jobs )
+        pool.execute( fetch_feed, feedList )
         addedItems = self.data.feed.countItems() - itemsNum
         _LOGGER.info( "fetched new items: %s", addedItems )
 
-    def refreshRSS(self):
+    def refreshRSS(self, jobs=1, host_jobs=DEFAULT_HOST_JOBS):
         feedList: List[ FeedEntry ] = self.data.feed.getList()
-        for feed in feedList:
-            if feed.enabled is False:
-                continue
-            parse_feed( feed )
+        feedList = [ feed for feed in feedList if feed.enabled ]
+        pool = FeedPool( jobs, host_jobs )
+        pool.execute( parse_feed, feedList )
+
+    def runDaemon(self, jobs=1, host_jobs=DEFAULT_HOST_JOBS):
+        scheduler = FeedScheduler( parse_feed, jobs, host_jobs )
+        try:
+            scheduler.run( self.data.feed.getList, self.saveData )
+        except KeyboardInterrupt:
+            _LOGGER.info( "stopping the daemon" )
 
     def removeOldFiles(self, files_limit):
         feedList: List[ FeedEntry ] = self.data.feed.getList()
         remove_old_files(feedList, files_limit)
+        ## e.g. feed directories removed manually
+        removed = MEDIA_STORE.collectGarbage()
+        if removed > 0:
+            _LOGGER.info( "removed %s unreferenced media files", removed )
 
     def startServer(self):
         pass
@@ -130,7 +151,7 @@ def process_download(args):
     if recent_items is not None:
         recent_items = int(recent_items)
     download_list( "direct", items, cwd, start_from=start_from, end_to=end_to, recent_items=recent_items,
-                   use_filename_title=True, prepend_index=True )
+                   use_filename_title=True, prepend_index=True, audio_format=args.audioFormat )
 
     # converted = convert_to_audio( grab_url, "" )
     # if converted is False:
@@ -149,20 +170,36 @@ def run_cli( args ):
     appData = CliApp()
     cli_mode = False
 
+    configure_sessions( args.httpPoolSize, args.httpTimeout )
+    configure_downloads( args.downloadJobs, args.converterJobs )
+    configure_transcoding( args.transcodeJobs, args.transcodeNice, parse_cpu_list( args.transcodeCpus ) )
+    configure_bandwidth( args.bandwidthDay, args.bandwidthNight, args.nightHours, args.serveReserve )
+
+    if args.refreshRSS or args.daemon:
+        ## remote conversions of interrupted jobs are resumed during refresh
+        log_unfinished_jobs()
+
     if args.fetchRSS:
         cli_mode = True
         appData.init()
         _LOGGER.info( "fetching feed" )
-        appData.fetchRSS()
+        appData.fetchRSS( args.jobs, args.hostJobs )
         _LOGGER.info( "fetching done" )
 
     if args.refreshRSS:
         cli_mode = True
         appData.init()
         _LOGGER.info( "refreshing feed" )
-        appData.refreshRSS()
+        appData.refreshRSS( args.jobs, args.hostJobs )
         _LOGGER.info( "refreshing done" )
 
+    if args.daemon:
+        cli_mode = True
+        appData.init()
+        _LOGGER.info( "starting daemon" )
+        appData.runDaemon( args.jobs, args.hostJobs )
+        _LOGGER.info( "daemon stopped" )
+
     if args.reduceFiles:
         cli_mode = True
         appData.init()
@@ -171,6 +208,10 @@ def run_cli( args ):
 
     if cli_mode:
         appData.saveData()
+        log_sessions_stats()
+        log_curl_stats()
+        log_finalize_stats()
+        JOB_JOURNAL.close()
 
     if args.startServer:
         _LOGGER.info( "starting server" )
@@ -198,6 +239,34 @@ def create_parser( parser: argparse.ArgumentParser = None ):
     parser.add_argument('--fetchRSS', action='store_const', const=True, default=False, help='Update RSS channels' )
     parser.add_argument('--refreshRSS', action='store_const', const=True, default=False,
                         help='Update RSS channels and download content' )
+    parser.add_argument('--daemon', action='store_const', const=True, default=False,
+                        help='Refresh RSS channels continuously, polling busy channels more often than dormant ones' )
+    parser.add_argument('--jobs', action='store', type=int, default=1,
+                        help='Number of feeds processed concurrently while fetching or refreshing' )
+    parser.add_argument('--hostJobs', action='store', type=int, default=DEFAULT_HOST_JOBS,
+                        help='Number of feeds of the same host processed concurrently' )
+    parser.add_argument('--httpPoolSize', action='store', type=int, default=DEFAULT_HTTP_POOL_SIZE,
+                        help='Number of idle HTTP sessions and connections per host kept alive' )
+    parser.add_argument('--httpTimeout', action='store', type=float, default=DEFAULT_HTTP_TIMEOUT,
+                        help='Timeout of HTTP requests in seconds' )
+    parser.add_argument('--downloadJobs', action='store', type=int, default=DEFAULT_DOWNLOAD_JOBS,
+                        help='Number of media downloads executed concurrently (across all feeds)' )
+    parser.add_argument('--converterJobs', action='store', type=int, default=DEFAULT_CONVERTER_JOBS,
+                        help='Number of concurrent downloads using single converter service' )
+    parser.add_argument('--transcodeJobs', action='store', type=int, default=DEFAULT_TRANSCODE_JOBS,
+                        help='Number of concurrent processes transcoding downloaded audio to MP3' )
+    parser.add_argument('--transcodeNice', action='store', type=int, default=DEFAULT_TRANSCODE_NICE,
+                        help='Nice level of transcoding processes' )
+    parser.add_argument('--transcodeCpus', action='store', default=None,
+                        help='CPUs used by transcoding processes, e.g. "1,2-3" (default: all)' )
+    parser.add_argument('--bandwidthDay', action='store', type=int, default=0,
+                        help='Download bandwidth limit during day in KiB/s (0 means unlimited)' )
+    parser.add_argument('--bandwidthNight', action='store', type=int, default=0,
+                        help='Download bandwidth limit during night in KiB/s (0 means unlimited)' )
+    parser.add_argument('--nightHours', action='store', default="0-6",
+                        help='Hours of night bandwidth limit in format "<start>-<end>"' )
+    parser.add_argument('--serveReserve', action='store', type=float, default=DEFAULT_SERVE_RESERVE,
+                        help='Share of bandwidth limit left for RSS server clients while they download' )
     parser.add_argument('--reduceFiles', action='store', type=int,
                         help='Remove old files reducing files numbers to given' )
     parser.add_argument('--startServer', action='store_const', const=True, default=False, help='Start RSS server' )
@@ -233,6 +302,14 @@ def create_parser( parser: argparse.ArgumentParser = None ):
         default=None,
         help="Get given number of recent items from playlist",
     )
+    subparser.add_argument(
+        "--audioFormat",
+        action="store",
+        required=False,
+        default=DEFAULT_AUDIO_FORMAT,
+        choices=list(AUDIO_FORMATS),
+        help="Format of downloaded audio files",
+    )
 
     return parser
 
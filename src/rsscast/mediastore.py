@@ -0,0 +1,160 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import os
+import logging
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, List
+
+from rsscast import DATA_DIR
+from rsscast import finalize
+from rsscast.eventloop import FutureSemaphore
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+MEDIA_SUBDIR = "media"
+
+
+class MediaStore():
+    """Store of media files shared by feeds, keyed by name of media file (video id and extension).
+
+    Files in feed directories are hardlinks to blobs in store, so number of
+    links of blob is reference counter: blob referenced only by store itself
+    is removed. If hardlink can not be created (e.g. other file system),
+    then file is copied and deduplication is not applied.
+    """
+
+    def __init__(self, storeDir=None):
+        if storeDir is None:
+            storeDir = os.path.join( DATA_DIR, MEDIA_SUBDIR )
+        self.storeDir = storeDir
+        ## key -> [lock, number of users], entry is removed when last user leaves
+        self._locks: Dict[str, List] = {}
+        self._locksGuard = threading.Lock()
+
+    def getBlobPath(self, key):
+        return os.path.join( self.storeDir, key )
+
+    @contextmanager
+    def keyLock(self, key):
+        """Lock access to blob, so the same media is not converted concurrently."""
+        lock = self._getKeyLock( key )
+        try:
+            with lock.hold():
+                yield
+        finally:
+            self._putKeyLock( key )
+
+    @asynccontextmanager
+    async def keyLockAsync(self, key):
+        """Await lock of blob (see 'keyLock()') without blocking event loop."""
+        lock = self._getKeyLock( key )
+        try:
+            async with lock.holdAsync():
+                yield
+        finally:
+            self._putKeyLock( key )
+
+    def linkTo(self, key, targetPath) -> bool:
+        """Create file of blob in target path. Returns False if there is no such blob."""
+        blob_path = self.getBlobPath( key )
+        if not os.path.isfile( blob_path ):
+            return False
+        if os.path.exists( targetPath ):
+            return True
+        try:
+            os.link( blob_path, targetPath )
+        except OSError as exc:
+            _LOGGER.warning( "unable to link %s: %s - copying file", blob_path, exc )
+            staged_path = finalize.stage_path( targetPath )
+            finalize.copy_file( blob_path, staged_path )
+            finalize.commit( staged_path, targetPath )
+        _LOGGER.info( "media %s found in store, references: %s", key, self.countReferences( key ) )
+        return True
+
+    def adopt(self, key, sourcePath):
+        """Add existing file to store (if there is no such blob yet)."""
+        blob_path = self.getBlobPath( key )
+        if os.path.exists( blob_path ) or not os.path.isfile( sourcePath ):
+            return
+        os.makedirs( self.storeDir, exist_ok=True )
+        try:
+            os.link( sourcePath, blob_path )
+        except OSError as exc:
+            ## file will not be shared
+            _LOGGER.warning( "unable to add %s to media store: %s", sourcePath, exc )
+
+    def release(self, key):
+        """Remove blob if it is not referenced any more. Should be called after removal of feed file."""
+        blob_path = self.getBlobPath( key )
+        with self.keyLock( key ):
+            try:
+                if os.stat( blob_path ).st_nlink > 1:
+                    return
+                os.remove( blob_path )
+            except FileNotFoundError:
+                return
+        _LOGGER.info( "media %s not referenced - removed from store", key )
+
+    def countReferences(self, key) -> int:
+        """Return number of feed files referencing blob."""
+        try:
+            return os.stat( self.getBlobPath( key ) ).st_nlink - 1
+        except FileNotFoundError:
+            return 0
+
+    def collectGarbage(self) -> int:
+        """Remove blobs not referenced by any feed, returns number of removed blobs."""
+        if not os.path.isdir( self.storeDir ):
+            return 0
+        removed = 0
+        for key in os.listdir( self.storeDir ):
+            if self.countReferences( key ) > 0:
+                continue
+            self.release( key )
+            removed += 1
+        return removed
+
+    def _getKeyLock(self, key) -> FutureSemaphore:
+        with self._locksGuard:
+            entry = self._locks.get( key )
+            if entry is None:
+                entry = [ FutureSemaphore( 1 ), 0 ]
+                self._locks[ key ] = entry
+            entry[1] += 1
+            return entry[0]
+
+    def _putKeyLock(self, key):
+        with self._locksGuard:
+            entry = self._locks[ key ]
+            entry[1] -= 1
+            if entry[1] < 1:
+                ## no holder and no waiter
+                del self._locks[ key ]
+
+
+## process-wide store of media files
+MEDIA_STORE = MediaStore()
@@ -0,0 +1,68 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import logging
+from typing import Dict
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AudioFormat():
+    """Format of media files stored for feed."""
+
+    def __init__(self, name, extension, mimeType, ytdlpFormat, transcode):
+        self.name        = name
+        self.extension   = extension
+        self.mimeType    = mimeType
+        self.ytdlpFormat = ytdlpFormat      ## format selector of audio stream downloaded by yt-dlp
+        self.transcode   = transcode        ## is stream processed by 'ffmpeg' after download
+
+    def fileName(self, baseName):
+        return f"{baseName}.{self.extension}"
+
+
+DEFAULT_AUDIO_FORMAT = "mp3"
+
+## 'm4a' stream is stored as is, 'opus' stream is only remuxed from WebM to Ogg container (no encoding)
+AUDIO_FORMATS: Dict[str, AudioFormat] = {
+    "mp3":  AudioFormat( "mp3", "mp3", "audio/mpeg", "bestaudio", transcode=True ),
+    "m4a":  AudioFormat( "m4a", "m4a", "audio/mp4", "bestaudio[ext=m4a]", transcode=False ),
+    "opus": AudioFormat( "opus", "opus", "audio/ogg", "bestaudio[acodec=opus]", transcode=True )
+}
+
+
+# returns format of given name, default format if name is unknown
+def get_audio_format( name=None ) -> AudioFormat:
+    if name is None:
+        name = DEFAULT_AUDIO_FORMAT
+    audio_format = AUDIO_FORMATS.get( name )
+    if audio_format is None:
+        _LOGGER.warning( "unknown audio format '%s' - using %s", name, DEFAULT_AUDIO_FORMAT )
+        audio_format = AUDIO_FORMATS[ DEFAULT_AUDIO_FORMAT ]
+    return audio_format
+
+
+# returns map of file extensions to MIME types (e.g. for HTTP server)
+def get_extensions_map() -> Dict[str, str]:
+    return { f".{item.extension}": item.mimeType for item in AUDIO_FORMATS.values() }
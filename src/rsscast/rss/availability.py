@@ -0,0 +1,97 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import time
+import logging
+
+from rsscast.rss.rsschannel import RSSItem
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+## re-check delays (in seconds) of upcoming videos with unknown (or passed) release time
+UPCOMING_BASE_DELAY = 15 * 60
+UPCOMING_MAX_DELAY  = 12 * 60 * 60
+
+## re-check delays (in seconds) of videos that could not be fetched
+INVALID_BASE_DELAY = 60 * 60
+INVALID_MAX_DELAY  = 2 * 24 * 60 * 60
+
+## number of consecutive failed checks after which item is disabled
+INVALID_MAX_FAILURES = 6
+
+
+def is_check_due( rssItem: RSSItem, now=None ) -> bool:
+    """Check if availability of item's video should be checked."""
+    if rssItem.availNextCheck is None:
+        return True
+    if now is None:
+        now = time.time()
+    return now >= rssItem.availNextCheck
+
+
+def update_item_status( rssItem: RSSItem, status_name, release_timestamp=None, now=None ) -> bool:
+    """Store result of availability check and schedule next check.
+
+    'status_name' is name of 'VideoAvailableStatus' (eg. "UPCOMING").
+    Returns False if item exceeded limit of failed checks and should be disabled.
+    """
+    if now is None:
+        now = time.time()
+
+    if status_name != rssItem.availStatus:
+        rssItem.availFailures = 0
+    rssItem.availStatus = status_name
+
+    if status_name == "OK":
+        rssItem.availNextCheck = None
+        rssItem.availFailures  = 0
+        return True
+
+    rssItem.availFailures += 1
+
+    if status_name == "UPCOMING":
+        if release_timestamp and release_timestamp > now:
+            ## check right after release
+            rssItem.availNextCheck = release_timestamp
+            rssItem.availFailures  = 0
+        else:
+            rssItem.availNextCheck = now + get_backoff_delay( UPCOMING_BASE_DELAY, UPCOMING_MAX_DELAY,
+                                                              rssItem.availFailures )
+        return True
+
+    ## invalid
+    if rssItem.availFailures >= INVALID_MAX_FAILURES:
+        ## reset schedule, so item is checked immediately when enabled again
+        rssItem.availNextCheck = None
+        rssItem.availFailures  = 0
+        return False
+    rssItem.availNextCheck = now + get_backoff_delay( INVALID_BASE_DELAY, INVALID_MAX_DELAY, rssItem.availFailures )
+    return True
+
+
+def get_backoff_delay( base_delay, max_delay, attempt ):
+    attempt = max( attempt, 1 )
+    delay = base_delay * 2 ** ( attempt - 1 )
+    return min( delay, max_delay )
@@ -0,0 +1,237 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+##
+## Reads duration and bitrate of MP3 file using frame headers only.
+##
+## Duration is taken from Xing/Info or VBRI header of first frame (VBR files).
+## If there is no such header, then first frames are sampled and duration is
+## estimated from size of audio data and average bitrate.
+##
+
+import os
+import struct
+import logging
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+## number of bytes read from beginning of audio data
+SCAN_SIZE = 64 * 1024
+
+## number of frames sampled to estimate bitrate
+SAMPLE_FRAMES = 32
+
+## number of consecutive valid frames required to confirm MP3 stream
+SYNC_FRAMES = 3
+
+## bitrate tables [kbps] for layer III, indexed by bitrate index
+BITRATES_V1 = [ 0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320 ]
+BITRATES_V2 = [ 0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160 ]
+
+## sample rates [Hz] indexed by version bits and sample rate index
+SAMPLE_RATES = { 3: [ 44100, 48000, 32000 ],        ## MPEG 1
+                 2: [ 22050, 24000, 16000 ],        ## MPEG 2
+                 0: [ 11025, 12000, 8000 ] }        ## MPEG 2.5
+
+
+class MP3Info():
+    """Properties of MP3 stream."""
+
+    def __init__(self, duration, bitrate, vbr=False):
+        self.duration = duration        ## in seconds
+        self.bitrate  = bitrate         ## in kbps
+        self.vbr      = vbr
+
+    def __repr__(self):
+        return f"<MP3Info duration={self.duration} bitrate={self.bitrate} vbr={self.vbr}>"
+
+
+class FrameHeader():
+    """Header of MPEG layer III frame."""
+
+    def __init__(self, mpeg1, bitrate, sample_rate, padding, mono):
+        self.mpeg1       = mpeg1
+        self.bitrate     = bitrate      ## in kbps
+        self.sample_rate = sample_rate
+        self.padding     = padding
+        self.mono        = mono
+
+    def samples(self):
+        return 1152 if self.mpeg1 else 576
+
+    def length(self):
+        coefficient = 144 if self.mpeg1 else 72
+        return coefficient * self.bitrate * 1000 // self.sample_rate + self.padding
+
+    def sideInfoSize(self):
+        if self.mpeg1:
+            return 17 if self.mono else 32
+        return 9 if self.mono else 17
+
+
+## returns MP3Info or None if file is not valid MP3
+def read_mp3_info( file_path ) -> MP3Info:
+    try:
+        file_size = os.path.getsize( file_path )
+        with open( file_path, "rb" ) as in_file:
+            audio_start = skip_id3v2( in_file )
+            in_file.seek( audio_start )
+            data = in_file.read( SCAN_SIZE )
+            audio_end = file_size
+            if file_size - audio_start > 128:
+                in_file.seek( file_size - 128 )
+                if in_file.read( 3 ) == b"TAG":
+                    ## ID3v1 tag at the end of file
+                    audio_end -= 128
+    except OSError as exc:
+        _LOGGER.warning( "unable to read file %s: %s", file_path, exc )
+        return None
+    return parse_mp3_data( data, audio_end - audio_start )
+
+
+## 'data' - beginning of audio data, 'audio_size' - size of whole audio data
+def parse_mp3_data( data, audio_size ) -> MP3Info:
+    frame_pos = find_frame( data )
+    if frame_pos < 0:
+        return None
+    header = parse_header( data, frame_pos )
+    audio_size -= frame_pos
+
+    info = read_vbr_header( data, frame_pos, header, audio_size )
+    if info is not None:
+        return info
+
+    ## no VBR header - sample frames
+    bitrates = []
+    pos = frame_pos
+    while len( bitrates ) < SAMPLE_FRAMES:
+        frame = parse_header( data, pos )
+        if frame is None:
+            break
+        bitrates.append( frame.bitrate )
+        pos += frame.length()
+    average = sum( bitrates ) / len( bitrates )
+    duration = audio_size * 8 / ( average * 1000 )
+    return MP3Info( round( duration ), round( average ), vbr=len( set( bitrates ) ) > 1 )
+
+
+## read Xing/Info or VBRI header from first frame
+def read_vbr_header( data, frame_pos, header: FrameHeader, audio_size ) -> MP3Info:
+    xing_pos = frame_pos + 4 + header.sideInfoSize()
+    tag = data[ xing_pos: xing_pos + 4 ]
+    if tag in ( b"Xing", b"Info" ) and len( data ) >= xing_pos + 16:
+        flags = struct.unpack( ">I", data[ xing_pos + 4: xing_pos + 8 ] )[0]
+        if not flags & 0x1:
+            ## number of frames not present
+            return None
+        pos = xing_pos + 8
+        frames = struct.unpack( ">I", data[ pos: pos + 4 ] )[0]
+        stream_size = audio_size
+        if flags & 0x2:
+            stream_size = struct.unpack( ">I", data[ pos + 4: pos + 8 ] )[0]
+        return create_info( frames, stream_size, header, vbr=tag == b"Xing" )
+
+    vbri_pos = frame_pos + 4 + 32
+    if data[ vbri_pos: vbri_pos + 4 ] == b"VBRI" and len( data ) >= vbri_pos + 18:
+        stream_size, frames = struct.unpack( ">II", data[ vbri_pos + 10: vbri_pos + 18 ] )
+        return create_info( frames, stream_size, header, vbr=True )
+
+    return None
+
+
+def create_info( frames, stream_size, header: FrameHeader, vbr ) -> MP3Info:
+    if frames < 1:
+        return None
+    duration = frames * header.samples() / header.sample_rate
+    bitrate = header.bitrate
+    if duration > 0 and stream_size > 0:
+        bitrate = stream_size * 8 / duration / 1000
+    return MP3Info( round( duration ), round( bitrate ), vbr=vbr )
+
+
+## returns position of first frame followed by valid frames, -1 if not found
+def find_frame( data, start=0 ):
+    pos = data.find( b"\xff", start )
+    while 0 <= pos < len( data ) - 4:
+        if is_frame_sequence( data, pos ):
+            return pos
+        pos = data.find( b"\xff", pos + 1 )
+    return -1
+
+
+def is_frame_sequence( data, pos ):
+    for index in range( SYNC_FRAMES ):
+        header = parse_header( data, pos )
+        if header is None:
+            return False
+        pos += header.length()
+        if pos + 4 > len( data ):
+            ## end of data - accept if at least two frames found
+            return index > 0
+    return True
+
+
+def parse_header( data, pos ) -> FrameHeader:
+    if pos + 4 > len( data ):
+        return None
+    value = struct.unpack( ">I", data[ pos: pos + 4 ] )[0]
+    if value >> 21 != 0x7FF:
+        ## no frame sync
+        return None
+    version     = ( value >> 19 ) & 0x3
+    layer       = ( value >> 17 ) & 0x3
+    bitrate_idx = ( value >> 12 ) & 0xF
+    sr_idx      = ( value >> 10 ) & 0x3
+    padding     = ( value >> 9 ) & 0x1
+    channels    = ( value >> 6 ) & 0x3
+    if version == 1 or layer != 1 or bitrate_idx in ( 0, 15 ) or sr_idx == 3:
+        ## reserved values, free bitrate or not layer III
+        return None
+    mpeg1 = version == 3
+    bitrate = BITRATES_V1[ bitrate_idx ] if mpeg1 else BITRATES_V2[ bitrate_idx ]
+    sample_rate = SAMPLE_RATES[ version ][ sr_idx ]
+    return FrameHeader( mpeg1, bitrate, sample_rate, padding, channels == 3 )
+
+
+## returns position of audio data after ID3v2 tag
+def skip_id3v2( in_file ) -> int:
+    in_file.seek( 0 )
+    header = in_file.read( 10 )
+    if len( header ) < 10 or header[:3] != b"ID3":
+        return 0
+    size = 0
+    for byte in header[ 6:10 ]:
+        ## synchsafe integer
+        size = ( size << 7 ) | ( byte & 0x7F )
+    footer = 10 if header[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+## returns duration in 'itunes:duration' format
+def format_duration( seconds ) -> str:
+    seconds = int( seconds )
+    hours, seconds = divmod( seconds, 3600 )
+    minutes, seconds = divmod( seconds, 60 )
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
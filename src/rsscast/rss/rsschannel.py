@@ -33,6 +33,8 @@ import html
 from email import utils
 
 from rsscast import DATA_DIR, persist
+from rsscast.rss.mp3info import read_mp3_info, format_duration
+from rsscast.rss.audioformat import AudioFormat, DEFAULT_AUDIO_FORMAT, get_audio_format
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -51,7 +53,10 @@ class RSSItem( persist.Versionable ):
     ## 1 - added 'enabled' field
     ## 2 - added 'mediaSize' field
     ## 3 - publishDate as datetime.datetime
-    _class_version = 3
+    ## 4 - added video availability fields
+    ## 5 - added 'mediaDuration' and 'mediaBitrate' fields
+    ## 6 - added 'mediaFormat' field
+    _class_version = 6
 
     def __init__(self, itemId=None, link=None):
         self.id = itemId
@@ -60,6 +65,9 @@ class RSSItem( persist.Versionable ):
         self.summary = None
         self.publishDate: datetime.datetime = None
         self.mediaSize = -1                 ## in bytes
+        self.mediaDuration = None           ## in seconds
+        self.mediaBitrate  = None           ## in kbps
+        self.mediaFormat   = DEFAULT_AUDIO_FORMAT   ## name of audio format of local file
 
         ## thumbnail
         self.thumb_url    = None
@@ -68,6 +76,11 @@ class RSSItem( persist.Versionable ):
 
         self.enabled = True
 
+        ## video availability (see 'availability' module)
+        self.availStatus    = None          ## name of last check status
+        self.availNextCheck = None          ## timestamp of next check
+        self.availFailures  = 0             ## number of consecutive checks with the same status
+
     def _convertstate_( self, dict_, dictVersion_ ):
         _LOGGER.info( "converting object from version %s to %s", dictVersion_, self._class_version )
 
@@ -88,16 +101,41 @@ class RSSItem( persist.Versionable ):
             dict_["publishDate"] = convert_string_to_datetime( dict_["publishDate"] )
             dictVersion_ = 3
 
+        if dictVersion_ == 3:
+            dict_["availStatus"]    = None
+            dict_["availNextCheck"] = None
+            dict_["availFailures"]  = 0
+            dictVersion_ = 4
+
+        if dictVersion_ == 4:
+            dict_["mediaDuration"] = None
+            dict_["mediaBitrate"]  = None
+            dictVersion_ = 5
+
+        if dictVersion_ == 5:
+            dict_["mediaFormat"] = DEFAULT_AUDIO_FORMAT
+            dictVersion_ = 6
+
         # pylint: disable=W0201
         self.__dict__ = dict_
 
     def videoId(self):
         return self.id.replace(":", "_")
 
+    def getAudioFormat(self) -> AudioFormat:
+        return get_audio_format( self.mediaFormat )
+
+    # returns name of local media file
+    def mediaFileName(self):
+        return self.getAudioFormat().fileName( self.videoId() )
+
+    def getMimeType(self):
+        return self.getAudioFormat().mimeType
+
     # returns public URL to resource
     def getExternalURL(self, host, feedId):
-        videoId = self.videoId()
-        return f"http://{host}/{FEED_SUBDIR}/{feedId}/{videoId}.mp3"             ## must have absolute path
+        fileName = self.mediaFileName()
+        return f"http://{host}/{FEED_SUBDIR}/{feedId}/{fileName}"              ## must have absolute path
 
     def itemTitle(self):
         return html.escape( self.title )
@@ -107,6 +145,36 @@ class RSSItem( persist.Versionable ):
             return None
         return self.mediaSize
 
+    def updateMediaInfo(self, localPath):
+        """Read size, duration and bitrate of local media file.
+
+        Duration and bitrate are read from MP3 frame headers only if the file changed
+        (other formats are not scanned).
+        """
+        if not os.path.exists( localPath ):
+            self.mediaSize = -1
+            self.mediaDuration = None
+            self.mediaBitrate  = None
+            return
+        media_size = os.path.getsize( localPath )
+        if media_size == self.mediaSize and self.mediaDuration is not None:
+            return
+        self.mediaSize = media_size
+        info = None
+        if self.getAudioFormat().extension == "mp3":
+            info = read_mp3_info( localPath )
+        if info is None:
+            self.mediaDuration = None
+            self.mediaBitrate  = None
+            return
+        self.mediaDuration = info.duration
+        self.mediaBitrate  = info.bitrate
+
+    def getDurationText(self):
+        if self.mediaDuration is None:
+            return None
+        return format_duration( self.mediaDuration )
+
     def disable(self):
         self.enabled = False
 
@@ -30,21 +30,33 @@ from typing import List
 from rsscast.utils import write_text
 from rsscast.rss.rsschannel import RSSChannel, RSSItem, get_channel_output_dir
 from rsscast.rss.rssserver import RSSServerManager
-from rsscast.source.youtube.ytconverter import convert_to_audio, is_video_available, VideoAvailableStatus
+from rsscast.rss import availability
+from rsscast.rss.audioformat import get_audio_format
+from rsscast.eventloop import EVENT_LOOP
+from rsscast.downloadqueue import DOWNLOAD_QUEUE
+from rsscast.bandwidth import BANDWIDTH
+from rsscast.mediastore import MEDIA_STORE, MediaStore
+from rsscast.jobjournal import JOB_JOURNAL, JobJournal, STATE_QUEUED, STATE_RUNNING, STATE_DONE, \
+    STATE_FAILED, FINISHED_STATES
+from rsscast.source.youtube.ytconverter import convert_to_audio_async, get_video_status, VideoAvailableStatus
 
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def generate_channel_rss( feedId, rssChannel: RSSChannel, host=None, downloadContent=True, storeRSS=True ):
-    """Generate channel's converted RSS."""
+def generate_channel_rss( feedId, rssChannel: RSSChannel, host=None, downloadContent=True, storeRSS=True,
+                          audioFormat=None ):
+    """Generate channel's converted RSS.
+
+    'audioFormat' is name of format of downloaded media (see 'audioformat.AUDIO_FORMATS').
+    """
     if host is None:
         host = RSSServerManager.getPrimaryIp()
 
     if downloadContent:
         items = rssChannel.getItemsEnabled()
         duration_limit = 60 * 60 * 2        # 2 hours
-        download_items( feedId, items, duration_limit )
+        download_items( feedId, items, duration_limit, audioFormat )
 
     url_dir_path = feedId.replace(":", "_")
     url_dir_path = re.sub( r"\s+", "", url_dir_path )
@@ -65,8 +77,7 @@ def generate_items_rss( rssChannel: RSSChannel, host, url_dir_path, local_dir_pa
     for rssItem in itemsList:
 #         pprint( rssItem )
 
-        videoId = rssItem.videoId()
-        postLocalPath = f"{local_dir_path}/{videoId}.mp3"
+        postLocalPath = f"{local_dir_path}/{rssItem.mediaFileName()}"
 
         if check_local:
             if not os.path.exists(postLocalPath):
@@ -86,6 +97,11 @@ def generate_items_rss( rssChannel: RSSChannel, host, url_dir_path, local_dir_pa
 
         enclosureURL = rssItem.getExternalURL( host, url_dir_path )              ## must have absolute path
 
+        durationNode = ""
+        duration_text = rssItem.getDurationText()
+        if duration_text:
+            durationNode = f"""<itunes:duration>{duration_text}</itunes:duration>"""
+
         mediaThumbnailNode = ""
         if rssItem.thumb_url is not None:
             # pylint: disable=C0301
@@ -110,11 +126,12 @@ def generate_items_rss( rssChannel: RSSChannel, host, url_dir_path, local_dir_pa
             <pubDate>{rssItem.getPublishDateRFC()}</pubDate>
             <guid>{rssItem.id}</guid>
             {mediaThumbnailNode}
+            {durationNode}
 
             <description>{description}</description>
 
             <content:encoded></content:encoded>
-            <enclosure url="{enclosureURL}" length="{enclosure_size}" type="audio/mpeg"/>
+            <enclosure url="{enclosureURL}" length="{enclosure_size}" type="{rssItem.getMimeType()}"/>
         </item>
 """
         items_result += item_result
@@ -134,6 +151,7 @@ def generate_items_rss( rssChannel: RSSChannel, host, url_dir_path, local_dir_pa
  xmlns:content="http://purl.org/rss/1.0/modules/content/"
  xmlns:media="http://search.yahoo.com/mrss/"
  xmlns:atom="http://www.w3.org/2005/Atom"
+ xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd"
 >
     <channel>
         <atom:link href="{rss_url}" rel="self" type="application/rss+xml" />
@@ -163,12 +181,13 @@ def generate_items_rss( rssChannel: RSSChannel, host, url_dir_path, local_dir_pa
 ## =================================================================================
 
 
-def download_items( feedId, itemsList: List[RSSItem], _videoDurationLimit=None ):
+def download_items( feedId, itemsList: List[RSSItem], _videoDurationLimit=None, audioFormat=None ):
     """Download media."""
     feedId = feedId.replace(":", "_")
     feedId = re.sub( r"\s+", "", feedId )
     channelPath = get_channel_output_dir( feedId )
-    download_list(feedId, itemsList, channelPath)
+    download_list(feedId, itemsList, channelPath, audio_format=audioFormat, media_store=MEDIA_STORE,
+                  journal=JOB_JOURNAL)
 
 
 def download_list( feedId, itemsList: List[RSSItem], output_dir, **kwargs ):
@@ -177,6 +196,9 @@ def download_list( feedId, itemsList: List[RSSItem], output_dir, **kwargs ):
     recent_items = kwargs.get("recent_items")
     use_filename_title = kwargs.get("use_filename_title", False)
     prepend_index = kwargs.get("prepend_index", False)
+    audio_format = get_audio_format( kwargs.get("audio_format") )
+    media_store: MediaStore = kwargs.get("media_store")
+    journal: JobJournal = kwargs.get("journal")
 
     items_len = len(itemsList)
 #     rssItem: RSSItem = None
@@ -185,6 +207,8 @@ def download_list( feedId, itemsList: List[RSSItem], output_dir, **kwargs ):
     if recent_items is not None:
         recent_start = items_len - recent_items + 1
 
+    futures_list = []
+
     for index, rssItem in enumerate(itemsList):
         _LOGGER.info( "downloading item: %s %s %s", feedId, rssItem.title, rssItem.id )
 
@@ -198,7 +222,6 @@ def download_list( feedId, itemsList: List[RSSItem], output_dir, **kwargs ):
             _LOGGER.info( "feed %s: video skipped '%s'", feedId, rssItem.title )
             continue
 
-        postLink = rssItem.link
         filename = rssItem.videoId()
         if use_filename_title:
             filename = rssItem.title
@@ -215,39 +238,130 @@ def download_list( feedId, itemsList: List[RSSItem], output_dir, **kwargs ):
             item_num = item_num.zfill(index_digs_num)
             filename = f"{item_num}_{filename}"
 
-        postLocalPath = f"{output_dir}/{filename}.mp3"
-
-        if os.path.exists(postLocalPath):
+        ## media downloaded before change of feed's format is kept
+        localPath = f"{output_dir}/{rssItem.getAudioFormat().fileName(filename)}"
+        if os.path.exists(localPath):
             _LOGGER.info( "feed %s: item already downloaded '%s'", feedId, rssItem.title )
-        else:
-            ## item file not exists -- convert and download
-
-            ## is it still needed?
-            # if videoDurationLimit is not None:
-            #     video_duration = get_yt_duration( postLink )
-            #     if video_duration > videoDurationLimit:
-            #         _LOGGER.info( "feed %s: video '%s' exceeds duration limit: %sm > %sm -- skipped",
-            #                       feedId, postLink, video_duration / 60, videoDurationLimit / 60 )
-            #         continue
-
-            video_status: VideoAvailableStatus = is_video_available(postLink)
-            if video_status == VideoAvailableStatus.INVALID:
-                _LOGGER.warning( "feed %s: '%s' video unavailable: %s -- disabling", feedId, rssItem.title, postLink )
-                rssItem.disable()
-                continue
-            if video_status == VideoAvailableStatus.UPCOMING:
-                # upcoming video - wait for next time
-                continue
+            rssItem.updateMediaInfo( localPath )
+            if media_store is not None:
+                ## files downloaded before introduction of store
+                media_store.adopt( rssItem.mediaFileName(), localPath )
+            if journal is not None:
+                ## e.g. process died right after media was stored
+                job = journal.getJob( localPath )
+                if job is not None and job["state"] not in FINISHED_STATES:
+                    journal.update( localPath, STATE_DONE )
+            continue
 
-            _LOGGER.info( f"{index + 1}/{items_len} feed {feedId}:"
-                          f" {rssItem.title} converting video: {postLink} to {postLocalPath}" )
-            converted = convert_to_audio( postLink, postLocalPath )
-            if converted is False:
-                ## skip elements that failed to convert
-                _LOGGER.info( "feed %s: unable to convert video '%s' -- skipped", feedId, rssItem.title )
-                continue
+        postLocalPath = f"{output_dir}/{audio_format.fileName(filename)}"
+
+        ## item file not exists -- convert and download (in event loop shared by all feeds)
+        ## blocking steps are executed in download queue, waiting does not occupy any worker
+        item_label = f"{index + 1}/{items_len} feed {feedId}: {rssItem.title}"
+        if journal is not None:
+            journal.update( postLocalPath, STATE_QUEUED, feed=feedId, item=rssItem.id, link=rssItem.link,
+                            format=audio_format.name )
+        coroutine = download_item_async( feedId, rssItem, postLocalPath, item_label, audio_format.name,
+                                         media_store, journal )
+        futures_list.append( (rssItem, EVENT_LOOP.submit( coroutine )) )
+
+    for rssItem, future in futures_list:
+        try:
+            future.result()
+        except Exception:           # pylint: disable=broad-except
+            _LOGGER.exception( "feed %s: unable to download item '%s'", feedId, rssItem.title )
+
+    if journal is not None:
+        ## drop finished jobs - journal is not reloaded by long running process (e.g. daemon)
+        journal.compact()
+
+
+# returns True if item's media was downloaded
+# if 'media_store' is given, then media already converted for other feed is linked instead of conversion
+# if 'journal' is given, then state of download is recorded in journal
+def download_item( feedId, rssItem: RSSItem, postLocalPath, item_label="", audio_format=None,
+                   media_store: MediaStore = None, journal: JobJournal = None ) -> bool:
+    coroutine = download_item_async( feedId, rssItem, postLocalPath, item_label, audio_format, media_store, journal )
+    return EVENT_LOOP.submit( coroutine ).result()
+
+
+## coroutine variant of 'download_item'
+async def download_item_async( feedId, rssItem: RSSItem, postLocalPath, item_label="", audio_format=None,
+                               media_store: MediaStore = None, journal: JobJournal = None ) -> bool:
+    if journal is None:
+        return await store_item_async( feedId, rssItem, postLocalPath, item_label, audio_format, media_store )
+
+    journal.update( postLocalPath, STATE_RUNNING )
+    try:
+        downloaded = await store_item_async( feedId, rssItem, postLocalPath, item_label, audio_format, media_store )
+    except Exception as exc:
+        journal.update( postLocalPath, STATE_FAILED, error=str( exc ) )
+        raise
+    journal.update( postLocalPath, STATE_DONE if downloaded else STATE_FAILED )
+    return downloaded
+
+
+# returns True if item's media was converted or linked from store
+async def store_item_async( feedId, rssItem: RSSItem, postLocalPath, item_label="", audio_format=None,
+                            media_store: MediaStore = None ) -> bool:
+    if media_store is None:
+        return await convert_item_async( feedId, rssItem, postLocalPath, item_label, audio_format )
+
+    media_key = get_audio_format( audio_format ).fileName( rssItem.videoId() )
+    async with media_store.keyLockAsync( media_key ):
+        if await DOWNLOAD_QUEUE.runInWorker( media_store.linkTo, media_key, postLocalPath ):
+            _LOGGER.info( "feed %s: video '%s' already converted by other feed", feedId, rssItem.title )
+            rssItem.mediaFormat = get_audio_format( audio_format ).name
+            await DOWNLOAD_QUEUE.runInWorker( rssItem.updateMediaInfo, postLocalPath )
+            return True
+        converted = await convert_item_async( feedId, rssItem, postLocalPath, item_label, audio_format )
+        if converted:
+            await DOWNLOAD_QUEUE.runInWorker( media_store.adopt, media_key, postLocalPath )
+        return converted
+
+
+# returns True if item's media was converted
+async def convert_item_async( feedId, rssItem: RSSItem, postLocalPath, item_label="", audio_format=None ) -> bool:
+    postLink = rssItem.link
+
+    ## is it still needed?
+    # if videoDurationLimit is not None:
+    #     video_duration = get_yt_duration( postLink )
+    #     if video_duration > videoDurationLimit:
+    #         _LOGGER.info( "feed %s: video '%s' exceeds duration limit: %sm > %sm -- skipped",
+    #                       feedId, postLink, video_duration / 60, videoDurationLimit / 60 )
+    #         continue
+
+    if not availability.is_check_due( rssItem ):
+        _LOGGER.info( "feed %s: video '%s' was %s -- waiting for next check",
+                      feedId, rssItem.title, rssItem.availStatus )
+        return False
 
-        rssItem.mediaSize = os.path.getsize( postLocalPath )
+    video_status, release_timestamp = await DOWNLOAD_QUEUE.runInWorker( get_video_status, postLink )
+    valid = availability.update_item_status( rssItem, video_status.name, release_timestamp )
+    if valid is False:
+        _LOGGER.warning( "feed %s: '%s' video unavailable: %s -- disabling", feedId, rssItem.title, postLink )
+        rssItem.disable()
+        return False
+    if video_status == VideoAvailableStatus.INVALID:
+        _LOGGER.warning( "feed %s: '%s' video unavailable: %s -- retry after %s failures",
+                         feedId, rssItem.title, postLink, rssItem.availFailures )
+        return False
+    if video_status == VideoAvailableStatus.UPCOMING:
+        # upcoming video - wait for next time
+        return False
+
+    _LOGGER.info( f"{item_label} converting video: {postLink} to {postLocalPath}" )
+    with BANDWIDTH.job( item_label or rssItem.title ):
+        converted = await convert_to_audio_async( postLink, postLocalPath, audio_format=audio_format )
+    if converted is False:
+        ## skip elements that failed to convert
+        _LOGGER.info( "feed %s: unable to convert video '%s' -- skipped", feedId, rssItem.title )
+        return False
+
+    rssItem.mediaFormat = get_audio_format( audio_format ).name
+    await DOWNLOAD_QUEUE.runInWorker( rssItem.updateMediaInfo, postLocalPath )
+    return True
 
 
 def check_num_in_range(item_num, start_from, end_to, recent_start) -> bool:
@@ -283,15 +397,13 @@ def remove_item_data( feedId, rssItem: RSSItem ):
 
     channelPath = get_channel_output_dir( feedId )
 
-    videoId = rssItem.videoId()
-    postLocalPath = f"{channelPath}/{videoId}.mp3"
-
-    rssItem.mediaSize = -1
+    postLocalPath = f"{channelPath}/{rssItem.mediaFileName()}"
 
-    if not os.path.exists(postLocalPath):
-        return
+    if os.path.exists(postLocalPath):
+        os.remove( postLocalPath )
+        MEDIA_STORE.release( rssItem.mediaFileName() )
 
-    os.remove( postLocalPath )
+    rssItem.updateMediaInfo( postLocalPath )
 
 
 def fix_description( inputText ):
@@ -36,6 +36,8 @@ import posixpath
 from http.server import SimpleHTTPRequestHandler
 
 from rsscast.synchronized import synchronized
+from rsscast.bandwidth import BANDWIDTH
+from rsscast.rss.audioformat import get_extensions_map
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -44,6 +46,18 @@ _LOGGER = logging.getLogger(__name__)
 ## implementation allows to pass custom base path
 class RootedHTTPRequestHandler(SimpleHTTPRequestHandler):
 
+    ## MIME types of media files have to match types in generated RSS
+    extensions_map = { **SimpleHTTPRequestHandler.extensions_map, **get_extensions_map() }
+
+    ## notify bandwidth governor about served data, so downloads leave reserve for clients
+    def copyfile(self, source, outputfile):
+        while True:
+            chunk = source.read( 64 * 1024 )
+            if not chunk:
+                break
+            outputfile.write( chunk )
+            BANDWIDTH.noteServed( len( chunk ) )
+
     def translate_path(self, path):
         base_path = self.server.base_path
         if base_path is None:
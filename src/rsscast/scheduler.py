@@ -0,0 +1,148 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import time
+import logging
+import threading
+import statistics
+from typing import List, Callable, Any
+
+from rsscast.feedpool import FeedPool, DEFAULT_HOST_JOBS
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+## limits of polling interval (in seconds)
+MIN_INTERVAL = 30 * 60
+MAX_INTERVAL = 24 * 60 * 60
+
+## interval used for feeds without publish history
+DEFAULT_INTERVAL = 2 * 60 * 60
+
+## number of recent items used to estimate upload cadence
+HISTORY_SIZE = 10
+
+## number of polls expected between two uploads
+POLLS_PER_UPLOAD = 4
+
+## maximum time of sleep between checks of due feeds (in seconds)
+MAX_SLEEP = 10 * 60
+
+
+def estimate_interval( feed, now=None ) -> float:
+    """Calculate polling interval of feed based on publish dates of recent items.
+
+    Busy feeds (with short gaps between uploads) are polled more often. When time
+    since last upload exceeds usual gap the feed is considered dormant and polled
+    less often.
+    """
+    if now is None:
+        now = time.time()
+    channel = feed.channel
+    if channel is None:
+        return DEFAULT_INTERVAL
+    publish_times = [ item.publishDate.timestamp() for item in channel.items if item.publishDate is not None ]
+    publish_times = sorted( publish_times )[ -HISTORY_SIZE: ]
+    if len( publish_times ) < 2:
+        return DEFAULT_INTERVAL
+
+    gaps = [ publish_times[i] - publish_times[i - 1] for i in range( 1, len( publish_times ) ) ]
+    upload_gap = statistics.median( gaps )
+    since_last = now - publish_times[-1]
+    expected_gap = max( upload_gap, since_last )
+    interval = expected_gap / POLLS_PER_UPLOAD
+    return min( max( interval, MIN_INTERVAL ), MAX_INTERVAL )
+
+
+def is_feed_due( feed, now=None ) -> bool:
+    if feed.enabled is False:
+        return False
+    if feed.nextDue is None:
+        return True
+    if now is None:
+        now = time.time()
+    return now >= feed.nextDue
+
+
+def schedule_feed( feed, now=None ):
+    if now is None:
+        now = time.time()
+    interval = estimate_interval( feed, now )
+    feed.nextDue = now + interval
+    _LOGGER.info( "feed %s: next poll in %.1f hours", feed.feedId, interval / 3600 )
+
+
+class FeedScheduler():
+    """Polls feeds when they are due, processing them with feed pool.
+
+    Next due time is stored in feed, so it is persisted together with user data.
+    """
+
+    def __init__(self, function: Callable[[Any], Any], jobs=1, host_jobs=DEFAULT_HOST_JOBS):
+        self.function = function
+        self.pool = FeedPool( jobs, host_jobs )
+        self._stopEvent = threading.Event()
+
+    def stop(self):
+        self._stopEvent.set()
+
+    def getDueFeeds(self, feedList, now=None) -> List[Any]:
+        return [ feed for feed in feedList if is_feed_due( feed, now ) ]
+
+    def getNextDue(self, feedList):
+        due_list = [ feed.nextDue for feed in feedList if feed.enabled and feed.nextDue is not None ]
+        if not due_list:
+            return None
+        return min( due_list )
+
+    # returns list of processed feeds
+    def processDue(self, feedList, now=None) -> List[Any]:
+        due_feeds = self.getDueFeeds( feedList, now )
+        if not due_feeds:
+            return []
+        _LOGGER.info( "polling %s of %s feeds", len( due_feeds ), len( feedList ) )
+        self.pool.execute( self._processFeed, due_feeds )
+        return due_feeds
+
+    def run(self, getFeedList: Callable[[], List[Any]], onProcessed: Callable[[], Any] = None):
+        """Poll due feeds until stopped."""
+        while not self._stopEvent.is_set():
+            feedList = getFeedList()
+            processed = self.processDue( feedList )
+            if processed and onProcessed is not None:
+                onProcessed()
+            sleep_time = MAX_SLEEP
+            next_due = self.getNextDue( feedList )
+            if next_due is not None:
+                sleep_time = min( max( next_due - time.time(), 1 ), MAX_SLEEP )
+            self._stopEvent.wait( sleep_time )
+
+    def _processFeed(self, feed):
+        try:
+            self.function( feed )
+            schedule_feed( feed )
+        except Exception:                      # pylint: disable=W0703
+            ## do not break the loop - retry later
+            _LOGGER.exception( "unable to process feed: %s", feed.feedId )
+            feed.nextDue = time.time() + MIN_INTERVAL
@@ -0,0 +1,226 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import time
+import heapq
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Tuple, Any
+
+import pycurl
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+## maximum time of waiting for socket activity - new transfers are picked up at least that often
+SELECT_TIMEOUT = 0.1
+
+## callback called on engine's thread when transfer finished: callback( handle, error )
+## 'error' is 'pycurl.error' or None, returned value is result of transfer's future
+TransferCallback = Callable[[pycurl.Curl, pycurl.error], Any]
+
+
+class CurlEngine():
+    """Drives many curl transfers concurrently on single thread using 'CurlMulti'.
+
+    Handle has to be fully configured before 'perform' and must not be touched
+    until its future is done. Transfer callbacks (e.g. 'WRITEFUNCTION') are called
+    on engine's thread, so they should not block - transfer can be paused for
+    some time instead (see 'pauseFor()').
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition( self._lock )
+        self._thread: threading.Thread = None
+        self._running = False
+        self._queue: List[ Tuple[pycurl.Curl, Future, TransferCallback] ] = []
+        ## handles being transferred, key is id of handle
+        self._transfers: Dict[ int, Tuple[pycurl.Curl, Future, TransferCallback] ] = {}
+        self._multi: pycurl.CurlMulti = None
+        ## timers of paused transfers (accessed only by engine's thread)
+        self._timers: List[ Tuple[float, int, pycurl.Curl] ] = []
+        self._paused: Dict[ int, float ] = {}
+
+    def perform(self, handle: pycurl.Curl, callback: TransferCallback = None) -> Future:
+        """Start transfer. Returns future of callback's result (or handle if there is no callback).
+
+        If callback returns future, then it is chained with transfer's future.
+        """
+        future = Future()
+        with self._lock:
+            self._queue.append( (handle, future, callback) )
+            if self._thread is None:
+                self._running = True
+                self._thread = threading.Thread( target=self._run, name="CurlEngine", daemon=True )
+                self._thread.start()
+            self._wakeup.notify()
+        return future
+
+    def stop(self):
+        with self._lock:
+            if self._thread is None:
+                return
+            self._running = False
+            self._wakeup.notify()
+            thread = self._thread
+        thread.join()
+        with self._lock:
+            self._thread = None
+
+    def pauseFor(self, handle: pycurl.Curl, seconds):
+        """Stop receiving data of transfer for given time, other transfers are not affected.
+
+        Has to be called on engine's thread, e.g. in transfer's 'WRITEFUNCTION'.
+        """
+        handle_id = id( handle )
+        resume_time = time.monotonic() + seconds
+        handle.pause( pycurl.PAUSE_RECV )
+        self._paused[ handle_id ] = resume_time
+        heapq.heappush( self._timers, (resume_time, handle_id, handle) )
+
+    @property
+    def activeTransfers(self) -> int:
+        with self._lock:
+            return len( self._transfers ) + len( self._queue )
+
+    def _run(self):
+        self._multi = pycurl.CurlMulti()
+        try:
+            while self._addQueued():
+                self._performTransfers()
+        finally:
+            self._abortTransfers()
+            self._multi.close()
+            self._multi = None
+
+    ## returns False if engine is stopped
+    def _addQueued(self) -> bool:
+        with self._lock:
+            while self._running and not self._queue and not self._transfers:
+                ## idle - wait without occupying CPU
+                self._wakeup.wait()
+            if not self._running:
+                return False
+            queued = self._queue
+            self._queue = []
+        for handle, future, callback in queued:
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                self._multi.add_handle( handle )
+            except pycurl.error as exc:
+                future.set_exception( exc )
+                continue
+            with self._lock:
+                self._transfers[ id(handle) ] = ( handle, future, callback )
+        return True
+
+    def _performTransfers(self):
+        self._resumePaused()
+        while True:
+            ret, _ = self._multi.perform()
+            if ret != pycurl.E_CALL_MULTI_PERFORM:
+                break
+        while True:
+            queued_num, ok_list, err_list = self._multi.info_read()
+            for handle in ok_list:
+                self._finishTransfer( handle, None )
+            for handle, errno, errmsg in err_list:
+                self._finishTransfer( handle, pycurl.error( errno, errmsg ) )
+            if queued_num == 0:
+                break
+        if self._transfers:
+            timeout = self._multi.timeout()
+            if timeout < 0:
+                timeout = SELECT_TIMEOUT
+            else:
+                timeout = min( timeout / 1000.0, SELECT_TIMEOUT )
+            if self._timers:
+                timeout = min( timeout, max( self._timers[0][0] - time.monotonic(), 0.0 ) )
+            self._multi.select( timeout )
+
+    def _resumePaused(self):
+        now = time.monotonic()
+        while self._timers and self._timers[0][0] <= now:
+            resume_time, handle_id, handle = heapq.heappop( self._timers )
+            if self._paused.get( handle_id ) != resume_time:
+                ## transfer finished or paused again
+                continue
+            del self._paused[ handle_id ]
+            handle.pause( pycurl.PAUSE_CONT )
+
+    def _finishTransfer(self, handle, error):
+        self._multi.remove_handle( handle )
+        self._paused.pop( id(handle), None )
+        with self._lock:
+            _, future, callback = self._transfers.pop( id(handle) )
+        count_transfer = getattr( handle, "countTransfer", None )
+        if count_transfer is not None:
+            count_transfer()
+        try:
+            if callback is not None:
+                result = callback( handle, error )
+            elif error is not None:
+                raise error
+            else:
+                result = handle
+        except BaseException as exc:            # pylint: disable=broad-except
+            future.set_exception( exc )
+            return
+        if isinstance( result, Future ):
+            chain_future( result, future )
+            return
+        future.set_result( result )
+
+    def _abortTransfers(self):
+        with self._lock:
+            transfers = list( self._transfers.values() )
+            queued = self._queue
+            self._transfers = {}
+            self._queue = []
+        self._timers = []
+        self._paused = {}
+        for handle, future, _ in transfers:
+            self._multi.remove_handle( handle )
+            future.set_exception( RuntimeError( "curl engine stopped" ) )
+        for _, future, _ in queued:
+            if future.set_running_or_notify_cancel():
+                future.set_exception( RuntimeError( "curl engine stopped" ) )
+
+
+# pass result of 'source' future to 'target' future
+def chain_future( source: Future, target: Future ):
+    def copy_result( done: Future ):
+        exc = done.exception()
+        if exc is not None:
+            target.set_exception( exc )
+        else:
+            target.set_result( done.result() )
+    source.add_done_callback( copy_result )
+
+
+## process-wide engine of converters' HTTP traffic
+CURL_ENGINE = CurlEngine()
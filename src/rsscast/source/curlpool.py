@@ -0,0 +1,181 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import logging
+from contextlib import contextmanager
+from typing import List, Dict
+
+import pycurl
+
+from rsscast.synchronized import synchronized
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+DEFAULT_POOL_SIZE  = 8                  ## number of idle handles kept alive
+DEFAULT_USER_AGENT = "curl/7.58.0"
+CONNECT_TIMEOUT    = 60                 ## connection phase timeout in seconds
+
+## data shared between handles of pool - cookies are intentionally not shared
+SHARED_DATA = [ "LOCK_DATA_DNS", "LOCK_DATA_SSL_SESSION", "LOCK_DATA_CONNECT" ]
+
+
+class CurlHandle( pycurl.Curl ):
+    """Curl handle counting performed requests and newly opened connections."""
+
+    def __init__(self):
+        super().__init__()
+        self.requestsNum    = 0
+        self.connectionsNum = 0
+
+    def perform(self):
+        try:
+            super().perform()
+        finally:
+            self.countTransfer()
+
+    ## called after transfer finished (also by 'CurlMulti' engine)
+    def countTransfer(self):
+        self.requestsNum    += 1
+        self.connectionsNum += self.getinfo( pycurl.NUM_CONNECTS )
+
+
+class CurlPool():
+    """Thread-safe pool of curl handles sharing DNS cache, TLS sessions and connections.
+
+    Handle is borrowed by single job at a time. Each job gets its own in-memory cookie
+    jar - cookies are dropped when handle is returned to the pool.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE):
+        self.poolSize = pool_size
+        self._share: pycurl.CurlShare = None
+        self._idle: List[CurlHandle] = []
+        self._active: List[CurlHandle] = []
+        ## statistics of closed handles
+        self._closedConnections = 0
+        self._closedRequests    = 0
+
+    @synchronized
+    def configure(self, pool_size=None):
+        if pool_size is not None:
+            self.poolSize = max( pool_size, 1 )
+        ## drop handles exceeding new size
+        while len( self._idle ) > self.poolSize:
+            self._closeHandle( self._idle.pop(0) )
+
+    @contextmanager
+    def session(self, user_agent=None):
+        handle = self._borrow()
+        try:
+            setup_handle( handle, user_agent )
+            yield handle
+        finally:
+            self._release( handle )
+
+    @synchronized
+    def close(self):
+        for handle in self._idle:
+            self._closeHandle( handle )
+        self._idle = []
+
+    @synchronized
+    def getStats(self) -> Dict[str, float]:
+        """Return connection reuse statistics."""
+        connections = self._closedConnections
+        requests_num = self._closedRequests
+        for handle in self._idle + self._active:
+            connections  += handle.connectionsNum
+            requests_num += handle.requestsNum
+        per_connection = 0.0
+        if connections > 0:
+            per_connection = requests_num / connections
+        return { "requests": requests_num,
+                 "connections": connections,
+                 "handshakes_saved": max( requests_num - connections, 0 ),
+                 "requests_per_connection": per_connection }
+
+    @synchronized
+    def _borrow(self) -> CurlHandle:
+        if self._idle:
+            handle = self._idle.pop()
+        else:
+            handle = CurlHandle()
+            handle.setopt( pycurl.SHARE, self._getShare() )
+        self._active.append( handle )
+        return handle
+
+    @synchronized
+    def _release(self, handle: CurlHandle):
+        self._active.remove( handle )
+        try:
+            ## isolate cookies of next job
+            handle.setopt( pycurl.COOKIELIST, "ALL" )
+            ## reset options and callbacks - keeps share and live connections
+            handle.reset()
+        except pycurl.error as exc:
+            _LOGGER.warning( "unable to reset curl handle: %s", exc )
+            self._closeHandle( handle )
+            return
+        if len( self._idle ) >= self.poolSize:
+            self._closeHandle( handle )
+            return
+        self._idle.append( handle )
+
+    def _getShare(self) -> pycurl.CurlShare:
+        if self._share is None:
+            ## share object serializes access to shared data between threads
+            self._share = pycurl.CurlShare()
+            for lock_name in SHARED_DATA:
+                lock_data = getattr( pycurl, lock_name, None )
+                if lock_data is None:
+                    ## not supported by libcurl
+                    continue
+                self._share.setopt( pycurl.SH_SHARE, lock_data )
+        return self._share
+
+    def _closeHandle(self, handle: CurlHandle):
+        self._closedConnections += handle.connectionsNum
+        self._closedRequests    += handle.requestsNum
+        handle.close()
+
+
+def setup_handle( handle: pycurl.Curl, user_agent=None ):
+    if user_agent is None:
+        user_agent = DEFAULT_USER_AGENT
+    handle.setopt( pycurl.USERAGENT, user_agent )
+    handle.setopt( pycurl.FOLLOWLOCATION, True )                ## follow redirects
+    handle.setopt( pycurl.CONNECTTIMEOUT, CONNECT_TIMEOUT )
+    handle.setopt( pycurl.COOKIEFILE, "" )                      ## enable in-memory cookie jar
+
+
+## process-wide pool of curl handles
+CURL_POOL = CurlPool()
+
+
+def log_curl_stats():
+    stats = CURL_POOL.getStats()
+    _LOGGER.info( "curl handles: requests: %s connections: %s handshakes saved: %s requests per connection: %.2f",
+                  stats["requests"], stats["connections"], stats["handshakes_saved"],
+                  stats["requests_per_connection"] )
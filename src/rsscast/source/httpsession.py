@@ -0,0 +1,171 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import logging
+from contextlib import contextmanager
+from typing import List, Dict
+
+import requests
+import requests_file
+from requests.adapters import HTTPAdapter
+
+from rsscast.synchronized import synchronized
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+DEFAULT_POOL_SIZE = 8           ## number of idle sessions and connections per host kept alive
+DEFAULT_TIMEOUT   = 5           ## in seconds
+
+
+class SessionPool():
+    """Thread-safe pool of 'requests' sessions reusing connections (keep-alive) between requests.
+
+    Session is borrowed by single thread at a time. Idle sessions are reused
+    starting from most recently used, so the session has warm connection.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT):
+        self.poolSize = pool_size
+        self.timeout  = timeout
+        self._idle: List[requests.Session] = []
+        self._active: List[requests.Session] = []
+        ## statistics of closed sessions
+        self._closedConnections = 0
+        self._closedRequests    = 0
+
+    @synchronized
+    def configure(self, pool_size=None, timeout=None):
+        if pool_size is not None:
+            self.poolSize = max( pool_size, 1 )
+        if timeout is not None:
+            self.timeout = timeout
+        ## drop sessions exceeding new size
+        while len( self._idle ) > self.poolSize:
+            self._closeSession( self._idle.pop(0) )
+
+    @contextmanager
+    def session(self):
+        session = self._borrow()
+        try:
+            yield session
+        finally:
+            self._release( session )
+
+    def get(self, url, **kwargs) -> requests.Response:
+        kwargs.setdefault( "timeout", self.timeout )
+        with self.session() as session:
+            return session.get( url, **kwargs )
+
+    def head(self, url, **kwargs) -> requests.Response:
+        kwargs.setdefault( "timeout", self.timeout )
+        with self.session() as session:
+            return session.head( url, **kwargs )
+
+    @synchronized
+    def close(self):
+        for session in self._idle:
+            self._closeSession( session )
+        self._idle = []
+
+    @synchronized
+    def getStats(self) -> Dict[str, float]:
+        """Return connection reuse statistics."""
+        connections = self._closedConnections
+        requests_num = self._closedRequests
+        for session in self._idle + self._active:
+            sess_conns, sess_reqs = count_connections( session )
+            connections  += sess_conns
+            requests_num += sess_reqs
+        per_connection = 0.0
+        if connections > 0:
+            per_connection = requests_num / connections
+        return { "requests": requests_num,
+                 "connections": connections,
+                 "handshakes_saved": max( requests_num - connections, 0 ),
+                 "requests_per_connection": per_connection }
+
+    @synchronized
+    def _borrow(self) -> requests.Session:
+        if self._idle:
+            session = self._idle.pop()
+        else:
+            session = self._createSession()
+        self._active.append( session )
+        return session
+
+    @synchronized
+    def _release(self, session: requests.Session):
+        self._active.remove( session )
+        if len( self._idle ) >= self.poolSize:
+            self._closeSession( session )
+            return
+        self._idle.append( session )
+
+    def _createSession(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter( pool_connections=self.poolSize, pool_maxsize=self.poolSize )
+        session.mount( 'http://', adapter )
+        session.mount( 'https://', adapter )
+        session.mount( 'file://', requests_file.FileAdapter() )
+        return session
+
+    def _closeSession(self, session: requests.Session):
+        sess_conns, sess_reqs = count_connections( session )
+        self._closedConnections += sess_conns
+        self._closedRequests    += sess_reqs
+        session.close()
+
+
+def count_connections( session: requests.Session ):
+    """Return number of opened connections and number of requests performed by session."""
+    connections = 0
+    requests_num = 0
+    adapters = { id(adapter): adapter for adapter in session.adapters.values() }
+    for adapter in adapters.values():
+        pool_manager = getattr( adapter, "poolmanager", None )
+        if pool_manager is None:
+            continue
+        for key in pool_manager.pools.keys():
+            pool = pool_manager.pools.get( key )
+            if pool is None:
+                continue
+            connections  += getattr( pool, "num_connections", 0 )
+            requests_num += getattr( pool, "num_requests", 0 )
+    return connections, requests_num
+
+
+## process-wide pool of sessions
+HTTP_SESSIONS = SessionPool()
+
+
+def configure_sessions( pool_size=None, timeout=None ):
+    HTTP_SESSIONS.configure( pool_size, timeout )
+
+
+def log_sessions_stats():
+    stats = HTTP_SESSIONS.getStats()
+    _LOGGER.info( "http sessions: requests: %s connections: %s handshakes saved: %s requests per connection: %.2f",
+                  stats["requests"], stats["connections"], stats["handshakes_saved"],
+                  stats["requests_per_connection"] )
@@ -24,7 +24,7 @@
 import logging
 
 from rsscast.rss.rsschannel import RSSChannel
-from rsscast.source.youtube.ytfeedparser import parse_rss
+from rsscast.source.youtube.ytfeedparser import parse_rss, NOT_MODIFIED
 from rsscast.source.youtube.ytconverter import parse_playlist
 
 
@@ -34,10 +34,13 @@ _LOGGER = logging.getLogger(__name__)
 ## ============================================================
 
 
-def parse_url( feedId, feedUrl, write_content=True, known_items=None, max_fetch=10 ) -> RSSChannel:
+# returns None if 'conditional' is set and feed did not change since previous fetch
+def parse_url( feedId, feedUrl, write_content=True, known_items=None, max_fetch=10, conditional=False ) -> RSSChannel:
     _LOGGER.info("fetching feed data: %s %s", feedId, feedUrl)
     # 'parse_rss' for backward compatibility
-    channel = parse_rss(feedId, feedUrl, write_content)
+    channel = parse_rss(feedId, feedUrl, write_content, conditional=conditional)
+    if channel is NOT_MODIFIED:
+        return None
     if channel:
         return channel
 
@@ -21,30 +21,76 @@
 # SOFTWARE.
 #
 
-import logging
-import time
 import json
+import asyncio
+import logging
 
-import urllib
-
-from rsscast.source.youtube.ytwebconvert import urlretrieve, get_curl_session, curl_get
+from rsscast.eventloop import EVENT_LOOP
+from rsscast.downloadqueue import get_converter_name
+from rsscast.jobjournal import JOB_JOURNAL
+from rsscast.source.curlpool import CURL_POOL
+from rsscast.source.youtube.ytwebconvert import curl_get_async, download_converted, run_stages
+from rsscast.source.youtube.progresspoller import PROGRESS_POLLER
 
 
 _LOGGER = logging.getLogger(__name__)
 
 
+SERVER_URL = "https://p.savenow.to"
+
+USER_AGENT = "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/116.0"
+
+
 ## use https://ddownr.com/
 def convert_yt( link, output, _mimicHuman=True ) -> bool:
-    _LOGGER.info("ddownr.com: converting youtube video %s", link)
+    return EVENT_LOOP.submit( run_stages( start_convert_yt( link, output ) ) ).result()
 
-    SERVER_URL = "https://p.savenow.to"
 
-    session = get_curl_session( "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/116.0" )
+# submit conversion, returns remaining stage (see 'ytconverter.run_converter_async') or False
+async def start_convert_yt( link, output, _mimicHuman=True ):
+    _LOGGER.info("ddownr.com: converting youtube video %s", link)
+    converter_name = get_converter_name( convert_yt )
+    remote_job = JOB_JOURNAL.getRemoteJob( output )
+    if remote_job is not None and remote_job[0] == converter_name:
+        ## conversion started before restart - poll it instead of resubmitting
+        _LOGGER.info( "resuming conversion %s of %s", remote_job[1], link )
+        return finish_conversion( remote_job[1], link, output, resubmit=True )
+
+    job_id = await submit_conversion( link, output )
+    if job_id is None:
+        return False
+    return finish_conversion( job_id, link, output )
+
+
+# start conversion and store its id in journal, returns id of conversion job or None
+async def submit_conversion( link, output ):
+    with CURL_POOL.session( USER_AGENT ) as session:
+        job_id = await start_conversion( session, link )
+    if job_id is not None:
+        JOB_JOURNAL.setRemoteJob( output, get_converter_name( convert_yt ), job_id )
+    return job_id
+
+
+# wait for conversion and download converted media
+# if 'resubmit' is set, then new conversion is started when job is not found (e.g. expired)
+async def finish_conversion( job_id, link, output, resubmit=False ) -> bool:
+    with CURL_POOL.session( USER_AGENT ) as session:
+        download_url = await wait_for_conversion( session, job_id, link )
+        if download_url is None and resubmit:
+            job_id = await submit_conversion( link, output )
+            if job_id is not None:
+                download_url = await wait_for_conversion( session, job_id, link )
+    if download_url is None:
+        return False
+    return await download_converted( download_url, output )
+
 
+# returns id of conversion job or None
+async def start_conversion( session, link ):
     service_link = f"{SERVER_URL}/ajax/download.php"
     params = {"copyright": 0, "format": "mp3",
               "url": link, "api": "dfcb6d76f2f6a9894gjkege8a4ab232222"}
-    dataBuffer = curl_get( session, service_link, params, header_list=[] )
+    dataBuffer = await asyncio.wrap_future( curl_get_async( session, service_link, params, header_list=[] ) )
     bodyOutput = dataBuffer.getvalue().decode('utf-8')
 
     response_data = None
@@ -52,63 +98,39 @@ def convert_yt( link, output, _mimicHuman=True ) -> bool:
         response_data = json.loads( bodyOutput )
     except json.decoder.JSONDecodeError:
         _LOGGER.error( "invalid response (expected JSON) from link %s - response: %s", link, bodyOutput )
-        return False
+        return None
 
     job_id = response_data.get("id")
     if job_id is None:
         _LOGGER.error( "invalid JSON from link %s - json: %s", link, response_data )
-        return False
+        return None
+    return job_id
+
 
+# returns URL of converted media or None
+async def wait_for_conversion( session, job_id, link ):
     _LOGGER.info( f"waiting for finish of conversion of {link}" )
 
     status_url = f"{SERVER_URL}/ajax/progress.php"
     params = {"id": job_id}
-    download_url = None
-    recent_response_data = None
-    while True:
-
-        status_timeout = True
-        for _i in range(0, 20):
-            time.sleep(6.0)
-
-            status_response = curl_get(session, status_url, params)
-            response = status_response.getvalue()
-            response_data = json.loads( response )
-
-            if recent_response_data == response_data:
-                # no change
-                continue
-            status_timeout = False
-            recent_response_data = response_data
-            break
-
-        if status_timeout:
-            break
 
-        status = response_data.get("success")
-        if status == 0:
-            # in progress
-            _LOGGER.debug( f"received progress: {response_data}" )
-            continue
+    def fetch_status():
+        ## request is driven by curl engine - no thread waits for response
+        return curl_get_async( session, status_url, params, parse=lambda response: json.loads( response.getvalue() ) )
 
-        if status != 1:
-            _LOGGER.error(f"unhandled response: {response_data}")
-            return False
+    ## progress is polled in shared event loop
+    try:
+        response_data = await PROGRESS_POLLER.wait( fetch_status, base_interval=6.0, stall_timeout=120.0,
+                                                    name="ddownr.com" )
+    except ValueError as exc:
+        _LOGGER.error( "%s", exc )
+        return None
 
+    download_url = None
+    if response_data is not None:
         # found url
         download_url = response_data.get("download_url")
-        break
 
     if download_url is None:
         _LOGGER.error( "timeout reached during waiting for conversion of link %s", link )
-        return False
-
-    _LOGGER.info( f"downloading content from {download_url} to {output}" )
-    try:
-        urlretrieve( download_url, output, timeout=90, write_empty=False )
-    except urllib.error.HTTPError:
-        _LOGGER.exception("unable to download content from %s", download_url)
-        return False
-
-    _LOGGER.info("downloading completed")
-    return True
+    return download_url
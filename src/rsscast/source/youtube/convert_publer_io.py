@@ -25,19 +25,23 @@ import logging
 import time
 import json
 
-import urllib
-
-from rsscast.source.youtube.ytwebconvert import urlretrieve, get_curl_session, curl_get
+from rsscast.source.curlpool import CURL_POOL
+from rsscast.source.youtube.ytwebconvert import urldownload, validate_media_head, curl_get
 
 
 _LOGGER = logging.getLogger(__name__)
 
 
+USER_AGENT = "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/116.0"
+
+
 def convert_yt( link, output, _mimicHuman=True ) -> bool:
     _LOGGER.info("publer.io: converting youtube video %s", link)
+    with CURL_POOL.session( USER_AGENT ) as session:
+        return convert_with_session( session, link, output )
 
-    session = get_curl_session( "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/116.0" )
 
+def convert_with_session( session, link, output ) -> bool:
     service_link = "https://ab.cococococ.com/ajax/download.php"
     params = {"url": link, "iphone": False}
 
@@ -79,8 +83,8 @@ def convert_yt( link, output, _mimicHuman=True ) -> bool:
     output_video = f"{output}.vid"
     _LOGGER.info( f"downloading content from {download_url} to {output_video}" )
     try:
-        urlretrieve( download_url, output, timeout=60, write_empty=False )
-    except urllib.error.HTTPError:
+        urldownload( download_url, output, timeout=60, write_empty=False, validate_head=validate_media_head )
+    except IOError:
         _LOGGER.exception("unable to download content from %s", download_url)
         return False
 
@@ -27,6 +27,8 @@ import logging
 from pytube import YouTube
 from pytubefix import YouTube as YouTubeFix
 
+from rsscast import finalize
+
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -65,8 +67,11 @@ def convert_yt( link, output, _mimicHuman=True ) -> bool:
     audio_download = yt.streams.filter(file_extension="mp3").first()
     if audio_download is not None:
         # mp3 stream found
-        out_file = audio_download.download(output_path="/tmp")
-        os.rename( out_file, output )
+        ## stage next to output, so finalization does not copy the file
+        staged_path = finalize.stage_path( output )
+        out_file = audio_download.download( output_path=os.path.dirname( staged_path ),
+                                            filename=os.path.basename( staged_path ) )
+        finalize.commit( out_file, output )
 
         _LOGGER.info("downloading completed")
         return True
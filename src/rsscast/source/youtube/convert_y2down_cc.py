@@ -21,13 +21,20 @@
 # SOFTWARE.
 #
 
-import time
-import logging
 import json
+import asyncio
+import logging
 
 import urllib
+import pycurl
 
-from rsscast.source.youtube.ytwebconvert import urlretrieve
+from rsscast.eventloop import EVENT_LOOP
+from rsscast.downloadqueue import get_converter_name
+from rsscast.jobjournal import JOB_JOURNAL
+from rsscast.source.curlpool import CURL_POOL
+from rsscast.source.youtube.ytwebconvert import curl_get_async, set_insecure_ssl, download_converted, run_stages, \
+    MEDIA_USER_AGENT
+from rsscast.source.youtube.progresspoller import PROGRESS_POLLER
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -35,86 +42,106 @@ _LOGGER = logging.getLogger(__name__)
 
 ## use https://y2down.cc/
 def convert_yt( link, output, _mimicHuman=True ) -> bool:
+    return EVENT_LOOP.submit( run_stages( start_convert_yt( link, output ) ) ).result()
+
+
+# submit conversion, returns remaining stage (see 'ytconverter.run_converter_async') or False
+async def start_convert_yt( link, output, _mimicHuman=True ):
     _LOGGER.info("y2down.cc: converting youtube video %s", link)
 
+    converter_name = get_converter_name( convert_yt )
+    remote_job = JOB_JOURNAL.getRemoteJob( output )
+    if remote_job is not None and remote_job[0] == converter_name:
+        ## conversion started before restart - poll it instead of resubmitting
+        _LOGGER.info( "resuming conversion %s of %s", remote_job[1], link )
+        return finish_conversion( remote_job[1], link, output, resubmit=True )
+
+    convert_id = await submit_conversion( link, output )
+    if convert_id is None:
+        return False
+    return finish_conversion( convert_id, link, output )
+
+
+# start conversion and store its id in journal, returns id of conversion job or None
+async def submit_conversion( link, output ):
+    with CURL_POOL.session( MEDIA_USER_AGENT ) as session:
+        set_insecure_ssl( session )
+        convert_id = await start_conversion( session, link )
+    if convert_id is not None:
+        JOB_JOURNAL.setRemoteJob( output, get_converter_name( convert_yt ), convert_id )
+    return convert_id
+
+
+# wait for conversion and download converted media
+# if 'resubmit' is set, then new conversion is started when job is not found (e.g. expired)
+async def finish_conversion( convert_id, link, output, resubmit=False ) -> bool:
+    with CURL_POOL.session( MEDIA_USER_AGENT ) as session:
+        set_insecure_ssl( session )
+        download_url = await wait_for_conversion( session, convert_id, link )
+        if download_url is None and resubmit:
+            convert_id = await submit_conversion( link, output )
+            if convert_id is not None:
+                download_url = await wait_for_conversion( session, convert_id, link )
+    if download_url is None:
+        return False
+    return await download_converted( download_url, output )
+
+
+# returns id of conversion job or None
+async def start_conversion( session, link ):
     ## https://loader.to/ajax/download.php?format=mp3&url=https%3A%2F%2Fwww.youtube.com%2Fwatch%3Fv%3D1cpyexbmMyU
     escaped_link = urllib.parse.quote( link )
     convert_url = f"https://loader.to/ajax/download.php?format=mp3&url={escaped_link}"
-    convert_response = None
     try:
-        convert_response = urlretrieve( convert_url )
-    except urllib.error.HTTPError:
+        convert_response = await asyncio.wrap_future( curl_get_async( session, convert_url ) )
+    except pycurl.error:
         _LOGGER.exception("unable to download content from %s", convert_url)
-        return False
-    convert_data = json.loads( convert_response )
+        return None
+    try:
+        convert_data = json.loads( convert_response.getvalue() )
+    except json.decoder.JSONDecodeError:
+        _LOGGER.error( "invalid response (expected JSON) from %s - response: %s", convert_url,
+                       convert_response.getvalue() )
+        return None
     # _LOGGER.info( f"convert data {convert_data}" )
     if convert_data.get( "success", False ) is False:
         _LOGGER.error( f"failed to convert {link} - server response" )
-        return False
+        return None
     convert_id = convert_data.get( "id", None )
     if not convert_id:
         _LOGGER.error( f"failed to convert {link} - missing ID" )
-        return False
+        return None
 
     # content = convert_data.get( "content", "" )
     # content = base64.b64decode( content )
     # content = content.decode("utf-8")
     # print( f"content:\n{content}")
+    return convert_id
+
 
+# returns URL of converted media or None
+async def wait_for_conversion( session, convert_id, link ):
     _LOGGER.info( f"waiting for finish of conversion of {link}" )
 
     progress_link = f"https://loader.to/ajax/progress.php?id={convert_id}"
-    download_url = None
-    recent_response_data = None
-    while True:
-
-        status_timeout = True
-        for _i in range(0, 20):
-            time.sleep( 3.0 )
-
-            progress_resp = None
-            try:
-                progress_resp = urlretrieve( progress_link )
-            except urllib.error.HTTPError:
-                _LOGGER.exception("unable to download content from %s", progress_link)
-                continue
-
-            response_data = json.loads( progress_resp )
-
-            if recent_response_data == response_data:
-                # no change
-                continue
-            status_timeout = False
-            recent_response_data = response_data
-            break
-
-        if status_timeout:
-            break
-
-        status = response_data.get("success")
-        if status == 0:
-            # in progress
-            _LOGGER.debug( f"received progress: {response_data}" )
-            continue
-
-        if status != 1:
-            _LOGGER.error(f"unhandled response: {response_data}")
-            return False
 
+    def fetch_status():
+        ## request is driven by curl engine - no thread waits for response
+        return curl_get_async( session, progress_link, parse=lambda response: json.loads( response.getvalue() ) )
+
+    ## progress is polled in shared event loop
+    try:
+        response_data = await PROGRESS_POLLER.wait( fetch_status, base_interval=3.0, stall_timeout=60.0,
+                                                    name="y2down.cc" )
+    except ValueError as exc:
+        _LOGGER.error( "%s", exc )
+        return None
+
+    download_url = None
+    if response_data is not None:
         # found url
         download_url = response_data.get("download_url")
-        break
 
     if download_url is None:
         _LOGGER.error( "timeout reached during waiting for conversion of link %s", link )
-        return False
-
-    _LOGGER.info( f"downloading content from {download_url} to {output}" )
-    try:
-        urlretrieve( download_url, output, timeout=90, write_empty=False )
-    except urllib.error.HTTPError:
-        _LOGGER.exception("unable to download content from %s", download_url)
-        return False
-
-    _LOGGER.info("downloading completed")
-    return True
+    return download_url
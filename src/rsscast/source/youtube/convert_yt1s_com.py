@@ -26,7 +26,8 @@ import random
 import logging
 import json
 
-from rsscast.source.youtube.ytwebconvert import get_curl_session, curl_post, urldownload
+from rsscast.source.curlpool import CURL_POOL
+from rsscast.source.youtube.ytwebconvert import curl_post, urldownload, validate_media_head
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -37,97 +38,93 @@ def convert_yt( link, output, mimicHuman=True ) -> bool:
     _LOGGER.info("yt1s.com: converting youtube video %s", link)
 
     try:
-        session = get_curl_session()
+        with CURL_POOL.session() as session:
+            return convert_with_session( session, link, output, mimicHuman )
 
-        mp3Data = get_mp3_data( session, link, mimicHuman )
-        if mp3Data is None:
-            return False
+    except Exception as exc:                                               # pylint: disable=W0703
+        _LOGGER.exception("Unexpected exception on link access '%s': %s", link, exc)
+        return False
 
-        vidId     = mp3Data[0]
-        mp3Format = mp3Data[1]
 
-        convertId = mp3Format['k']
-#         dataSize  = mp3Format['size']
-
-#         pprint( mp3Format )
-
-        convert_url = "https://www.yt1s.com/api/ajaxConvert/convert"
-        params = { 'vid': vidId,
-                   'k': convertId }
-        _LOGGER.debug( "sending convert request to %s\nparams: %s", convert_url, params )
-
-        download_url = None
-        recent_response_data = None
-        for _ in range(0, 120):
-            if mimicHuman:
-                randTime = random.uniform( 1.0, 3.0 )
-                time.sleep( randTime )
-            else:
-                time.sleep(1.0)
-
-            status_response = curl_post( session, convert_url, params )
-            response = status_response.getvalue()
-            response_data = json.loads( response )
-
-    #         print( "convert response:", data )
-    #         pprint( data )
-
-            if recent_response_data == response_data:
-                # no change
-                continue
-            recent_response_data = response_data
-
-            jsonStatus = response_data['status']
-            if jsonStatus != "ok":
-                _LOGGER.error( "invalid status:\n%s", jsonStatus )
-                return False
-
-            c_status = response_data['c_status']
-            if c_status == "CONVERTING":
-                # in progress
-                continue
-
-            if c_status == "CONVERTED":
-                # completed
-                download_url = response_data["dlink"]
-                break
-
-            ## {"status":"ok","mess":"","c_status":"CONVERTING","b_id":"6004d4c0d684ebb22f8b45ab","e_time":39}
-            _LOGGER.error( "invalid status:\n%s", response_data )
-            return False
+def convert_with_session( session, link, output, mimicHuman=True ) -> bool:
+    mp3Data = get_mp3_data( session, link, mimicHuman )
+    if mp3Data is None:
+        return False
 
-        if download_url is None:
-            _LOGGER.error( "timeout reached during waiting for conversion" )
-            return False
+    vidId     = mp3Data[0]
+    mp3Format = mp3Data[1]
 
-        _LOGGER.info( "grabbing file: %s to %s", download_url, output )
-        urldownload( download_url, output )
+    convertId = mp3Format['k']
+#     dataSize  = mp3Format['size']
 
-#         simple_download( download_url, output )
-#         curl_download( session, download_url, output )
+#     pprint( mp3Format )
 
-#         if mimicHuman:
-#             randTime = random.uniform( 1.0, 3.0 )
-#             time.sleep( randTime )
+    convert_url = "https://www.yt1s.com/api/ajaxConvert/convert"
+    params = { 'vid': vidId,
+               'k': convertId }
+    _LOGGER.debug( "sending convert request to %s\nparams: %s", convert_url, params )
 
-        ## done -- returning
-        _LOGGER.info("downloading completed")
-        return True
+    download_url = None
+    recent_response_data = None
+    for _ in range(0, 120):
+        if mimicHuman:
+            randTime = random.uniform( 1.0, 3.0 )
+            time.sleep( randTime )
+        else:
+            time.sleep(1.0)
 
-    except Exception as exc:                                               # pylint: disable=W0703
-        _LOGGER.exception("Unexpected exception on link access '%s': %s", link, exc)
+        status_response = curl_post( session, convert_url, params )
+        response = status_response.getvalue()
+        response_data = json.loads( response )
+
+#         print( "convert response:", data )
+#         pprint( data )
+
+        if recent_response_data == response_data:
+            # no change
+            continue
+        recent_response_data = response_data
+
+        jsonStatus = response_data['status']
+        if jsonStatus != "ok":
+            _LOGGER.error( "invalid status:\n%s", jsonStatus )
+            return False
+
+        c_status = response_data['c_status']
+        if c_status == "CONVERTING":
+            # in progress
+            continue
+
+        if c_status == "CONVERTED":
+            # completed
+            download_url = response_data["dlink"]
+            break
+
+        ## {"status":"ok","mess":"","c_status":"CONVERTING","b_id":"6004d4c0d684ebb22f8b45ab","e_time":39}
+        _LOGGER.error( "invalid status:\n%s", response_data )
         return False
 
-    finally:
-        session.close()
+    if download_url is None:
+        _LOGGER.error( "timeout reached during waiting for conversion" )
+        return False
 
-    return False
+    _LOGGER.info( "grabbing file: %s to %s", download_url, output )
+    urldownload( download_url, output, write_empty=False, validate_head=validate_media_head )
 
+#     simple_download( download_url, output )
+#     curl_download( session, download_url, output )
 
-def get_media_size( link, mimicHuman=True ):
-    try:
-        session = get_curl_session()
+#     if mimicHuman:
+#         randTime = random.uniform( 1.0, 3.0 )
+#         time.sleep( randTime )
+
+    ## done -- returning
+    _LOGGER.info("downloading completed")
+    return True
 
+
+def get_media_size( link, mimicHuman=True ):
+    with CURL_POOL.session() as session:
         mp3Data = get_mp3_data( session, link, mimicHuman )
         if mp3Data is None:
             return None
@@ -139,11 +136,6 @@ def get_media_size( link, mimicHuman=True ):
 
         return dataSize
 
-    finally:
-        session.close()
-
-    return None
-
 
 def get_mp3_data( session, link, mimicHuman=True ):
     # # Read cookies
@@ -168,8 +160,8 @@ def get_mp3_data( session, link, mimicHuman=True ):
 
     data = json.loads( bodyOutput )
 
-#         print( "request response:" )
-#         pprint( data )
+#     print( "request response:" )
+#     pprint( data )
 
     jsonStatus = data['status']
     if jsonStatus != "ok":
@@ -24,21 +24,43 @@
 import os
 import logging
 import datetime
+import threading
 from enum import Enum, unique, auto
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor, Future
 
 from xml.sax.saxutils import escape
 import requests
 
 import yt_dlp
 
+from rsscast import finalize
+from rsscast.bandwidth import BANDWIDTH
 from rsscast.rss.rsschannel import RSSChannel
+from rsscast.rss.audioformat import get_audio_format
+from rsscast.transcodepool import TRANSCODE_POOL, TranscodeError
+from rsscast.source.httpsession import HTTP_SESSIONS
+from rsscast.source.youtube.ytinfocache import VideoInfoCache, ProbedInfoStore, get_video_id
+from rsscast.source.youtube.ytdlppool import YoutubeDLPool
 # from pydub.audio_segment import AudioSegment
 
 
 _LOGGER = logging.getLogger(__name__)
 
 
+## number of videos metadata fetched concurrently while parsing playlist
+FETCH_JOBS = 4
+
+## number of playlist items fetched in single page in incremental mode
+PAGE_SIZE = 30
+
+## metadata of single videos, persisted together with user data
+VIDEO_INFO_CACHE = VideoInfoCache()
+
+## full metadata of videos recently checked for availability
+PROBED_INFO = ProbedInfoStore()
+
+
 # # set loglevel of library
 # l = logging.getLogger("pydub.converter")
 # l.setLevel(logging.WARNING)
@@ -47,59 +69,115 @@ _LOGGER = logging.getLogger(__name__)
 ## ============================================================
 
 
-def convert_yt( link, output, _mimicHuman=True, format_id=None ) -> bool:
+# 'audio_format' - name of format of output file (see 'audioformat.AUDIO_FORMATS')
+def convert_yt( link, output, _mimicHuman=True, format_id=None, audio_format=None ) -> bool:
+    return start_convert_yt( link, output, _mimicHuman, format_id, audio_format ).result()
+
+
+# download audio and start transcoding it (if needed)
+# returns future of conversion result - transcoding runs in 'TRANSCODE_POOL' and does not
+# need converter's slot, so caller can release the slot before waiting for the future
+def start_convert_yt( link, output, _mimicHuman=True, format_id=None, audio_format=None ) -> Future:
     _LOGGER.info("yt_dlp: converting youtube video %s", link)
 
+    audio_format = get_audio_format(audio_format)
     if format_id is None:
         # 'format': '140'
         # 'format': 'bestaudio'
         # format_id = 'bestaudio/best'
-        format_id = "bestaudio"
+        format_id = audio_format.ytdlpFormat
 
-    yt_path = output
-    yt_path = yt_path.rstrip(".mp3")
+    yt_path = os.path.splitext(output)[0]
     # yt_path = f"{output_path}.yt_audio"
 
+    ## native audio (m4a/webm) is downloaded and then transcoded in 'TRANSCODE_POOL' if needed
+    source_path = f"{yt_path}.source"
+
     try:
-        # AntennaPod does not like mp4 files (it is unable to fast-forward or play from certain time)
-        ydl_opts = {'extract_audio': True,
-                    'outtmpl': yt_path,
-                    'format': format_id,
-                    "logger": YTDLPLogger,
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '128',
-                    }]
-                    }
-
-        with yt_dlp.YoutubeDL(ydl_opts) as video:
-            video.download(link)
+        init_params = {'format': format_id}
+        run_params = {'outtmpl': source_path}
+        probed_info = PROBED_INFO.take(get_video_id(link))
+        with YTDL_POOL.borrow(PROFILE_DOWNLOAD, init_params, run_params) as video:
+            if not download_probed(video, probed_info, link):
+                video.download(link)
 
     except yt_dlp.utils.DownloadError:
         # error already reported by YTDLPLogger
-        if os.path.isfile(yt_path):
-            _LOGGER.info( "removing incomplete file: %s", yt_path )
-            # exception during storage - remove incomplete file
-            os.remove(yt_path)
-        return False
+        remove_incomplete(source_path)
+        return completed_future(False)
 
     except BaseException as exc:
         _LOGGER.error("error during download of audio: %s", exc)
-        if os.path.isfile(yt_path):
-            _LOGGER.info( "removing incomplete file: %s", yt_path )
-            # exception during storage - remove incomplete file
-            os.remove(yt_path)
+        remove_incomplete(source_path)
+        return completed_future(False)
+
+    if not os.path.isfile(source_path):
+        _LOGGER.error("unable to find downloaded audio: %s", source_path)
+        return completed_future(False)
+
+    if not audio_format.transcode:
+        ## native stream stored as is
+        finalize.commit(source_path, output)
+        _LOGGER.info("downloading completed")
+        return completed_future(True)
+
+    ## AntennaPod does not like mp4 files (it is unable to fast-forward or play from certain time)
+    ## encoding runs in separate processes with lowered priority
+    _LOGGER.info("transcoding audio to %s: %s", audio_format.name, output)
+    result_future = Future()
+
+    def transcode_done(transcode_future):
+        try:
+            transcode_future.result()
+        except (TranscodeError, OSError) as exc:
+            _LOGGER.error("unable to transcode audio: %s", exc)
+            result_future.set_result(False)
+            return
+        except BaseException as exc:      # pylint: disable=broad-except
+            _LOGGER.error("error during transcoding of audio: %s", exc)
+            result_future.set_result(False)
+            return
+        finally:
+            remove_incomplete(source_path)
+        _LOGGER.info("downloading completed")
+        result_future.set_result(True)
+
+    TRANSCODE_POOL.submit(source_path, output, audio_format=audio_format.name).add_done_callback(transcode_done)
+    return result_future
+
+
+def completed_future(result) -> Future:
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def remove_incomplete(file_path):
+    if os.path.isfile(file_path):
+        _LOGGER.info( "removing incomplete file: %s", file_path )
+        # exception during storage - remove incomplete file
+        os.remove(file_path)
+
+
+# download video using info extracted earlier (e.g. during availability check)
+# returns False if there is no info or download failed (e.g. media URL expired)
+def download_probed(video, info_dict, link) -> bool:
+    if info_dict is None:
+        return False
+    _LOGGER.info("yt_dlp: using probed info of %s", link)
+    try:
+        ## the same as 'YoutubeDL.download_with_info_file', but without JSON file
+        video.process_ie_result(video.sanitize_info(info_dict, remove_private_keys=True), download=True)
+        return True
+    except yt_dlp.utils.DownloadError:
+        _LOGGER.info("yt_dlp: unable to download using probed info of %s - extracting again", link)
         return False
 
-    ## kills application because of memory consumption
-    # _LOGGER.info("converting YT audio to mp3")
-    # # AntennaPod does not like mp4 files (it is unable to fast-forward or play from certain time)
-    # # convert in place
-    # AudioSegment.from_file(yt_path).export(output_path, format="mp3", bitrate="128k")
 
-    _LOGGER.info("downloading completed")
-    return True
+def is_downloadable(info_dict) -> bool:
+    if not info_dict.get("formats"):
+        return False
+    return info_dict.get("live_status") in ("not_live", "was_live")
 
 
 ## ============================================================
@@ -110,13 +188,19 @@ def parse_playlist( page_url, known_items=None, max_fetch=10 ) -> RSSChannel:
     return convert_info_to_channel(info_dict)
 
 
-def parse_playlist_data( page_url, known_items=None, max_fetch=10 ) -> Dict[Any, Any]:
+def parse_playlist_data( page_url, known_items=None, max_fetch=10, fetch_jobs=None ) -> Dict[Any, Any]:
     _LOGGER.info( "parsing youtube playlist url %s", page_url )
 
     if not known_items:
         known_items = set()
+    if fetch_jobs is None:
+        fetch_jobs = FETCH_JOBS
+    fetch_jobs = max(fetch_jobs, 1)
 
-    info_dict = fetch_info(page_url, items_num=999999)
+    if max_fetch > 0:
+        info_dict = fetch_playlist_info(page_url, known_items)
+    else:
+        info_dict = fetch_info(page_url, items_num=999999)
     if info_dict is None:
         return None
 
@@ -125,44 +209,51 @@ def parse_playlist_data( page_url, known_items=None, max_fetch=10 ) -> Dict[Any,
         fetch_count = 0
         entries_list = []
         entries_gen = info_dict.get("entries")
+        fetched_dict: Dict[str, Any] = {}       # fetched in advance (concurrently)
+
+        with ThreadPoolExecutor(max_workers=fetch_jobs, thread_name_prefix="YTInfo") as executor:
+            i = 0
+            while i < len(entries_gen):
+                if fetch_count >= max_fetch:
+                    _LOGGER.info("max items fetch reached[%s], breaking", max_fetch)
+                    break
+
+                item = entries_gen[i]
+                i += 1
+
+                yt_link = item.get("url", "")
+                if not yt_link or yt_link in known_items:
+                    _LOGGER.info("skipping known url: %s", yt_link)
+                    continue
+
+                fetch_count += 1
+
+                if yt_link not in fetched_dict:
+                    # fetch current and following items (not exceeding fetch limit)
+                    fetch_limit = min(fetch_jobs, max_fetch - fetch_count + 1)
+                    links_list = get_unknown_links(entries_gen, i - 1, known_items, fetch_limit, fetched_dict)
+                    fetched_dict.update( fetch_info_list(executor, links_list, i, len(entries_gen)) )
+
+                sub_info_dict = fetched_dict.pop(yt_link)
+                if sub_info_dict is None:
+                    # error while getting info
+                    sub_info_dict = {"link": yt_link}
+                    entries_list.append(sub_info_dict)
+                    continue
+
+                sub_items = sub_info_dict.get("entries")
+                if sub_items is not None:
+                    # sublist case - append to current list
+                    fetch_count -= 1        # reduce - fetch indicates number of videos
+                    _LOGGER.info("%s of %s: found sublist items %s", i, len(entries_gen), len(sub_items))
+                    new_list: List[str] = []
+                    new_list.extend( entries_gen[0:i - 1] )
+                    new_list.extend( sub_items )
+                    new_list.extend( entries_gen[i:] )
+                    entries_gen = new_list
+                    continue
 
-        i = 0
-        while i < len(entries_gen):
-            if fetch_count >= max_fetch:
-                _LOGGER.info("max items fetch reached[%s], breaking", max_fetch)
-                break
-
-            item = entries_gen[i]
-            i += 1
-
-            yt_link = item.get("url", "")
-            if not yt_link or yt_link in known_items:
-                _LOGGER.info("skipping known url: %s", yt_link)
-                continue
-
-            fetch_count += 1
-
-            _LOGGER.info("%s of %s: fetching youtube url: %s", i, len(entries_gen), yt_link)
-            sub_info_dict = fetch_info(yt_link, items_num=999)
-            if sub_info_dict is None:
-                # error while getting info
-                sub_info_dict = {"link": yt_link}
                 entries_list.append(sub_info_dict)
-                continue
-
-            sub_items = sub_info_dict.get("entries")
-            if sub_items is not None:
-                # sublist case - append to current list
-                fetch_count -= 1        # reduce - fetch indicates number of videos
-                _LOGGER.info("%s of %s: found sublist items %s", i, len(entries_gen), len(sub_items))
-                new_list: List[str] = []
-                new_list.extend( entries_gen[0:i - 1] )
-                new_list.extend( sub_items )
-                new_list.extend( entries_gen[i:] )
-                entries_gen = new_list
-                continue
-
-            entries_list.append(sub_info_dict)
 
         info_dict["entries"] = entries_list
 
@@ -172,6 +263,108 @@ def parse_playlist_data( page_url, known_items=None, max_fetch=10 ) -> Dict[Any,
     return info_dict
 
 
+# fetch flat playlist page by page until page containing only known items
+# entries order is the same as in case of fetching whole playlist
+def fetch_playlist_info(page_url, known_items=None, page_size=None) -> Dict[str, Any]:
+    if not known_items:
+        return fetch_info(page_url, items_num=999999)
+    if page_size is None:
+        page_size = PAGE_SIZE
+
+    info_dict = fetch_info(page_url, items_num=page_size)
+    if info_dict is None:
+        return None
+    entries = info_dict.get("entries")
+    if entries is None:
+        # single video
+        return info_dict
+
+    if is_reversed_playlist(info_dict):
+        # newest items are at the end of playlist - fetch pages from the end
+        items_count = info_dict.get("playlist_count")
+        if not items_count:
+            _LOGGER.info("unknown size of playlist - fetching whole playlist")
+            return fetch_info(page_url, items_num=999999)
+        if items_count <= page_size:
+            return info_dict
+        page_list = [(max(end_pos - page_size + 1, 1), end_pos) for end_pos in range(items_count, 0, -page_size)]
+        # oldest items are already fetched - reused if reached
+        first_entries = entries
+        entries = []
+    else:
+        first_entries = []
+        page_list = []
+        if len(entries) >= page_size and not is_page_known(entries, known_items):
+            start_pos = page_size + 1
+            page_list = ((pos, pos + page_size - 1) for pos in range(start_pos, 999999, page_size))
+
+    for start_pos, end_pos in page_list:
+        if end_pos <= len(first_entries):
+            # entries are reversed - newest first
+            first_num = len(first_entries)
+            page_entries = first_entries[first_num - end_pos:first_num - start_pos + 1]
+            add_entries(entries, page_entries)
+            break
+        _LOGGER.info("fetching playlist items %s:%s", start_pos, end_pos)
+        page_info = fetch_info(page_url, items_num=end_pos, start_pos=start_pos)
+        if page_info is None:
+            if not entries:
+                return None
+            _LOGGER.warning("unable to fetch playlist items %s:%s - returning %s items fetched so far",
+                            start_pos, end_pos, len(entries))
+            break
+        page_entries = page_info.get("entries") or []
+        add_entries(entries, page_entries)
+        if len(page_entries) < end_pos - start_pos + 1:
+            # last page
+            break
+        if is_page_known(page_entries, known_items):
+            _LOGGER.info("found page of known items - stopping")
+            break
+
+    info_dict["entries"] = entries
+    return info_dict
+
+
+# append entries not present in list (playlist could change between fetching pages)
+def add_entries(entries_list, new_entries):
+    links_set = set( item.get("url") for item in entries_list )
+    for item in new_entries:
+        if item.get("url") in links_set:
+            continue
+        entries_list.append(item)
+
+
+def is_page_known(entries_list, known_items):
+    for item in entries_list:
+        yt_link = item.get("url", "")
+        if yt_link not in known_items:
+            return False
+    return True
+
+
+# returns list of unique links of entries not present in 'known_items' nor in 'fetched_items'
+def get_unknown_links(entries_list, start_index, known_items, max_links, fetched_items):
+    ret_list: List[str] = []
+    for item in entries_list[start_index:]:
+        if len(ret_list) >= max_links:
+            break
+        yt_link = item.get("url", "")
+        if not yt_link or yt_link in known_items or yt_link in fetched_items or yt_link in ret_list:
+            continue
+        ret_list.append(yt_link)
+    return ret_list
+
+
+# fetch info of given links concurrently
+def fetch_info_list(executor, links_list, entry_number, entries_num) -> Dict[str, Any]:
+    futures_dict = {}
+    for index, yt_link in enumerate(links_list):
+        _LOGGER.info("%s of %s: fetching youtube url: %s", entry_number + index, entries_num, yt_link)
+        futures_dict[yt_link] = executor.submit(fetch_info, yt_link, items_num=999, fields=())
+    return { yt_link: future.result() for yt_link, future in futures_dict.items() }
+
+
 def convert_info_to_channel(info_dict) -> RSSChannel:
     # channel_modified_date = info_dict.get("modified_date")
     # published_date = num_date_to_datetime(channel_modified_date)
@@ -248,28 +441,36 @@ class VideoAvailableStatus(Enum):
 
 
 def is_video_available(video_url) -> VideoAvailableStatus:
-    result = fetch_info(video_url)
+    status, _ = get_video_status(video_url)
+    return status
+
+
+# returns status and release timestamp of video (if known)
+def get_video_status(video_url) -> Tuple[VideoAvailableStatus, Any]:
+    result = fetch_info(video_url, fields=("live_status", "release_timestamp"))
     if result is None:
         _LOGGER.warning("video unavailable: could not fetch info")
-        return VideoAvailableStatus.INVALID
+        return (VideoAvailableStatus.INVALID, None)
+
+    release_timestamp = result.get("release_timestamp")
 
     live_status = result.get("live_status")
     if live_status is None:
         _LOGGER.warning("video unavailable: no 'live_status' in fetch info")
-        return VideoAvailableStatus.INVALID
+        return (VideoAvailableStatus.INVALID, release_timestamp)
 
     if live_status in ("not_live", "was_live"):
-        return VideoAvailableStatus.OK
+        return (VideoAvailableStatus.OK, release_timestamp)
 
     if live_status == "is_upcoming":
-        return VideoAvailableStatus.UPCOMING
+        return (VideoAvailableStatus.UPCOMING, release_timestamp)
 
     _LOGGER.warning("unhandled live status: %s", live_status)
-    return VideoAvailableStatus.UPCOMING
+    return (VideoAvailableStatus.UPCOMING, release_timestamp)
 
 
 def list_audio_formats(video_url):
-    info_dict = fetch_info(video_url, reduce=False)
+    info_dict = fetch_info_raw(video_url, reduce=False, profile=PROFILE_FULL)
     foramts = info_dict.get("formats", [])
 
     ret_list = []
@@ -323,32 +524,45 @@ class YTDLPLogger:
         _LOGGER.debug(msg)
 
 
-def fetch_info(youtube_url, items_num=15, reduce=True):
-    return fetch_info_raw(youtube_url, items_num, reduce)
+# 'fields' - volatile fields required to be up to date (None means all), see 'ytinfocache.VOLATILE_FIELDS'
+# info of single videos is served from cache, non-reduced info is always fetched
+# full info of fetched single video is kept in 'PROBED_INFO' for 'convert_yt'
+def fetch_info(youtube_url, items_num=15, reduce=True, fields=None, start_pos=1):
+    video_id = None
+    if reduce:
+        video_id = get_video_id(youtube_url)
+    if video_id:
+        info_dict = VIDEO_INFO_CACHE.getInfo(video_id, fields)
+        if info_dict is not None:
+            _LOGGER.debug("video info found in cache: %s", video_id)
+            return info_dict
+
+    if not video_id:
+        return fetch_info_raw(youtube_url, items_num, reduce, start_pos)
+
+    info_dict = fetch_info_raw(youtube_url, items_num, reduce=False, start_pos=start_pos)
+    if info_dict is None:
+        return None
+    if info_dict.get("id") == video_id:
+        VIDEO_INFO_CACHE.putInfo(video_id, info_dict)
+        if is_downloadable(info_dict):
+            ## keep full info for download step, so video is not extracted again
+            PROBED_INFO.put(video_id, info_dict)
+            info_dict = dict(info_dict)
+    reduce_info(info_dict)
+    return info_dict
 
 
 # order of items in list seems to be random
 # youtube_url can be URL to channel or playlist or URL to video
 # returns None if failed/invalid url/video not available
-def fetch_info_raw(youtube_url, items_num=15, reduce=True, start_pos=1):
-    params = {"skip_download": True,
-              "simulate": True,
-              "ignore_no_formats_error": True,
-              "extract_flat": True,                     # do not download videos from list
-              # "dump_single_json": True,                ## will print JSON to stdout
-              "playlist_items": f"{start_pos}:{items_num}",
-              # "playlistreverse": True,                # reverses all items (videos and playlists)
-              "logger": YTDLPLogger,
-
-              ## restricting player_client causes longer duration of 'extract_info'
-              # "extractor_args": {"youtube": {
-              #                           "player_client": ["web"]
-              #                       }
-              #                    }
-              }
+def fetch_info_raw(youtube_url, items_num=15, reduce=True, start_pos=1, profile=None):
+    if profile is None:
+        profile = PROFILE_FLAT
+    run_params = {"playlist_items": f"{start_pos}:{items_num}"}
 
     try:
-        with yt_dlp.YoutubeDL(params) as ydl:
+        with YTDL_POOL.borrow(profile, run_params=run_params) as ydl:
             info_dict = ydl.extract_info(youtube_url, download=False)
 
         if info_dict is None:
@@ -365,9 +579,7 @@ def fetch_info_raw(youtube_url, items_num=15, reduce=True, start_pos=1):
 
     # item_type = info_dict.get('_type', "")        # applies to videos and playlists
 
-    # 'webpage_url_basename': 'playlist',
-    item_type = info_dict.get('webpage_url_basename', "")   # eg. "playlist" or "videos"
-    if item_type == 'playlist':
+    if is_reversed_playlist(info_dict):
         # playlist
         entries = info_dict.get("entries")
         if entries:
@@ -378,6 +590,79 @@ def fetch_info_raw(youtube_url, items_num=15, reduce=True, start_pos=1):
     return info_dict
 
 
+## ============================================================
+
+
+PROFILE_FLAT     = "flat"           # do not extract videos from list
+PROFILE_FULL     = "full"           # extract all videos from list
+PROFILE_DOWNLOAD = "download"       # download audio
+
+
+## long-lived YoutubeDL instances -- avoids initialization of extractors on each call
+YTDL_POOL = YoutubeDLPool()
+
+YTDL_POOL.registerProfile(PROFILE_FLAT,
+                          {"skip_download": True,
+                           "simulate": True,
+                           "ignore_no_formats_error": True,
+                           "extract_flat": True,                     # do not download videos from list
+                           # "dump_single_json": True,                ## will print JSON to stdout
+                           # "playlistreverse": True,                # reverses all items (videos and playlists)
+                           "logger": YTDLPLogger,
+
+                           ## restricting player_client causes longer duration of 'extract_info'
+                           # "extractor_args": {"youtube": {
+                           #                           "player_client": ["web"]
+                           #                       }
+                           #                    }
+                           })
+
+YTDL_POOL.registerProfile(PROFILE_FULL,
+                          {"skip_download": True,
+                           "simulate": True,
+                           "ignore_no_formats_error": True,
+                           "logger": YTDLPLogger})
+
+## amount of data downloaded so far by current thread
+THROTTLE_STATE = threading.local()
+
+
+# limits download speed according to 'bandwidth.BANDWIDTH'
+# hook is called by downloader thread, so waiting inside hook slows down download
+def throttle_progress(status_dict):
+    downloaded_dict = getattr(THROTTLE_STATE, "downloaded", None)
+    if downloaded_dict is None:
+        downloaded_dict = {}
+        THROTTLE_STATE.downloaded = downloaded_dict
+    file_name = status_dict.get("filename")
+    if status_dict.get("status") != "downloading":
+        downloaded_dict.pop(file_name, None)
+        return
+    downloaded = status_dict.get("downloaded_bytes")
+    if downloaded is None:
+        return
+    prev_downloaded = downloaded_dict.get(file_name, 0)
+    downloaded_dict[file_name] = downloaded
+    ## download can be resumed or restarted
+    BANDWIDTH.throttle(max(downloaded - prev_downloaded, 0))
+
+
+## downloads native audio, transcoding is done by 'TRANSCODE_POOL'
+YTDL_POOL.registerProfile(PROFILE_DOWNLOAD,
+                          {"logger": YTDLPLogger,
+                           "progress_hooks": [throttle_progress]})
+
+
+## ============================================================
+
+
+# entries of playlist are ordered from oldest, so they are reversed after fetch
+def is_reversed_playlist(info_dict):
+    # 'webpage_url_basename': 'playlist',
+    item_type = info_dict.get('webpage_url_basename', "")   # eg. "playlist" or "videos"
+    return item_type == 'playlist'
+
+
 def reduce_info(info_dict):
     entries = info_dict.get("entries", [])
     for item in entries:
@@ -442,7 +727,7 @@ def check_url(thumb_url):
         headers = {
             'User-Agent': 'My User Agent 1.0'
         }
-        response = requests.head(thumb_url, timeout=15, headers=headers, allow_redirects=True)
+        response = HTTP_SESSIONS.head(thumb_url, timeout=15, headers=headers, allow_redirects=True)
         # _LOGGER.info("link %s response code: %s", url, response.status_code)
         if response.status_code == 200:
             return thumb_url
@@ -0,0 +1,161 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import time
+import random
+import logging
+from typing import List, Dict, Any
+
+from rsscast.cache import PersistentDict
+from rsscast.synchronized import synchronized
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+## kinds of converter failures
+FAILURE_EXCEPTION = "exception"         ## converter raised exception
+FAILURE_PROCESS   = "process"           ## converter reported failure
+FAILURE_INVALID   = "invalid_file"      ## converter produced invalid file
+
+## weight of recent result in moving averages
+EWMA_WEIGHT = 0.3
+
+## number of consecutive failures opening the circuit (converter is skipped)
+FAILURE_THRESHOLD = 3
+
+## time (in seconds) converter is skipped after opening circuit, doubled on each failed probe
+BASE_COOLDOWN = 10 * 60
+MAX_COOLDOWN  = 6 * 60 * 60
+
+## converter is used to check if service works again
+PROBE = "probe"
+
+## time (in seconds) after which unfinished probe is considered lost
+PROBE_TIMEOUT = 30 * 60
+
+
+class ConverterHealth( PersistentDict ):
+    """Tracks results of converters and decides which of them should be used.
+
+    Converter is skipped (circuit is open) after FAILURE_THRESHOLD consecutive
+    failures. After cooldown single conversion is allowed as probe - on success
+    converter is used again, on failure cooldown is extended.
+    """
+
+    def __init__(self, cacheName="converter_health", cachePath=None):
+        super().__init__( cacheName, cachePath )
+
+    @synchronized
+    def getState(self, name) -> Dict[str, Any]:
+        data = self._getData()
+        state = data.get( name )
+        if state is None:
+            state = { "success": 0, "failure": 0,
+                      "success_rate": 1.0, "latency": 0.0,
+                      "consecutive_failures": 0, "last_failure": None,
+                      "open_until": None, "cooldown": 0, "probe_time": None }
+            data[ name ] = state
+        return state
+
+    @synchronized
+    def orderConverters(self, converters_list: List[Any], name_getter, now=None) -> List[Any]:
+        """Return available converters, most healthy first. Order of equally healthy ones is random.
+
+        Converters after cooldown are returned first, so the probe is really executed.
+        """
+        if now is None:
+            now = time.time()
+        available = []
+        probes = set()
+        for converter in converters_list:
+            name = name_getter( converter )
+            use_state = self._acquireUse( name, now )
+            if use_state is False:
+                _LOGGER.info( "converter %s: skipped - service considered down", name )
+                continue
+            if use_state == PROBE:
+                probes.add( name )
+            available.append( converter )
+        random.shuffle( available )
+
+        def health_key( converter ):
+            name = name_getter( converter )
+            state = self.getState( name )
+            return ( name not in probes, -round( state["success_rate"], 1 ), state["latency"] )
+
+        available.sort( key=health_key )
+        return available
+
+    @synchronized
+    def record(self, name, succeed, duration, failure_kind=None, now=None):
+        if now is None:
+            now = time.time()
+        state = self.getState( name )
+        state["probe_time"] = None
+        result = 1.0 if succeed else 0.0
+        state["success_rate"] = ( 1.0 - EWMA_WEIGHT ) * state["success_rate"] + EWMA_WEIGHT * result
+        self._changed = True
+
+        if succeed:
+            state["success"] += 1
+            state["latency"] = ( 1.0 - EWMA_WEIGHT ) * state["latency"] + EWMA_WEIGHT * duration
+            state["consecutive_failures"] = 0
+            state["open_until"] = None
+            state["cooldown"]   = 0
+            return
+
+        state["failure"] += 1
+        state["last_failure"] = failure_kind
+        state["consecutive_failures"] += 1
+        if state["open_until"] is not None or state["consecutive_failures"] >= FAILURE_THRESHOLD:
+            ## failed probe or too many failures - open circuit
+            cooldown = min( max( state["cooldown"] * 2, BASE_COOLDOWN ), MAX_COOLDOWN )
+            state["cooldown"]   = cooldown
+            state["open_until"] = now + cooldown
+            _LOGGER.warning( "converter %s: %s consecutive failures (last: %s) - skipping for %s minutes",
+                             name, state["consecutive_failures"], failure_kind, cooldown // 60 )
+
+    @synchronized
+    def getStats(self) -> Dict[str, Dict[str, Any]]:
+        data = self._getData()
+        return { name: dict( state ) for name, state in data.items() }
+
+    def _acquireUse(self, name, now):
+        state = self.getState( name )
+        open_until = state["open_until"]
+        if open_until is None:
+            return True
+        if now < open_until:
+            return False
+        ## half-open - allow single probe
+        probe_time = state["probe_time"]
+        if probe_time is not None and now < probe_time + PROBE_TIMEOUT:
+            return False
+        state["probe_time"] = now
+        self._changed = True
+        return PROBE
+
+
+## health of converters persisted together with user data
+CONVERTERS_HEALTH = ConverterHealth()
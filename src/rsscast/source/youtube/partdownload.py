@@ -0,0 +1,179 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import os
+import re
+import json
+import logging
+from typing import Dict
+
+from rsscast import finalize
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+PART_SUFFIX = ".part"
+META_SUFFIX = ".part.json"
+
+
+class IncompleteDownloadError( IOError ):
+    """Raised when downloaded data does not match length reported by server."""
+
+
+class PartialDownload():
+    """Download stored in '.part' file, that can be resumed after failure.
+
+    Metadata file next to '.part' file holds source URL and validator (ETag or
+    Last-Modified) of the content. Download is resumed using 'Range' request
+    guarded by 'If-Range', so server sends whole content if it changed.
+    """
+
+    def __init__(self, outputPath, url):
+        self.outputPath = outputPath
+        self.url        = url
+        self.partPath   = outputPath + PART_SUFFIX
+        self.metaPath   = outputPath + META_SUFFIX
+        self.meta: Dict[str, str] = {}
+        self.offset     = 0
+        self.totalSize  = None
+        self._load()
+
+    def getRequestHeaders(self) -> Dict[str, str]:
+        if self.offset < 1:
+            return {}
+        headers = { "Range": f"bytes={self.offset}-" }
+        validator = get_validator( self.meta )
+        if validator:
+            headers["If-Range"] = validator
+        return headers
+
+    def open(self, status, response_headers):
+        """Open '.part' file for writing content of given response.
+
+        'response_headers' is dict with lower case keys.
+        """
+        if status == 206 and self.offset > 0:
+            content_range = parse_content_range( response_headers.get( "content-range" ) )
+            if content_range is None or content_range[0] != self.offset:
+                raise IncompleteDownloadError( f"unexpected content range: {response_headers.get('content-range')}" )
+            self.totalSize = content_range[1]
+            _LOGGER.info( "resuming download of %s from %s bytes", self.url, self.offset )
+            mode = "ab"
+        else:
+            if self.offset > 0:
+                _LOGGER.info( "server sent whole content of %s - restarting download", self.url )
+            self.offset = 0
+            self.totalSize = parse_int( response_headers.get( "content-length" ) )
+            mode = "wb"
+
+        self.meta = { "url": self.url,
+                      "etag": response_headers.get( "etag" ),
+                      "last_modified": response_headers.get( "last-modified" ),
+                      "size": self.totalSize }
+        with open( self.metaPath, "w", encoding="utf-8" ) as meta_file:
+            json.dump( self.meta, meta_file )
+        return open( self.partPath, mode )        # pylint: disable=R1732
+
+    def finish(self):
+        """Verify length and move downloaded content to output path."""
+        part_size = os.path.getsize( self.partPath )
+        if self.totalSize is not None and part_size != self.totalSize:
+            raise IncompleteDownloadError( f"incomplete download of {self.url}:"
+                                           f" received {part_size} of {self.totalSize} bytes" )
+        finalize.commit( self.partPath, self.outputPath )
+        remove_file( self.metaPath )
+
+    def discard(self):
+        remove_file( self.partPath )
+        remove_file( self.metaPath )
+
+    def _load(self):
+        if not os.path.isfile( self.partPath ):
+            remove_file( self.metaPath )
+            return
+        try:
+            with open( self.metaPath, "r", encoding="utf-8" ) as meta_file:
+                meta = json.load( meta_file )
+        except (OSError, ValueError):
+            meta = None
+        if not meta or not is_resumable( meta, self.url ):
+            self.discard()
+            return
+        self.meta   = meta
+        self.offset = os.path.getsize( self.partPath )
+
+
+def is_resumable( meta, url ) -> bool:
+    """Download can be resumed from the same URL (with any validator) or if content has strong ETag.
+
+    Services generate new download URL for each conversion, often on different
+    mirrors, so matching modification date does not prove that content is the
+    same. Strong ETag in 'If-Range' guarantees that server sends whole content
+    if it is different. Without validator range request can not be conditional,
+    so download is restarted from zero.
+    """
+    if meta.get( "url" ) == url:
+        return bool( get_validator( meta ) )
+    return bool( get_strong_etag( meta ) )
+
+
+def get_validator( meta ):
+    etag = get_strong_etag( meta )
+    if etag:
+        return etag
+    return meta.get( "last_modified" )
+
+
+def get_strong_etag( meta ):
+    etag = meta.get( "etag" )
+    if etag and not etag.startswith( "W/" ):
+        ## weak ETag can not be used in 'If-Range'
+        return etag
+    return None
+
+
+# returns tuple (start, total) from 'Content-Range' header, total is None if unknown
+def parse_content_range( value ):
+    if not value:
+        return None
+    match = re.match( r"bytes\s+(\d+)-(\d+)/(\d+|\*)", value.strip() )
+    if match is None:
+        return None
+    total = match.group(3)
+    total = None if total == "*" else int( total )
+    return ( int( match.group(1) ), total )
+
+
+def parse_int( value ):
+    try:
+        return int( value )
+    except (TypeError, ValueError):
+        return None
+
+
+def remove_file( path ):
+    try:
+        os.remove( path )
+    except FileNotFoundError:
+        pass
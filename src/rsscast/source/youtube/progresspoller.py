@@ -0,0 +1,124 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import time
+import asyncio
+import logging
+from concurrent.futures import Future
+from typing import Callable, Dict, Any
+
+from rsscast.eventloop import EventLoopThread, EVENT_LOOP
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+## maximum value of 'progress' field reported by conversion services
+PROGRESS_MAX = 1000
+
+## factor of interval increase when status did not change
+BACKOFF_FACTOR = 1.5
+
+
+class ProgressPoller():
+    """Polls progress of many web conversions in event loop shared with downloads.
+
+    Waiting for next poll does not occupy any thread. Status request has to be
+    nonblocking - 'fetch_status' is called in event loop and returns future of
+    response (e.g. request started on 'curlengine').
+    """
+
+    def __init__(self, loopThread: EventLoopThread = None):
+        if loopThread is None:
+            loopThread = EVENT_LOOP
+        self._loopThread = loopThread
+
+    def poll(self, fetch_status: Callable[[], Future], base_interval=3.0, stall_timeout=60.0, name="") -> Future:
+        """Start polling from any thread. Returns future of result of 'wait()'."""
+        coroutine = self.wait( fetch_status, base_interval, stall_timeout, name )
+        return self._loopThread.submit( coroutine )
+
+    async def wait(self, fetch_status: Callable[[], Future], base_interval=3.0, stall_timeout=60.0,
+                   name="") -> Dict[str, Any]:
+        """Poll status until conversion finishes. Awaited directly by coroutines running in poller's loop.
+
+        Returns final response (with 'success' equal 1) or None if status did not
+        change for 'stall_timeout' seconds. Unhandled response is raised as 'ValueError'.
+        """
+        interval = base_interval
+        recent_data = None
+        recent_progress = None
+        last_change = time.monotonic()
+
+        while True:
+            await asyncio.sleep( interval )
+
+            try:
+                response_data = await asyncio.wrap_future( fetch_status() )
+            except Exception:           # pylint: disable=broad-except
+                _LOGGER.exception( "%s: unable to get conversion progress", name )
+                response_data = recent_data
+
+            now = time.monotonic()
+            if response_data == recent_data:
+                # no change
+                if now - last_change >= stall_timeout:
+                    return None
+                interval = min( interval * BACKOFF_FACTOR, base_interval * 4 )
+                continue
+
+            status = response_data.get( "success" )
+            if status == 1:
+                return response_data
+            if status != 0:
+                raise ValueError( f"unhandled response: {response_data}" )
+
+            # in progress
+            _LOGGER.debug( "%s: received progress: %s", name, response_data )
+            progress = get_progress( response_data )
+            interval = next_interval( base_interval, recent_progress, progress, now - last_change )
+            recent_data = response_data
+            recent_progress = progress
+            last_change = now
+
+
+def get_progress( response_data ):
+    progress = response_data.get( "progress" )
+    if isinstance( progress, (int, float) ):
+        return progress
+    return None
+
+
+def next_interval( base_interval, prev_progress, progress, elapsed ):
+    """Estimate time of next poll based on progress rate (half of remaining time)."""
+    if prev_progress is None or progress is None or elapsed <= 0:
+        return base_interval
+    rate = ( progress - prev_progress ) / elapsed
+    if rate <= 0:
+        return base_interval
+    remaining = ( PROGRESS_MAX - progress ) / rate
+    return min( max( remaining / 2, base_interval / 2 ), base_interval * 4 )
+
+
+## process-wide poller shared by web converters
+PROGRESS_POLLER = ProgressPoller()
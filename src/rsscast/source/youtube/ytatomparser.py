@@ -0,0 +1,132 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import io
+import logging
+from typing import Dict, Any
+from xml.etree import ElementTree
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+ATOM_NS  = "{http://www.w3.org/2005/Atom}"
+MEDIA_NS = "{http://search.yahoo.com/mrss/}"
+YT_NS    = "{http://www.youtube.com/xml/schemas/2015}"
+
+
+def parse_yt_atom( feedContent ) -> Dict[str, Any]:
+    """Parse YouTube Atom feed ('videos.xml') using streaming parser.
+
+    Returns dict in form expected by 'RSSChannel.parseData()' or None if content
+    is not YouTube feed (or is malformed).
+    """
+    if isinstance( feedContent, str ):
+        feedContent = feedContent.encode( "utf-8" )
+
+    feed_dict: Dict[str, Any] = {}
+    entries = []
+    is_youtube = False
+    tags_stack = []
+
+    try:
+        for event, elem in ElementTree.iterparse( io.BytesIO( feedContent ), events=("start", "end") ):
+            if event == "start":
+                if not tags_stack and elem.tag != f"{ATOM_NS}feed":
+                    ## not Atom feed
+                    return None
+                tags_stack.append( elem.tag )
+                continue
+
+            tags_stack.pop()
+            if len( tags_stack ) != 1:
+                ## handle only direct children of 'feed'
+                continue
+
+            tag = elem.tag
+            if tag == f"{ATOM_NS}entry":
+                entry_dict = parse_entry( elem )
+                if entry_dict is not None:
+                    entries.append( entry_dict )
+                ## free memory of processed entry
+                elem.clear()
+            elif tag == f"{ATOM_NS}title":
+                feed_dict["title"] = get_text( elem )
+            elif tag == f"{ATOM_NS}published":
+                feed_dict["published"] = get_text( elem )
+            elif tag == f"{ATOM_NS}author":
+                uri = elem.findtext( f"{ATOM_NS}uri" )
+                if uri:
+                    feed_dict["href"] = uri.strip()
+            elif tag in (f"{YT_NS}channelId", f"{YT_NS}playlistId"):
+                is_youtube = True
+
+    except ElementTree.ParseError as exc:
+        _LOGGER.debug( "unable to parse YouTube feed: %s", exc )
+        return None
+
+    if not is_youtube:
+        return None
+    if "title" not in feed_dict or "published" not in feed_dict:
+        return None
+
+    return { "feed": feed_dict, "entries": entries }
+
+
+# returns None if entry does not have link nor video id
+def parse_entry( elem ) -> Dict[str, Any]:
+    entry_dict = { "id": elem.findtext( f"{ATOM_NS}id", "" ).strip(),
+                   "title": elem.findtext( f"{ATOM_NS}title", "" ).strip() }
+
+    published = elem.findtext( f"{ATOM_NS}published" )
+    entry_dict["published"] = published.strip() if published else None
+
+    for link in elem.findall( f"{ATOM_NS}link" ):
+        if link.get( "rel", "alternate" ) == "alternate":
+            entry_dict["link"] = link.get( "href" )
+            break
+    if not entry_dict.get( "link" ):
+        video_id = elem.findtext( f"{YT_NS}videoId" )
+        if not video_id:
+            _LOGGER.warning( "skipping feed entry without link: %s", entry_dict["id"] )
+            return None
+        entry_dict["link"] = f"https://www.youtube.com/watch?v={video_id.strip()}"
+
+    group = elem.find( f"{MEDIA_NS}group" )
+    if group is not None:
+        thumbnail = group.find( f"{MEDIA_NS}thumbnail" )
+        if thumbnail is not None:
+            thumb_dict = { key: thumbnail.get( key ) for key in ("url", "width", "height") if thumbnail.get( key ) }
+            entry_dict["media_thumbnail"] = [ thumb_dict ]
+        description = group.findtext( f"{MEDIA_NS}description" )
+        if description is not None:
+            entry_dict["summary"] = description.strip()
+
+    return entry_dict
+
+
+def get_text( elem ):
+    text = elem.text
+    if text is None:
+        return ""
+    return text.strip()
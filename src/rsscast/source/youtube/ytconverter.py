@@ -21,25 +21,33 @@
 # SOFTWARE.
 #
 
+import time
+import asyncio
 import logging
-import random
 
 from rsscast.rss.rsschannel import RSSChannel
+from rsscast.rss.audioformat import get_audio_format
+from rsscast.eventloop import EVENT_LOOP
+from rsscast.downloadqueue import DOWNLOAD_QUEUE, get_converter_name
+from rsscast.jobjournal import JOB_JOURNAL
+from rsscast.source.youtube.converterhealth import CONVERTERS_HEALTH, FAILURE_EXCEPTION, FAILURE_PROCESS, \
+    FAILURE_INVALID
 
 from rsscast.source.youtube.convert_pytube import get_yt_duration as get_yt_duration_pytube
 
 from rsscast.source.youtube.convert_yt_dlp import is_video_available as is_video_available_yt_dlp, VideoAvailableStatus
+from rsscast.source.youtube.convert_yt_dlp import get_video_status as get_video_status_yt_dlp
 from rsscast.source.youtube.convert_yt_dlp import parse_playlist as parse_playlist_yt_dlp
 from rsscast.source.youtube.convert_yt_dlp import reduce_info as reduce_info_yt_dlp
 from rsscast.source.youtube.convert_yt_dlp import convert_info_to_channel as convert_info_to_channel_yt_dlp
 
-from rsscast.source.youtube.convert_ddownr_com import convert_yt as convert_yt_ddownr
+from rsscast.source.youtube.convert_ddownr_com import start_convert_yt as convert_yt_ddownr
 # from rsscast.source.youtube.convert_pytube import convert_yt as convert_yt_pytube
-from rsscast.source.youtube.convert_y2down_cc import convert_yt as convert_yt_y2down
+from rsscast.source.youtube.convert_y2down_cc import start_convert_yt as convert_yt_y2down
 # from rsscast.source.youtube.convert_youtube_dl import convert_yt as convert_yt_youtube_dl
-from rsscast.source.youtube.convert_yt_dlp import convert_yt as convert_yt_yt_dlp
+from rsscast.source.youtube.convert_yt_dlp import start_convert_yt as convert_yt_yt_dlp
 # from rsscast.source.youtube.convert_yt1s_com import convert_yt as convert_yt_yt1s
-from rsscast.source.youtube.ytwebconvert import check_is_mp3
+from rsscast.source.youtube.ytwebconvert import check_is_audio, finish_stage
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -59,6 +67,11 @@ def is_video_available(video_url) -> VideoAvailableStatus:
     return is_video_available_yt_dlp(video_url)
 
 
+# returns tuple: video status and release timestamp (or None)
+def get_video_status(video_url):
+    return get_video_status_yt_dlp(video_url)
+
+
 ## requires "youtube_dl"
 def get_yt_duration( link ):
     return get_yt_duration_pytube( link )
@@ -86,42 +99,81 @@ def reduce_info(info_dict):
 
 
 ## download and convert link to audio file
-def convert_to_audio( link, output, mimicHuman=True ) -> bool:
-    converters_list = list(WEB_CONVERTERS)
-    random.shuffle(converters_list)
+## 'audio_format' - name of format of output file (see 'audioformat.AUDIO_FORMATS')
+def convert_to_audio( link, output, mimicHuman=True, audio_format=None ) -> bool:
+    return EVENT_LOOP.submit( convert_to_audio_async( link, output, mimicHuman, audio_format ) ).result()
 
-    for converter in converters_list:
-        try:
-            succeed = converter( link, output, mimicHuman )
-            if not succeed:
-                _LOGGER.error( f"failed to convert {link} using {converter.__name__} - process failed" )
-                continue
-        except Exception:           # pylint: disable=broad-except
-            _LOGGER.exception("converter %s: unable to get audio from %s", converter.__name__, link)
-            continue
 
-        if not check_is_mp3(output):
-            _LOGGER.error( f"failed to convert {link} - invalid file '{output}'" )
-            continue
+## coroutine variant of 'convert_to_audio' - waiting for converters does not occupy any thread
+async def convert_to_audio_async( link, output, mimicHuman=True, audio_format=None ) -> bool:
+    audio_format = get_audio_format( audio_format )
+    if audio_format.name != "mp3":
+        ## web services provide MP3 only - native audio stream is stored by yt-dlp
+        return await run_converter_async( convert_yt_yt_dlp, link, output, mimicHuman, audio_format.name )
+
+    ## services considered down are skipped, healthy ones are tried first
+    converters_list = CONVERTERS_HEALTH.orderConverters( WEB_CONVERTERS, get_converter_name )
+    remote_job = JOB_JOURNAL.getRemoteJob( output )
+    if remote_job is not None:
+        ## converter started conversion before restart - resume it instead of starting new one
+        converters_list.sort( key=lambda converter: get_converter_name( converter ) != remote_job[0] )
 
-        # succeed
-        return True
+    for converter in converters_list:
+        if await run_converter_async( converter, link, output, mimicHuman ):
+            # succeed
+            return True
 
     ## yt_dlp natively stores audio in MP4 format with causes problems
-    ## additional conversion step takes very long, so use the module
-    ## as last possibility
-    try:
-        succeed = convert_yt_yt_dlp( link, output, mimicHuman )
-        if not succeed:
-            _LOGGER.error( f"failed to convert {link} - process failed" )
-            return False
-    except Exception:           # pylint: disable=broad-except
-        _LOGGER.exception("unable to get audio from %s", link)
-        return False
-
-    if not check_is_mp3(output):
-        _LOGGER.error( f"failed to convert {link} - invalid file" )
-        return False
-
-    # succeed
-    return True
+    ## additional conversion step (see 'transcodepool') takes very long,
+    ## so use the module as last possibility
+    return await run_converter_async( convert_yt_yt_dlp, link, output, mimicHuman )
+
+
+# run converter and record its health, returns True on success
+# 'audio_format' other than MP3 is passed to converter (handled only by yt-dlp)
+def run_converter( converter, link, output, mimicHuman=True, audio_format=None ) -> bool:
+    return EVENT_LOOP.submit( run_converter_async( converter, link, output, mimicHuman, audio_format ) ).result()
+
+
+# converter runs in two stages: first stage (e.g. submitting remote conversion or downloading
+# audio) holds converter's slot and returns remaining stage (e.g. waiting for remote conversion
+# or transcoding) as future or awaitable - the stage is awaited after the slot is released
+# converter is either coroutine function or blocking function executed by download worker
+async def run_converter_async( converter, link, output, mimicHuman=True, audio_format=None ) -> bool:
+    converter_name = get_converter_name(converter)
+    start_time = time.time()
+    failure_kind = None
+    stage = False
+    async with DOWNLOAD_QUEUE.converterSlotAsync( converter_name ):
+        try:
+            stage = await start_converter( converter, link, output, mimicHuman, audio_format )
+        except Exception:           # pylint: disable=broad-except
+            _LOGGER.exception("converter %s: unable to get audio from %s", converter_name, link)
+            failure_kind = FAILURE_EXCEPTION
+
+    if failure_kind is None:
+        try:
+            succeed = await finish_stage( stage )
+            if not succeed:
+                _LOGGER.error( f"failed to convert {link} using {converter_name} - process failed" )
+                failure_kind = FAILURE_PROCESS
+            elif not await DOWNLOAD_QUEUE.runInWorker( check_is_audio, output, audio_format ):
+                _LOGGER.error( f"failed to convert {link} using {converter_name} - invalid file '{output}'" )
+                failure_kind = FAILURE_INVALID
+        except Exception:           # pylint: disable=broad-except
+            _LOGGER.exception("converter %s: unable to get audio from %s", converter_name, link)
+            failure_kind = FAILURE_EXCEPTION
+    duration = time.time() - start_time
+
+    CONVERTERS_HEALTH.record( converter_name, failure_kind is None, duration, failure_kind )
+    return failure_kind is None
+
+
+# run first stage of converter, returns result or remaining stage
+async def start_converter( converter, link, output, mimicHuman=True, audio_format=None ):
+    kwargs = {}
+    if audio_format is not None:
+        kwargs["audio_format"] = audio_format
+    if asyncio.iscoroutinefunction( converter ):
+        return await converter( link, output, mimicHuman, **kwargs )
+    return await DOWNLOAD_QUEUE.runInWorker( converter, link, output, mimicHuman, **kwargs )
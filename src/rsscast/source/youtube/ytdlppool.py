@@ -0,0 +1,154 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any
+
+import yt_dlp
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+## maximum number of idle instances kept for single profile
+DEFAULT_MAX_IDLE = 4
+
+
+class YoutubeDLPool():
+    """Pool of long-lived 'YoutubeDL' instances grouped by option profile.
+
+    Instance is borrowed by single thread at a time. Options passed as 'init_params'
+    are used on construction of instance (eg. 'format' or 'postprocessors'), so
+    they are part of profile key. Options passed as 'run_params' are read by
+    'YoutubeDL' during extraction (eg. 'playlist_items' or 'outtmpl'), so they
+    are set for time of borrow and restored on return.
+    """
+
+    def __init__(self, max_idle=DEFAULT_MAX_IDLE, factory=None):
+        if factory is None:
+            factory = yt_dlp.YoutubeDL
+        self.maxIdle = max_idle
+        self.factory = factory
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        self._idle: Dict[Any, List[Any]] = {}
+        self._lock = threading.Lock()
+        self.created  = 0
+        self.borrowed = 0
+
+    def registerProfile(self, name, params):
+        with self._lock:
+            self._profiles[ name ] = dict( params )
+
+    @contextmanager
+    def borrow(self, profile, init_params=None, run_params=None):
+        key = get_profile_key( profile, init_params )
+        ydl = self._acquire( key, profile, init_params )
+        prev_params = apply_params( ydl, run_params )
+        reusable = False
+        try:
+            yield ydl
+            reusable = True
+        except yt_dlp.utils.DownloadError:
+            ## extraction error does not break instance
+            reusable = True
+            raise
+        finally:
+            restore_params( ydl, prev_params )
+            self._release( key, ydl, reusable )
+
+    def close(self):
+        with self._lock:
+            idle_lists = list( self._idle.values() )
+            self._idle = {}
+        for idle_list in idle_lists:
+            for ydl in idle_list:
+                close_instance( ydl )
+
+    def getStats(self):
+        with self._lock:
+            idle_num = sum( len( idle_list ) for idle_list in self._idle.values() )
+            return { "created": self.created, "borrowed": self.borrowed, "idle": idle_num }
+
+    def _acquire(self, key, profile, init_params):
+        with self._lock:
+            self.borrowed += 1
+            idle_list = self._idle.get( key )
+            if idle_list:
+                return idle_list.pop()
+            params = self._profiles.get( profile )
+            if params is None:
+                raise KeyError( f"unknown YoutubeDL profile: {profile}" )
+            params = dict( params )
+            self.created += 1
+        if init_params:
+            params.update( init_params )
+        _LOGGER.debug( "creating YoutubeDL instance for profile %s", profile )
+        return self.factory( params )
+
+    def _release(self, key, ydl, reusable):
+        if reusable:
+            with self._lock:
+                idle_list = self._idle.setdefault( key, [] )
+                if len( idle_list ) < self.maxIdle:
+                    idle_list.append( ydl )
+                    return
+        close_instance( ydl )
+
+
+def get_profile_key( profile, init_params=None ):
+    if not init_params:
+        return (profile, )
+    return (profile, repr( sorted( init_params.items() ) ) )
+
+
+# set given parameters, returns previous values
+def apply_params( ydl, run_params ):
+    prev_params = {}
+    if not run_params:
+        return prev_params
+    for name, value in run_params.items():
+        prev_params[ name ] = ydl.params.get( name )
+        if name == "outtmpl" and isinstance( value, str ):
+            ## 'YoutubeDL' keeps output templates as dict
+            templates = dict( prev_params[ name ] or {} )
+            templates[ "default" ] = value
+            value = templates
+        ydl.params[ name ] = value
+    return prev_params
+
+
+def restore_params( ydl, prev_params ):
+    for name, value in prev_params.items():
+        if value is None:
+            ydl.params.pop( name, None )
+        else:
+            ydl.params[ name ] = value
+
+
+def close_instance( ydl ):
+    try:
+        ydl.close()
+    except Exception as exc:               # pylint: disable=W0703
+        _LOGGER.warning( "unable to close YoutubeDL instance: %s", exc )
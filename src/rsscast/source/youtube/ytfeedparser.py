@@ -26,23 +26,41 @@ import logging
 
 # import pprint
 
-import requests
-import requests_file
-
 import feedparser
 
+from rsscast.source.httpsession import HTTP_SESSIONS
+from rsscast.source.youtube.ytatomparser import parse_yt_atom
 from rsscast.rss.rsschannel import RSSChannel, get_channel_output_dir
 from rsscast.utils import write_text
+from rsscast.cache import PersistentDict
 
 
 _LOGGER = logging.getLogger(__name__)
 
 
+## returned by 'parse_rss' when feed content did not change since previous read
+NOT_MODIFIED = "NOT_MODIFIED"
+
+## HTTP validators (ETag, Last-Modified) of recently parsed feeds
+VALIDATORS_CACHE = PersistentDict( "feed_validators" )
+
+
 ## ============================================================
 
 
-def parse_rss( feedId, feedUrl, write_content=True ) -> RSSChannel:
-    status, feedContent = read_url( feedUrl )
+def parse_rss( feedId, feedUrl, write_content=True, conditional=False ) -> RSSChannel:
+    """Read and parse RSS.
+
+    If 'conditional' is set, then conditional request is sent and NOT_MODIFIED
+    is returned when content did not change since previous parse.
+    """
+    validators = None
+    if conditional:
+        validators = VALIDATORS_CACHE.get( feedUrl )
+    status, feedContent, responseValidators = read_url( feedUrl, validators )
+    if status == 304:
+        _LOGGER.info( "feed %s: content not modified: %s", feedId, feedUrl )
+        return NOT_MODIFIED
     if status == 404:
         _LOGGER.error("unable to get url content: %s", feedUrl)
         return None
@@ -59,18 +77,25 @@ def parse_rss( feedId, feedUrl, write_content=True ) -> RSSChannel:
         _LOGGER.info( "feed[%s]: unable to parse RSS %s from %s", feedId, sourceRSS, feedUrl )
         return None
     _LOGGER.info( "feed %s: parsing done", feedId )
+    if responseValidators:
+        VALIDATORS_CACHE.set( feedUrl, responseValidators )
+    else:
+        VALIDATORS_CACHE.pop( feedUrl )
     return rssChannel
 
 
 def parse_rss_content(feedContent) -> RSSChannel:
-    parsedDict = feedparser.parse( feedContent )
-    if parsedDict.get('bozo', False):
-        # malformed rss detected, reason :2:101: not well-formed (invalid token)
-        # reason = parsedDict.get('bozo_exception', "<unknown>")
-        # _LOGGER.warning( "malformed rss detected, reason %s", reason )
-        return None
+    ## fast path for YouTube feeds
+    parsedDict = parse_yt_atom( feedContent )
+    if parsedDict is None:
+        ## non-YouTube feed - use general purpose parser
+        parsedDict = feedparser.parse( feedContent )
+        if parsedDict.get('bozo', False):
+            # malformed rss detected, reason :2:101: not well-formed (invalid token)
+            # reason = parsedDict.get('bozo_exception', "<unknown>")
+            # _LOGGER.warning( "malformed rss detected, reason %s", reason )
+            return None
 
-    parsedDict = feedparser.parse( feedContent )
     # pprint.pprint( parsedDict )
     rss_channel = RSSChannel()
     rss_channel.parseData(parsedDict)
@@ -78,11 +103,34 @@ def parse_rss_content(feedContent) -> RSSChannel:
     return rss_channel
 
 
-def read_url( urlpath ):
-    session = requests.Session()
-    session.mount( 'file://', requests_file.FileAdapter() )
-#     session.config['keep_alive'] = False
-#     response = requests.get( urlpath, timeout=5 )
-    response = session.get( urlpath, timeout=5 )
+# returns tuple: (status code, content, validators of response)
+def read_url( urlpath, validators=None ):
+    headers = get_conditional_headers( validators )
+    ## pooled session reuses connections to the same host
+    response = HTTP_SESSIONS.get( urlpath, headers=headers )
 #     response = requests.get( urlpath, timeout=5, hooks={'response': print_url} )
-    return response.status_code, response.text
+    return response.status_code, response.text, get_validators( response.headers )
+
+
+def get_conditional_headers( validators ):
+    headers = {}
+    if not validators:
+        return headers
+    etag = validators.get( "etag" )
+    if etag:
+        headers["If-None-Match"] = etag
+    modified = validators.get( "last_modified" )
+    if modified:
+        headers["If-Modified-Since"] = modified
+    return headers
+
+
+def get_validators( response_headers ):
+    validators = {}
+    etag = response_headers.get( "ETag" )
+    if etag:
+        validators["etag"] = etag
+    modified = response_headers.get( "Last-Modified" )
+    if modified:
+        validators["last_modified"] = modified
+    return validators
@@ -27,20 +27,18 @@ import re
 
 import pycurl
 
+from rsscast.source.curlpool import CURL_POOL
+
 
 _LOGGER = logging.getLogger(__name__)
 
 
 # read name and URL of RSS
 def read_yt_rss( yt_url ):
-    try:
+    with CURL_POOL.session() as session:
         buffer = BytesIO()
-        session = pycurl.Curl()
         session.setopt( pycurl.URL, yt_url )
         session.setopt( pycurl.WRITEDATA, buffer)
-        session.setopt( pycurl.USERAGENT, "curl/7.58.0" )
-        session.setopt( pycurl.FOLLOWLOCATION, True )        ## follow redirects
-        session.setopt( pycurl.CONNECTTIMEOUT, 60 )          ## connection phase timeout
 #             session.setopt( pycurl.TIMEOUT, 60 )                 ## whole request timeout (transfer?)
     #         c.setopt( c.VERBOSE, 1 )
         session.perform()
@@ -49,11 +47,6 @@ def read_yt_rss( yt_url ):
 
         return read_yt_rss_from_source( site_content )
 
-    finally:
-        session.close()
-
-    return None
-
 
 def read_yt_rss_from_source( site_content ):
     # pylint: disable=C0301
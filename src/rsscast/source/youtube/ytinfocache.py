@@ -0,0 +1,197 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import re
+import time
+import copy
+import logging
+from typing import Dict, Any
+
+from rsscast.cache import PersistentDict
+from rsscast.synchronized import synchronized
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+## fields of video info changing in time, value is time to live (in seconds)
+## other fields (like 'title' or 'upload_date') are considered immutable
+VOLATILE_FIELDS = { "live_status": 60 * 60,
+                    "availability": 60 * 60,
+                    "release_timestamp": 60 * 60 }
+
+## live statuses meaning that video is not published yet, so any field can change
+UNSTABLE_LIVE_STATUS = ("is_upcoming", "is_live", "post_live")
+
+## fields of info stored in cache
+CACHED_FIELDS = ( "_type", "id", "title", "description", "upload_date", "timestamp", "release_timestamp",
+                  "duration", "live_status", "availability", "thumbnail", "thumbnails",
+                  "original_url", "webpage_url", "url", "channel", "channel_id", "channel_url", "uploader",
+                  "epoch" )
+
+DEFAULT_MAX_ENTRIES = 4000
+
+## full info of probed video is valid for limited time (media URLs expire)
+PROBED_INFO_TTL = 30 * 60
+
+## full info holds list of formats, so only few entries are kept in memory
+PROBED_MAX_ENTRIES = 8
+
+
+class VideoInfoCache( PersistentDict ):
+    """Persistent cache of yt-dlp video info with least recently used eviction policy."""
+
+    def __init__(self, cacheName="video_info", cachePath=None, max_entries=DEFAULT_MAX_ENTRIES):
+        super().__init__( cacheName, cachePath )
+        self.maxEntries = max_entries
+        self.hits   = 0
+        self.misses = 0
+
+    @synchronized
+    def getInfo(self, videoId, fields=None, now=None) -> Dict[str, Any]:
+        """Return cached info or None if not found or expired.
+
+        'fields' contains names of volatile fields required to be up to date,
+        'None' means all volatile fields.
+        """
+        data = self._getData()
+        entry = data.pop( videoId, None )
+        if entry is None:
+            self.misses += 1
+            return None
+        ## move to end - most recently used
+        data[ videoId ] = entry
+        if is_entry_expired( entry, fields, now ):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return copy.deepcopy( entry["info"] )
+
+    @synchronized
+    def putInfo(self, videoId, info_dict, now=None):
+        if now is None:
+            now = time.time()
+        data = self._getData()
+        data.pop( videoId, None )
+        data[ videoId ] = { "info": reduce_cached_info( info_dict ), "time": now }
+        while len( data ) > self.maxEntries:
+            oldest_key = next( iter( data ) )
+            del data[ oldest_key ]
+        self._changed = True
+
+    @synchronized
+    def getStats(self):
+        return { "hits": self.hits, "misses": self.misses, "entries": self.size() }
+
+    @synchronized
+    def store(self):
+        stats = self.getStats()
+        _LOGGER.info( "video info cache: hits: %s misses: %s entries: %s",
+                      stats["hits"], stats["misses"], stats["entries"] )
+        return super().store()
+
+
+class ProbedInfoStore():
+    """In-memory store of full (not reduced) info of videos probed before download.
+
+    Info extracted during availability check is handed to download step,
+    so the video is not extracted again. Each info can be taken only once.
+    """
+
+    def __init__(self, ttl=PROBED_INFO_TTL, max_entries=PROBED_MAX_ENTRIES):
+        self.ttl        = ttl
+        self.maxEntries = max_entries
+        self.data: Dict[str, Any] = {}
+
+    @synchronized
+    def put(self, videoId, info_dict, now=None):
+        if now is None:
+            now = time.time()
+        self.data.pop( videoId, None )
+        self.data[ videoId ] = { "info": info_dict, "time": now }
+        while len( self.data ) > self.maxEntries:
+            oldest_key = next( iter( self.data ) )
+            del self.data[ oldest_key ]
+
+    @synchronized
+    def take(self, videoId, now=None) -> Dict[str, Any]:
+        """Return and remove info or None if not found or expired."""
+        if videoId is None:
+            return None
+        entry = self.data.pop( videoId, None )
+        if entry is None:
+            return None
+        if now is None:
+            now = time.time()
+        if now - entry["time"] > self.ttl:
+            return None
+        return entry["info"]
+
+    @synchronized
+    def size(self):
+        return len( self.data )
+
+
+def is_entry_expired( entry, fields=None, now=None ) -> bool:
+    if now is None:
+        now = time.time()
+    age = now - entry["time"]
+    info = entry["info"]
+    if info.get( "live_status" ) in UNSTABLE_LIVE_STATUS:
+        ## not published yet - whole info is volatile
+        release_timestamp = info.get( "release_timestamp" )
+        if release_timestamp and entry["time"] < release_timestamp <= now:
+            ## release time passed since info was fetched
+            return True
+        return age > VOLATILE_FIELDS["live_status"]
+    for field, ttl in VOLATILE_FIELDS.items():
+        if fields is not None and field not in fields:
+            continue
+        if age > ttl:
+            return True
+    return False
+
+
+def reduce_cached_info( info_dict ) -> Dict[str, Any]:
+    ret_dict = { key: value for key, value in info_dict.items() if key in CACHED_FIELDS }
+    thumbnails = ret_dict.get( "thumbnails" )
+    if thumbnails:
+        ## only last (the best) thumbnail is used
+        ret_dict["thumbnails"] = thumbnails[-1:]
+    return copy.deepcopy( ret_dict )
+
+
+# returns ID of video or None if URL does not point to single video
+def get_video_id( video_url ):
+    if not video_url:
+        return None
+    match = re.search( r"youtube\.com/watch\?(?:.*&)?v=([\w-]{11})", video_url )
+    if match:
+        return match.group(1)
+    match = re.search( r"youtube\.com/(?:shorts|live)/([\w-]{11})", video_url )
+    if match:
+        return match.group(1)
+    match = re.search( r"youtu\.be/([\w-]{11})", video_url )
+    if match:
+        return match.group(1)
+    return None
@@ -22,42 +22,54 @@
 #
 
 import os
-import tempfile
-from shutil import copyfile
+import asyncio
+import inspect
 import logging
+import hashlib
 from io import BytesIO
+from typing import Dict
+from concurrent.futures import Future
 
 from urllib import request
+from urllib.error import HTTPError
 from urllib.parse import urlencode
 
 import ssl
 import pycurl
 import filetype
 
+from rsscast.bandwidth import BANDWIDTH
+from rsscast.source.curlpool import CURL_POOL
+from rsscast.rss.mp3info import read_mp3_info
+from rsscast.source.curlengine import CURL_ENGINE
+from rsscast.source.youtube.partdownload import PartialDownload
+
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def get_curl_session(user_agent=None):
-    session = pycurl.Curl()
-    if user_agent is None:
-        user_agent = "curl/7.58.0"
-    session.setopt( pycurl.USERAGENT, user_agent )
-    session.setopt( pycurl.FOLLOWLOCATION, True )        ## follow redirects
-    session.setopt( pycurl.CONNECTTIMEOUT, 60 )          ## connection phase timeout
-#         session.setopt( pycurl.TIMEOUT, 60 )                 ## whole request timeout (transfer?)
-#         c.setopt( c.VERBOSE, 1 )
-    session.setopt(pycurl.COOKIEJAR, '/tmp/cookie.txt')          ## save cookies to a file
-    session.setopt(pycurl.COOKIEFILE, '/tmp/cookie.txt')         ## load cookies from a file
-    return session
+## size of chunk kept in memory during streaming of content to file
+CHUNK_SIZE = 128 * 1024
+
+## number of first bytes of content passed to validator
+HEAD_SIZE = 1024
+
+## changed "user-agent" fixes blocking by server
+MEDIA_USER_AGENT = "Mozilla/5.0"
 
 
 ## perform 'GET' request on curl session
 def curl_get( session, targetUrl, params_dict=None, header_list=None ):
+    return curl_get_async( session, targetUrl, params_dict, header_list ).result()
+
+
+## start 'GET' request on curl engine (see 'curlengine')
+## 'parse' - optional callable receiving response buffer, its result is future's result
+## returns future of response buffer
+def curl_get_async( session, targetUrl, params_dict=None, header_list=None, parse=None ) -> Future:
 #     _LOGGER.info( "accessing url: %s params: %s", targetUrl, dataDict )
 
     dataBuffer = BytesIO()
-#     try:
 
     session.setopt( pycurl.POST, 0)
     if params_dict:
@@ -69,21 +81,19 @@ def curl_get( session, targetUrl, params_dict=None, header_list=None ):
     if header_list:
         session.setopt(pycurl.HTTPHEADER, header_list)
 
-    session.perform()
-#         except Exception as err:
-#             _LOGGER.exception("Unexpected exception")
-#             return ""
-#     finally:
-#         session.close()
-    return dataBuffer
+    return CURL_ENGINE.perform( session, response_callback( dataBuffer, parse ) )
 
 
 ## perform 'POST' request on curl session
 def curl_post( session, targetUrl, dataDict, header_list=None, verbose=False ):
+    return curl_post_async( session, targetUrl, dataDict, header_list, verbose ).result()
+
+
+## start 'POST' request on curl engine (see 'curl_get_async')
+def curl_post_async( session, targetUrl, dataDict, header_list=None, verbose=False, parse=None ) -> Future:
 #     _LOGGER.info( "accessing url: %s params: %s", targetUrl, dataDict )
 
     dataBuffer = BytesIO()
-#     try:
     session.setopt( pycurl.URL, targetUrl )
     session.setopt( pycurl.POST, 1)
     session.setopt( pycurl.POSTFIELDS, urlencode( dataDict ))
@@ -97,13 +107,18 @@ def curl_post( session, targetUrl, dataDict, header_list=None, verbose=False ):
     else:
         session.setopt(pycurl.VERBOSE, 0)
 
-    session.perform()
-#         except Exception as err:
-#             _LOGGER.exception("Unexpected exception")
-#             return ""
-#     finally:
-#         session.close()
-    return dataBuffer
+    return CURL_ENGINE.perform( session, response_callback( dataBuffer, parse ) )
+
+
+# create transfer callback returning response buffer (or parsed response)
+def response_callback( dataBuffer, parse=None ):
+    def finish_request( _session, error ):
+        if error is not None:
+            raise error
+        if parse is None:
+            return dataBuffer
+        return parse( dataBuffer )
+    return finish_request
 
 
 def curl_download( session, sourceUrl, outputFile, repeatsOnFail=0 ):
@@ -119,20 +134,145 @@ def curl_download( session, sourceUrl, outputFile, repeatsOnFail=0 ):
     curl_download_raw( session, sourceUrl, outputFile )
 
 
-def curl_download_raw( session, sourceUrl, outputFile ):
-    fd, path = tempfile.mkstemp()
-    try:
-        session.setopt( pycurl.URL, sourceUrl )
-        session.setopt( pycurl.POST, 0)
-        with os.fdopen(fd, 'wb') as tmp:
-            session.setopt( session.WRITEFUNCTION, tmp.write )
-            session.perform()
-        copyfile( path, outputFile )
-    finally:
-        _LOGGER.info( "removing temporary file: %s", path )
-        os.remove( path )
+# download is resumed if previous download of the file was interrupted
+def curl_download_raw( session, sourceUrl, outputFile, restart_on_range_error=True ):
+    curl_download_async( session, sourceUrl, outputFile, restart_on_range_error ).result()
+
+
+# start download on curl engine, returns future of download
+# content is written on engine's thread - when bandwidth limit is exceeded, then only
+# this transfer is paused (engine is not blocked)
+# data is accounted to 'meter' (by default to bandwidth job of caller)
+# 'timeout' - abort download if no data was received for given number of seconds
+# 'write_empty' - if False, then empty content is discarded
+# 'validate_head' - callable receiving first bytes of content, raises 'InvalidContentError'
+#                   if content is not expected (e.g. HTML page instead of media)
+def curl_download_async( session, sourceUrl, outputFile, restart_on_range_error=True, meter=None,
+                         timeout=None, write_empty=True, validate_head=None ) -> Future:
+    if meter is None:
+        meter = BANDWIDTH.currentJob()
+    download = PartialDownload( outputFile, sourceUrl )
+    response_headers = CurlResponseHeaders()
+    part_file = None
+    head = b""
+    head_validator = validate_head
+    invalid_content = []
+
+    def check_head( data ):
+        nonlocal head, head_validator
+        head += data[ :HEAD_SIZE - len(head) ]
+        if len( head ) < HEAD_SIZE and data:
+            return True
+        try:
+            head_validator( head )
+        except InvalidContentError as exc:
+            invalid_content.append( exc )
+            return False
+        head_validator = None
+        return True
+
+    def write_data( data ):
+        nonlocal part_file, head_validator
+        if response_headers.status >= 400:
+            ## do not store error page
+            return None
+        if part_file is None:
+            part_file = download.open( response_headers.status, response_headers.values )
+            if download.offset > 0:
+                ## resumed download - beginning of content was validated before
+                head_validator = None
+        if head_validator is not None and not check_head( data ):
+            ## abort transfer
+            return 0
+        part_file.write( data )
+        wait_time = BANDWIDTH.reserve( len( data ), meter )
+        if wait_time > 0.0:
+            CURL_ENGINE.pauseFor( session, wait_time )
+        return None
+
+    def finish_download( _session, error ):
+        if part_file is not None:
+            part_file.close()
+        session.setopt( pycurl.HTTPHEADER, [] )
+        session.unsetopt( pycurl.HEADERFUNCTION )
+        if timeout is not None:
+            session.setopt( pycurl.LOW_SPEED_TIME, 0 )
+        if invalid_content:
+            download.discard()
+            raise invalid_content[0]
+        if error is not None:
+            # keep incomplete file - download will be resumed
+            raise error
+
+        status = response_headers.status
+        if status == 416 and download.offset > 0 and restart_on_range_error:
+            _LOGGER.info( "invalid partial download of %s - restarting", sourceUrl )
+            download.discard()
+            return curl_download_async( session, sourceUrl, outputFile, restart_on_range_error=False, meter=meter,
+                                        timeout=timeout, write_empty=write_empty, validate_head=validate_head )
+        if status >= 400:
+            raise IOError( f"unable to download {sourceUrl}: HTTP status {status}" )
+        if part_file is None:
+            ## empty content
+            download.open( status, response_headers.values ).close()
+        if head_validator is not None and not check_head( b"" ):
+            ## content shorter than head
+            download.discard()
+            raise invalid_content[0]
+        if not write_empty and os.path.getsize( download.partPath ) < 1:
+            _LOGGER.warning( "received empty content from %s", sourceUrl )
+            download.discard()
+            return None
+        download.finish()
+        return None
+
+    request_headers = [ f"{key}: {value}" for key, value in download.getRequestHeaders().items() ]
+    session.setopt( pycurl.URL, sourceUrl )
+    session.setopt( pycurl.POST, 0)
+    session.setopt( pycurl.HTTPHEADER, request_headers )
+    session.setopt( pycurl.HEADERFUNCTION, response_headers.parse )
+    session.setopt( pycurl.WRITEFUNCTION, write_data )
+    if timeout is not None:
+        session.setopt( pycurl.LOW_SPEED_LIMIT, 1 )
+        session.setopt( pycurl.LOW_SPEED_TIME, int( timeout ) )
+    return CURL_ENGINE.perform( session, finish_download )
 
 
+# disable verification of SSL on curl session (the same as in 'urldownload')
+def set_insecure_ssl( session ):
+    ##
+    ## Under Ubuntu 20 SSL configuration has changed causing problems with SSL keys.
+    ## For more details see: https://forums.raspberrypi.com/viewtopic.php?t=255167
+    ##
+    session.setopt( pycurl.SSL_CIPHER_LIST, 'HIGH:!DH:!aNULL' )
+    session.setopt( pycurl.SSL_VERIFYPEER, 0 )
+    session.setopt( pycurl.SSL_VERIFYHOST, 0 )
+
+
+class CurlResponseHeaders():
+    """Collects status and headers of last response (after redirects)."""
+
+    def __init__(self):
+        self.status = 0
+        self.values: Dict[str, str] = {}
+
+    def parse( self, header_line ):
+        line = header_line.decode( "iso-8859-1" ).strip()
+        if line.startswith( "HTTP/" ):
+            ## new response (e.g. after redirect)
+            self.values = {}
+            status_items = line.split()
+            if len( status_items ) > 1 and status_items[1].isdigit():
+                self.status = int( status_items[1] )
+            return
+        if ":" not in line:
+            return
+        name, value = line.split( ":", 1 )
+        self.values[ name.strip().lower() ] = value.strip()
+
+
+# read whole URL content into memory - intended for small responses (e.g. API calls)
+# use 'urldownload' for media payloads
 def urlretrieve( url, outputPath=None, timeout=30, write_empty=True ):
     ##
     ## Under Ubuntu 20 SSL configuration has changed causing problems with SSL keys.
@@ -149,6 +289,7 @@ def urlretrieve( url, outputPath=None, timeout=30, write_empty=True ):
 
     #     result = request.urlopen( url, context=ctx_no_secure )
         content_data = result.read()
+        BANDWIDTH.throttle( len( content_data ) )
 
         if outputPath:
             if len(content_data) > 0 or write_empty:
@@ -171,9 +312,18 @@ def urlretrieve( url, outputPath=None, timeout=30, write_empty=True ):
 
 
 # download URL content directly to file
-def urldownload( url, outputPath=None, timeout=45):
+# content is streamed in chunks of bounded size to '.part' file and moved to 'outputPath' when complete
+# download is resumed if previous download of the file was interrupted
+#
+# 'hash_name' - name of hashlib algorithm to calculate digest of content while streaming
+# 'validate_head' - callable receiving first bytes of content, should raise InvalidContentError
+#                   if content is not expected (e.g. HTML page instead of media)
+#
+# returns hex digest of content if 'hash_name' is given, otherwise None
+def urldownload( url, outputPath=None, timeout=45, restart_on_range_error=True,
+                 write_empty=True, hash_name=None, validate_head=None ):
     if not outputPath:
-        return
+        return None
 
     ##
     ## Under Ubuntu 20 SSL configuration has changed causing problems with SSL keys.
@@ -184,32 +334,98 @@ def urldownload( url, outputPath=None, timeout=45):
     ctx_no_secure.check_hostname = False
     ctx_no_secure.verify_mode = ssl.CERT_NONE
 
+    download = PartialDownload( outputPath, url )
+
     ## changed "user-agent" fixes blocking by server
-    req = request.Request( url, headers={'User-Agent': 'Mozilla/5.0'} )
-    with request.urlopen( req, timeout=timeout, context=ctx_no_secure ) as result:
-        file_created = False
+    headers = {'User-Agent': 'Mozilla/5.0'}
+    headers.update( download.getRequestHeaders() )
+    req = request.Request( url, headers=headers )
+    try:
+        result = request.urlopen( req, timeout=timeout, context=ctx_no_secure )
+    except HTTPError as exc:
+        if exc.code != 416 or download.offset < 1 or not restart_on_range_error:
+            raise
+        _LOGGER.info( "invalid partial download of %s - restarting", url )
+        download.discard()
+        return urldownload( url, outputPath, timeout, restart_on_range_error=False,
+                            write_empty=write_empty, hash_name=hash_name, validate_head=validate_head )
+
+    with result:
+        response_headers = { key.lower(): value for key, value in result.headers.items() }
         try:
-            with open(outputPath, 'wb') as of:
-                file_created = True
-                CHUNK = 128 * 1024
-                iteration = 0
-                while True:
-                    chunk = result.read(CHUNK)
-                    if not chunk:
-                        break
-                    of.write(chunk)
-                    iteration += 1
-                    if iteration % 128 == 0:
-                        _LOGGER.info( "in progress, already downloaded: %s MB", CHUNK * iteration / 1048576 )
+            with download.open( result.status, response_headers ) as of:
+                hasher = None
+                if hash_name:
+                    hasher = hashlib.new( hash_name )
+                    ## resumed download - include already received data
+                    hash_file( hasher, download.partPath, download.offset )
+                stream_content( result, of, hasher, validate_head if download.offset < 1 else None )
+            if os.path.getsize( download.partPath ) < 1 and not write_empty:
+                _LOGGER.warning( "received empty content from %s", url )
+                download.discard()
+                return None
+            download.finish()
+            if hasher is None:
+                return None
+            return hasher.hexdigest()
+        except InvalidContentError:
+            download.discard()
+            raise
         except BaseException as exc:
-            _LOGGER.error( "unable to write file: %s", exc )
-            if file_created:
-                # exception during storage - remove incomplete file
-                _LOGGER.info( "removing incomplete file: %s", outputPath )
-                os.remove(outputPath)
+            # keep incomplete file - download will be resumed
+            _LOGGER.error( "unable to download file: %s, partial data kept in %s", exc, download.partPath )
             raise
 
 
+class InvalidContentError( IOError ):
+    """Raised when downloaded content is not the expected one."""
+
+
+## copy content from 'source' to 'output' file keeping at most one chunk in memory
+def stream_content( source, output, hasher=None, validate_head=None ):
+    head = b""
+    iteration = 0
+    while True:
+        chunk = source.read( CHUNK_SIZE )
+        if validate_head is not None:
+            head += chunk[ :HEAD_SIZE - len(head) ]
+            if len( head ) >= HEAD_SIZE or not chunk:
+                validate_head( head )
+                validate_head = None
+        if not chunk:
+            break
+        output.write( chunk )
+        if hasher is not None:
+            hasher.update( chunk )
+        BANDWIDTH.throttle( len( chunk ) )
+        iteration += 1
+        if iteration % 128 == 0:
+            _LOGGER.info( "in progress, already downloaded: %s MB", CHUNK_SIZE * iteration / 1048576 )
+
+
+def hash_file( hasher, file_path, size ):
+    if size < 1:
+        return
+    with open( file_path, "rb" ) as in_file:
+        while size > 0:
+            chunk = in_file.read( min( CHUNK_SIZE, size ) )
+            if not chunk:
+                break
+            hasher.update( chunk )
+            size -= len( chunk )
+
+
+## validator of media content for 'urldownload'
+def validate_media_head( head ):
+    if not head:
+        ## empty content is handled by 'write_empty'
+        return
+    kind = filetype.guess( head )
+    if kind is None or kind.mime.split( "/" )[0] not in ( "audio", "video" ):
+        ## server respond with HTML page instead of audio file
+        raise InvalidContentError( f"received content is not a media: {head[:64]!r}" )
+
+
 # def simple_download( sourceUrl, outputFile ):
 # #     urllib.request.urlretrieve( sourceUrl, outputFile )
 #
@@ -218,21 +434,72 @@ def urldownload( url, outputPath=None, timeout=45):
 #         output.write( r.content )
 
 
-def check_is_mp3(output_path) -> bool:
+# check if file is valid audio file of given format (None means MP3)
+def check_is_audio(output_path, audio_format=None) -> bool:
+    if audio_format is None or audio_format == "mp3":
+        return check_is_mp3( output_path )
+
     if os.path.isfile( output_path ) is False:
         _LOGGER.error( f"file is not a file '{output_path}'" )
         return False
 
     kind = filetype.guess( output_path )
-    if kind is None:
-        ## server respond with HTML page instead of audio file
-        _LOGGER.error( f"file seems to be a HTML '{output_path}'" )
+    if kind is None or kind.mime.split( "/" )[0] not in ( "audio", "video" ):
+        _LOGGER.error( f"file is not {audio_format} '{output_path}'" )
         os.remove( output_path )
         return False
 
-    if kind.extension != "mp3":
-        _LOGGER.error( f"file is not mp3'{output_path}'" )
+    return True
+
+
+def check_is_mp3(output_path) -> bool:
+    if os.path.isfile( output_path ) is False:
+        _LOGGER.error( f"file is not a file '{output_path}'" )
+        return False
+
+    ## scan frame headers instead of guessing type by magic bytes
+    info = read_mp3_info( output_path )
+    if info is None:
+        ## e.g. server respond with HTML page instead of audio file
+        _LOGGER.error( f"file is not mp3 '{output_path}'" )
         os.remove( output_path )
         return False
 
     return True
+
+
+## ===================================================================
+
+
+# await remaining stage of converter (see 'ytconverter.run_converter_async')
+# 'stage' is final result, future or awaitable returning result
+async def finish_stage( stage ) -> bool:
+    if isinstance( stage, Future ):
+        return await asyncio.wrap_future( stage )
+    if inspect.isawaitable( stage ):
+        return await stage
+    return stage
+
+
+# run both stages of converter
+async def run_stages( start_coroutine ) -> bool:
+    stage = await start_coroutine
+    return await finish_stage( stage )
+
+
+# download media converted by web service, returns True on success
+# download is driven by curl engine - no thread waits for data
+async def download_converted( download_url, output ) -> bool:
+    _LOGGER.info( f"downloading content from {download_url} to {output}" )
+    try:
+        with CURL_POOL.session( MEDIA_USER_AGENT ) as session:
+            set_insecure_ssl( session )
+            download_future = curl_download_async( session, download_url, output, timeout=90, write_empty=False,
+                                                   validate_head=validate_media_head )
+            await asyncio.wrap_future( download_future )
+    except (IOError, pycurl.error):
+        _LOGGER.exception("unable to download content from %s", download_url)
+        return False
+
+    _LOGGER.info("downloading completed")
+    return True
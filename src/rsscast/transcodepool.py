@@ -0,0 +1,157 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import os
+import logging
+import subprocess
+from typing import List
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from rsscast import finalize
+from rsscast.synchronized import synchronized
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+## number of concurrent transcoding processes
+DEFAULT_TRANSCODE_JOBS = 2
+
+## niceness of transcoding process (lower priority than downloads and RSS server)
+DEFAULT_TRANSCODE_NICE = 10
+
+## maximum time of single transcoding (in seconds)
+TRANSCODE_TIMEOUT = 60 * 60
+
+TMP_SUFFIX = ".transcode"
+
+## 'ffmpeg' output options of supported formats, Opus stream is only remuxed to Ogg container
+OUTPUT_OPTIONS = { "mp3": [ "-codec:a", "libmp3lame", "-b:a", "{bitrate}", "-f", "mp3" ],
+                   "opus": [ "-codec:a", "copy", "-f", "opus" ] }
+
+
+class TranscodeError( RuntimeError ):
+    """Raised when transcoding process failed."""
+
+
+class TranscodePool():
+    """Pool of workers transcoding downloaded audio (by default to MP3) using 'ffmpeg'.
+
+    Each worker runs single 'ffmpeg' process with given niceness and CPU
+    affinity, so encoding does not starve network downloads.
+    """
+
+    def __init__(self, jobs=DEFAULT_TRANSCODE_JOBS, nice=DEFAULT_TRANSCODE_NICE, cpus: List[int] = None):
+        self.jobs = jobs
+        self.nice = nice
+        self.cpus = cpus
+        self.ffmpeg = "ffmpeg"
+        self._executor: ThreadPoolExecutor = None
+
+    @synchronized
+    def configure(self, jobs=None, nice=None, cpus: List[int] = None):
+        """Set limits. Change of number of jobs applies to executor created after shutdown."""
+        if jobs is not None:
+            self.jobs = max( jobs, 1 )
+        if nice is not None:
+            self.nice = nice
+        if cpus is not None:
+            self.cpus = list( cpus ) if cpus else None
+
+    def submit(self, input_path, output_path, bitrate="128k", audio_format="mp3") -> Future:
+        """Transcode audio file. Output file appears only when transcoding succeeds."""
+        executor = self._getExecutor()
+        return executor.submit( self.transcode, input_path, output_path, bitrate, audio_format )
+
+    def transcode(self, input_path, output_path, bitrate="128k", audio_format="mp3"):
+        tmp_path = output_path + TMP_SUFFIX
+        output_options = [ option.format( bitrate=bitrate ) for option in OUTPUT_OPTIONS[ audio_format ] ]
+        command = [ self.ffmpeg, "-hide_banner", "-loglevel", "error", "-nostdin", "-y",
+                    "-i", input_path, "-vn" ] + output_options + [ tmp_path ]
+        _LOGGER.info( "transcoding %s to %s", input_path, output_path )
+        try:
+            with subprocess.Popen( command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE ) as process:
+                self._setPriority( process.pid )
+                try:
+                    _, error_output = process.communicate( timeout=TRANSCODE_TIMEOUT )
+                except subprocess.TimeoutExpired as exc:
+                    process.kill()
+                    process.communicate()
+                    raise TranscodeError( f"transcoding of {input_path} timed out" ) from exc
+            if process.returncode != 0:
+                message = error_output.decode( "utf-8", errors="replace" ).strip()
+                raise TranscodeError( f"transcoding of {input_path} failed: {message}" )
+            finalize.commit( tmp_path, output_path )
+        finally:
+            if os.path.exists( tmp_path ):
+                os.remove( tmp_path )
+
+    @synchronized
+    def shutdown(self):
+        if self._executor is None:
+            return
+        self._executor.shutdown( wait=True )
+        self._executor = None
+
+    ## set priority right after start - 'preexec_fn' is not safe in multithreaded program
+    def _setPriority(self, pid):
+        try:
+            if self.nice:
+                os.setpriority( os.PRIO_PROCESS, pid, self.nice )
+            if self.cpus:
+                os.sched_setaffinity( pid, self.cpus )
+        except (OSError, AttributeError) as exc:
+            ## e.g. process already finished or platform not supported
+            _LOGGER.warning( "unable to set priority of transcoding process: %s", exc )
+
+    @synchronized
+    def _getExecutor(self):
+        if self._executor is None:
+            _LOGGER.info( "starting transcode pool with %s jobs", self.jobs )
+            self._executor = ThreadPoolExecutor( max_workers=self.jobs, thread_name_prefix="Transcode" )
+        return self._executor
+
+
+## process-wide pool of transcoding workers
+TRANSCODE_POOL = TranscodePool()
+
+
+def configure_transcoding( jobs=None, nice=None, cpus: List[int] = None ):
+    TRANSCODE_POOL.configure( jobs, nice, cpus )
+
+
+# parse list of CPUs in format '0,2-3'
+def parse_cpu_list( cpus_text ) -> List[int]:
+    if not cpus_text:
+        return []
+    ret_list = []
+    for item in cpus_text.split( "," ):
+        item = item.strip()
+        if not item:
+            continue
+        if "-" in item:
+            first, last = item.split( "-", 1 )
+            ret_list.extend( range( int( first ), int( last ) + 1 ) )
+        else:
+            ret_list.append( int( item ) )
+    return ret_list
@@ -0,0 +1,97 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import unittest
+
+from rsscast.rss.rsschannel import RSSItem
+from rsscast.rss import availability
+from rsscast.rss.availability import is_check_due, update_item_status
+
+
+class AvailabilityTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        pass
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        pass
+
+    def test_new_item(self):
+        item = RSSItem( itemId="xxx1" )
+        self.assertTrue( is_check_due( item, now=0 ) )
+
+    def test_ok(self):
+        item = RSSItem( itemId="xxx1" )
+        self.assertTrue( update_item_status( item, "INVALID", now=0 ) )
+        self.assertTrue( update_item_status( item, "OK", now=0 ) )
+        self.assertEqual( item.availFailures, 0 )
+        self.assertTrue( is_check_due( item, now=0 ) )
+
+    def test_upcoming_release(self):
+        item = RSSItem( itemId="xxx1" )
+        self.assertTrue( update_item_status( item, "UPCOMING", release_timestamp=5000, now=1000 ) )
+        self.assertFalse( is_check_due( item, now=4999 ) )
+        self.assertTrue( is_check_due( item, now=5000 ) )
+
+    def test_upcoming_backoff(self):
+        item = RSSItem( itemId="xxx1" )
+        base = availability.UPCOMING_BASE_DELAY
+        update_item_status( item, "UPCOMING", now=0 )
+        self.assertEqual( item.availNextCheck, base )
+        update_item_status( item, "UPCOMING", now=0 )
+        self.assertEqual( item.availNextCheck, base * 2 )
+        for _ in range(20):
+            self.assertTrue( update_item_status( item, "UPCOMING", now=0 ) )
+        self.assertEqual( item.availNextCheck, availability.UPCOMING_MAX_DELAY )
+
+    def test_invalid_backoff(self):
+        item = RSSItem( itemId="xxx1" )
+        now = 0
+        for _ in range( availability.INVALID_MAX_FAILURES - 1 ):
+            self.assertTrue( update_item_status( item, "INVALID", now=now ) )
+            self.assertFalse( is_check_due( item, now=now ) )
+            delay = item.availNextCheck - now
+            now = item.availNextCheck
+        self.assertEqual( delay, availability.INVALID_BASE_DELAY * 2 ** ( availability.INVALID_MAX_FAILURES - 2 ) )
+        ## limit reached - disable item
+        self.assertFalse( update_item_status( item, "INVALID", now=now ) )
+
+    def test_status_change(self):
+        item = RSSItem( itemId="xxx1" )
+        update_item_status( item, "INVALID", now=0 )
+        update_item_status( item, "INVALID", now=0 )
+        update_item_status( item, "UPCOMING", now=0 )
+        self.assertEqual( item.availFailures, 1 )
+        self.assertEqual( item.availNextCheck, availability.UPCOMING_BASE_DELAY )
+
+    def test_convert_state(self):
+        item = RSSItem( itemId="xxx1" )
+        state = dict( item.__dict__ )
+        del state["availStatus"]
+        del state["availNextCheck"]
+        del state["availFailures"]
+        loaded = RSSItem()
+        loaded._convertstate_( state, 3 )          # pylint: disable=W0212
+        self.assertEqual( loaded.availStatus, None )
+        self.assertTrue( is_check_due( loaded ) )
@@ -0,0 +1,122 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import os
+import struct
+import unittest
+import tempfile
+
+from rsscast.rss.mp3info import read_mp3_info, parse_mp3_data, format_duration
+from rsscast.rss.rsschannel import RSSItem
+
+
+## MPEG 1 layer III, 128 kbps, 44100 Hz, stereo
+FRAME_HEADER_128 = b"\xff\xfb\x90\x00"
+FRAME_LENGTH_128 = 417
+## MPEG 1 layer III, 64 kbps, 44100 Hz, stereo
+FRAME_HEADER_64 = b"\xff\xfb\x50\x00"
+FRAME_LENGTH_64 = 208
+
+
+def create_frame( header, length, payload=b"" ):
+    data = header + bytes( 32 ) + payload
+    return data + bytes( length - len( data ) )
+
+
+def create_id3( size ):
+    size_bytes = bytes( [ ( size >> shift ) & 0x7F for shift in ( 21, 14, 7, 0 ) ] )
+    return b"ID3\x03\x00\x00" + size_bytes + bytes( size )
+
+
+class MP3InfoTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.tmpDir = tempfile.TemporaryDirectory()         # pylint: disable=R1732
+        self.mp3Path = os.path.join( self.tmpDir.name, "audio.mp3" )
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        self.tmpDir.cleanup()
+
+    def write_file(self, content):
+        with open( self.mp3Path, "wb" ) as out_file:
+            out_file.write( content )
+
+    def test_cbr(self):
+        ## 1000 frames of 1152 samples: 26.12 seconds
+        frames = create_frame( FRAME_HEADER_128, FRAME_LENGTH_128 ) * 1000
+        self.write_file( create_id3( 1000 ) + frames + b"TAG" + bytes( 125 ) )
+        info = read_mp3_info( self.mp3Path )
+        self.assertEqual( info.duration, 26 )
+        self.assertEqual( info.bitrate, 128 )
+        self.assertFalse( info.vbr )
+
+    def test_xing(self):
+        xing = b"Xing" + struct.pack( ">III", 0x3, 10000, 10000 * 300 )
+        data = create_frame( FRAME_HEADER_128, FRAME_LENGTH_128, xing )
+        data += create_frame( FRAME_HEADER_64, FRAME_LENGTH_64 ) * 10
+        info = parse_mp3_data( data, 10000 * 300 )
+        ## 10000 frames of 1152 samples: 261.22 seconds
+        self.assertEqual( info.duration, 261 )
+        self.assertEqual( info.bitrate, 92 )
+        self.assertTrue( info.vbr )
+
+    def test_vbri(self):
+        vbri = b"VBRI" + struct.pack( ">HHHII", 1, 0, 75, 5000 * 200, 5000 )
+        data = create_frame( FRAME_HEADER_128, FRAME_LENGTH_128, vbri )
+        data += create_frame( FRAME_HEADER_64, FRAME_LENGTH_64 ) * 10
+        info = parse_mp3_data( data, 5000 * 200 )
+        self.assertEqual( info.duration, 131 )
+        self.assertEqual( info.bitrate, 61 )
+
+    def test_sampled_vbr(self):
+        frames = create_frame( FRAME_HEADER_128, FRAME_LENGTH_128 ) + create_frame( FRAME_HEADER_64, FRAME_LENGTH_64 )
+        info = parse_mp3_data( frames * 50, len( frames ) * 50 )
+        self.assertEqual( info.bitrate, 96 )
+        self.assertTrue( info.vbr )
+
+    def test_garbage_prefix(self):
+        frames = create_frame( FRAME_HEADER_128, FRAME_LENGTH_128 ) * 10
+        info = parse_mp3_data( b"\xff\xfb\x00" + frames, len( frames ) + 3 )
+        self.assertEqual( info.bitrate, 128 )
+
+    def test_invalid(self):
+        self.write_file( b"<html><body>\xff\xfb\x90\x00 not found</body></html>" * 50 )
+        self.assertIsNone( read_mp3_info( self.mp3Path ) )
+        self.assertIsNone( read_mp3_info( self.mp3Path + ".missing" ) )
+
+    def test_format_duration(self):
+        self.assertEqual( format_duration( 59 ), "00:00:59" )
+        self.assertEqual( format_duration( 3723 ), "01:02:03" )
+
+    def test_item_media_info(self):
+        self.write_file( create_frame( FRAME_HEADER_128, FRAME_LENGTH_128 ) * 1000 )
+        item = RSSItem( "yt:video:abc" )
+        item.updateMediaInfo( self.mp3Path )
+        self.assertEqual( item.mediaSize, FRAME_LENGTH_128 * 1000 )
+        self.assertEqual( item.getDurationText(), "00:00:26" )
+
+        os.remove( self.mp3Path )
+        item.updateMediaInfo( self.mp3Path )
+        self.assertEqual( item.mediaSize, -1 )
+        self.assertIsNone( item.getDurationText() )
@@ -21,9 +21,15 @@
 # SOFTWARE.
 #
 
+import os
+import datetime
 import unittest
+import tempfile
+from unittest import mock
 
-from rsscast.rss.rssgenerator import fix_url, fix_description
+from rsscast.rss import rssgenerator
+from rsscast.rss.rssgenerator import fix_url, fix_description, generate_items_rss, download_list
+from rsscast.rss.rsschannel import RSSChannel, RSSItem
 
 
 class RSSConverterTest(unittest.TestCase):
@@ -63,3 +69,60 @@ Występ w Poznaniu 2: https://www.youtube.com/watch?v=wZy7CteXdKI&amp;t=298s
         self.assertEqual( """Występ w Poznaniu 1: https://www.youtube.com/watch?v=wZy7CteXdKI&amp;t=298s
 Występ w Poznaniu 2: https://www.youtube.com/watch?v=wZy7CteXdKI&amp;amp;t=298s
 #SEO #Q&amp;A #Onely""", fixedText )
+
+
+def create_item( videoId, mediaFormat="mp3" ):
+    rssItem = RSSItem( f"yt:video:{videoId}", f"https://www.youtube.com/watch?v={videoId}" )
+    rssItem.title = f"title {videoId}"
+    rssItem.summary = "summary"
+    rssItem.publishDate = datetime.datetime( 2024, 1, 1, tzinfo=datetime.timezone.utc )
+    rssItem.mediaFormat = mediaFormat
+    return rssItem
+
+
+class AudioFormatGenerateTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.tmpDir = tempfile.TemporaryDirectory()         # pylint: disable=R1732
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        self.tmpDir.cleanup()
+
+    def touch(self, fileName):
+        with open( os.path.join( self.tmpDir.name, fileName ), "wb" ) as media_file:
+            media_file.write( b"media" )
+
+    def test_generate_mixed_formats(self):
+        channel = RSSChannel()
+        channel.title = "channel"
+        channel.link = "https://www.youtube.com/@channel"
+        channel.publishDate = datetime.datetime( 2024, 1, 1, tzinfo=datetime.timezone.utc )
+        channel.addItem( create_item( "v1" ) )
+        channel.addItem( create_item( "v2", "m4a" ) )
+        channel.addItem( create_item( "v3", "opus" ) )
+        self.touch( "yt_video_v1.mp3" )
+        self.touch( "yt_video_v2.m4a" )
+
+        content = generate_items_rss( channel, "host", "feed", self.tmpDir.name, store=False )
+        self.assertIn( '<enclosure url="http://host/feed/feed/yt_video_v1.mp3" length="5" type="audio/mpeg"/>',
+                       content )
+        self.assertIn( '<enclosure url="http://host/feed/feed/yt_video_v2.m4a" length="5" type="audio/mp4"/>',
+                       content )
+        ## not downloaded
+        self.assertNotIn( "yt_video_v3", content )
+
+    def test_download_keeps_existing_format(self):
+        self.touch( "yt_video_v1.mp3" )
+        items = [ create_item( "v1" ), create_item( "v2" ) ]
+        requested = []
+
+        async def download_stub( _feedId, _rssItem, postLocalPath, _item_label="", audio_format=None,
+                                 _media_store=None, _journal=None ):
+            requested.append( (os.path.basename( postLocalPath ), audio_format) )
+            return True
+
+        with mock.patch.object( rssgenerator, "download_item_async", download_stub ):
+            download_list( "feed", items, self.tmpDir.name, audio_format="m4a" )
+        self.assertEqual( requested, [ ("yt_video_v2.m4a", "m4a") ] )
+        self.assertEqual( items[0].mediaSize, 5 )
@@ -0,0 +1,273 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import os
+import time
+import json
+import socket
+import tempfile
+import unittest
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pycurl
+
+from rsscast.eventloop import EVENT_LOOP
+from rsscast.bandwidth import BandwidthGovernor
+from rsscast.source.curlpool import CurlPool
+from rsscast.source.curlengine import CurlEngine
+from rsscast.source.youtube import ytwebconvert
+from rsscast.source.youtube.ytwebconvert import curl_get, curl_get_async, curl_post_async, curl_download_async, \
+    download_converted, validate_media_head, InvalidContentError
+
+
+## delay of response in seconds
+RESPONSE_DELAY = 0.3
+
+## size of content served on '/data' and '/media' paths
+DATA_SIZE = 256 * 1024
+
+MEDIA_HEAD = b"ID3\x03\x00\x00\x00\x00\x00\x00"
+
+
+class DelayedRequestHandler(BaseHTTPRequestHandler):
+    """Responds with JSON containing request path and body after delay."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):                     # pylint: disable=C0103
+        if self.path.startswith( "/data" ):
+            self.send_content( b"x" * DATA_SIZE )
+            return
+        if self.path.startswith( "/media" ):
+            ## beginning of MP3 file
+            self.send_content( MEDIA_HEAD + b"\0" * ( DATA_SIZE - len( MEDIA_HEAD ) ) )
+            return
+        if self.path.startswith( "/empty" ):
+            self.send_content( b"" )
+            return
+        self.respond( "" )
+
+    def do_POST(self):                    # pylint: disable=C0103
+        length = int( self.headers.get( "Content-Length", "0" ) )
+        self.respond( self.rfile.read( length ).decode() )
+
+    def respond( self, body ):
+        time.sleep( RESPONSE_DELAY )
+        content = json.dumps( { "path": self.path, "body": body } ).encode()
+        self.send_response( 200 )
+        self.send_header( "Content-Length", str( len(content) ) )
+        self.end_headers()
+        self.wfile.write( content )
+
+    def send_content( self, content ):
+        self.send_response( 200 )
+        self.send_header( "Content-Length", str( len(content) ) )
+        self.end_headers()
+        self.wfile.write( content )
+
+    def log_message(self, *args):         # pylint: disable=W0221
+        pass
+
+
+class ConcurrentHTTPServer( ThreadingHTTPServer ):
+    ## accept many simultaneous connections
+    request_queue_size = 64
+    daemon_threads = True
+
+
+def parse_json( response ):
+    return json.loads( response.getvalue() )
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind( ("127.0.0.1", 0) )
+        return sock.getsockname()[1]
+
+
+class CurlEngineTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.server = ConcurrentHTTPServer( ("127.0.0.1", 0), DelayedRequestHandler )
+        self.thread = threading.Thread( target=self.server.serve_forever )
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/"
+        self.engine = CurlEngine()
+        self.pool = CurlPool( pool_size=64 )
+        self.origEngine = ytwebconvert.CURL_ENGINE
+        ytwebconvert.CURL_ENGINE = self.engine
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        ytwebconvert.CURL_ENGINE = self.origEngine
+        self.engine.stop()
+        self.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_get(self):
+        with self.pool.session() as session:
+            response = curl_get( session, self.url + "status", { "id": "1" } )
+        self.assertEqual( parse_json( response )["path"], "/status?id=1" )
+
+    def test_post_parse(self):
+        with self.pool.session() as session:
+            future = curl_post_async( session, self.url + "convert", { "url": "link" }, parse=parse_json )
+            self.assertEqual( future.result( timeout=5 ), { "path": "/convert", "body": "url=link" } )
+
+    def test_many_requests(self):
+        start_time = time.time()
+        futures = []
+        sessions = []
+        for index in range(40):
+            context = self.pool.session()
+            sessions.append( context )
+            session = context.__enter__()                   # pylint: disable=C2801
+            futures.append( curl_get_async( session, self.url + f"item{index}", parse=parse_json ) )
+        ## requests are driven by single thread
+        engine_threads = [ thread for thread in threading.enumerate() if thread.name == "CurlEngine" ]
+        self.assertEqual( 1, len( engine_threads ) )
+        for index, future in enumerate( futures ):
+            self.assertEqual( future.result( timeout=10 )["path"], f"/item{index}" )
+        ## executed concurrently
+        self.assertLess( time.time() - start_time, RESPONSE_DELAY * 10 )
+        for context in sessions:
+            context.__exit__( None, None, None )
+        self.assertEqual( 40, self.pool.getStats()["requests"] )
+        self.assertEqual( 0, self.engine.activeTransfers )
+
+    def test_error(self):
+        url = f"http://127.0.0.1:{get_free_port()}/"
+        with self.pool.session() as session:
+            future = curl_get_async( session, url )
+            with self.assertRaises( pycurl.error ):
+                future.result( timeout=5 )
+            ## session is usable after error
+            self.assertEqual( parse_json( curl_get( session, self.url ) )["path"], "/" )
+
+    def test_callback(self):
+        with self.pool.session() as session:
+            session.setopt( pycurl.URL, self.url )
+            session.setopt( pycurl.WRITEFUNCTION, lambda data: None )
+
+            future = self.engine.perform( session, lambda handle, error: handle.getinfo( pycurl.RESPONSE_CODE ) )
+            self.assertEqual( future.result( timeout=5 ), 200 )
+
+            def raise_error( _handle, _error ):
+                raise ValueError( "invalid response" )
+
+            future = self.engine.perform( session, raise_error )
+            with self.assertRaises( ValueError ):
+                future.result( timeout=5 )
+
+    def test_chained(self):
+        with self.pool.session() as session:
+            def next_request( handle, _error ):
+                ## response triggers next request on the same session
+                return curl_get_async( handle, self.url + "next", parse=parse_json )
+
+            session.setopt( pycurl.URL, self.url )
+            session.setopt( pycurl.WRITEFUNCTION, lambda data: None )
+            future = self.engine.perform( session, next_request )
+            self.assertEqual( future.result( timeout=5 )["path"], "/next" )
+
+    def test_pause(self):
+        finished = []
+
+        def finish( name ):
+            def callback( _handle, _error ):
+                finished.append( name )
+            return callback
+
+        with self.pool.session() as paused, self.pool.session() as other:
+            paused_data = []
+
+            def write_paused( data ):
+                if not paused_data:
+                    self.engine.pauseFor( paused, 1.0 )
+                paused_data.append( data )
+
+            paused.setopt( pycurl.URL, self.url + "data" )
+            paused.setopt( pycurl.WRITEFUNCTION, write_paused )
+            start_time = time.time()
+            paused_future = self.engine.perform( paused, finish( "paused" ) )
+            other.setopt( pycurl.URL, self.url + "other" )
+            other.setopt( pycurl.WRITEFUNCTION, lambda data: None )
+            other_future = self.engine.perform( other, finish( "other" ) )
+
+            other_future.result( timeout=5 )
+            paused_future.result( timeout=5 )
+        ## paused transfer does not block other transfers
+        self.assertEqual( finished, [ "other", "paused" ] )
+        self.assertGreaterEqual( time.time() - start_time, 1.0 )
+        self.assertEqual( len( b"".join( paused_data ) ), DATA_SIZE )
+
+    def test_download_limit(self):
+        governor = BandwidthGovernor()
+        governor.configure( day_limit=DATA_SIZE, night_limit=DATA_SIZE )
+        origBandwidth = ytwebconvert.BANDWIDTH
+        ytwebconvert.BANDWIDTH = governor
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir, self.pool.session() as session:
+                output_path = os.path.join( tmp_dir, "media.mp3" )
+                with governor.job( "episode" ) as meter:
+                    start_time = time.time()
+                    future = curl_download_async( session, self.url + "data", output_path )
+                ## data is accounted to job of caller, not to engine's thread
+                future.result( timeout=10 )
+                self.assertGreaterEqual( time.time() - start_time, 0.5 )
+                self.assertEqual( os.path.getsize( output_path ), DATA_SIZE )
+        finally:
+            ytwebconvert.BANDWIDTH = origBandwidth
+        self.assertEqual( meter.total, DATA_SIZE )
+        self.assertNotIn( "CurlEngine", governor.getStats()["jobs"] )
+
+    def test_download_invalid(self):
+        with tempfile.TemporaryDirectory() as tmp_dir, self.pool.session() as session:
+            output_path = os.path.join( tmp_dir, "media.mp3" )
+            future = curl_download_async( session, self.url + "data", output_path, validate_head=validate_media_head )
+            with self.assertRaises( InvalidContentError ):
+                future.result( timeout=5 )
+            ## invalid content is not kept
+            self.assertEqual( os.listdir( tmp_dir ), [] )
+
+            future = curl_download_async( session, self.url + "empty", output_path, write_empty=False )
+            future.result( timeout=5 )
+            self.assertEqual( os.listdir( tmp_dir ), [] )
+
+    def test_download_converted(self):
+        origPool = ytwebconvert.CURL_POOL
+        ytwebconvert.CURL_POOL = self.pool
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                output_path = os.path.join( tmp_dir, "media.mp3" )
+                future = EVENT_LOOP.submit( download_converted( self.url + "media", output_path ) )
+                self.assertTrue( future.result( timeout=5 ) )
+                self.assertEqual( os.path.getsize( output_path ), DATA_SIZE )
+
+                future = EVENT_LOOP.submit( download_converted( self.url + "data", output_path + "2" ) )
+                self.assertFalse( future.result( timeout=5 ) )
+        finally:
+            ytwebconvert.CURL_POOL = origPool
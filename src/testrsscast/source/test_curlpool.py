@@ -0,0 +1,132 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import unittest
+import threading
+from io import BytesIO
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pycurl
+
+from rsscast.source.curlpool import CurlPool
+
+
+class CookieRequestHandler(BaseHTTPRequestHandler):
+    """Sets cookie given in 'set' query parameter, responds with received 'Cookie' header."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):                     # pylint: disable=C0103
+        query = parse_qs( urlparse( self.path ).query )
+        content = self.headers.get( "Cookie", "" ).encode()
+        self.send_response( 200 )
+        if "set" in query:
+            self.send_header( "Set-Cookie", f"token={query['set'][0]}; Path=/" )
+        self.send_header( "Content-Length", str( len(content) ) )
+        self.end_headers()
+        self.wfile.write( content )
+
+    def log_message(self, *args):         # pylint: disable=W0221
+        pass
+
+
+def curl_read( session, url ):
+    buffer = BytesIO()
+    session.setopt( pycurl.URL, url )
+    session.setopt( pycurl.WRITEDATA, buffer )
+    session.perform()
+    return buffer.getvalue().decode()
+
+
+class CurlPoolTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.server = ThreadingHTTPServer( ("127.0.0.1", 0), CookieRequestHandler )
+        self.server.daemon_threads = True
+        self.thread = threading.Thread( target=self.server.serve_forever )
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/"
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_connection_reuse(self):
+        pool = CurlPool()
+        for _ in range(5):
+            with pool.session() as session:
+                curl_read( session, self.url )
+
+        stats = pool.getStats()
+        self.assertEqual( 5, stats["requests"] )
+        self.assertEqual( 1, stats["connections"] )
+        self.assertEqual( 4, stats["handshakes_saved"] )
+
+        pool.close()
+        stats = pool.getStats()
+        self.assertEqual( 5, stats["requests"] )
+        self.assertEqual( 1, stats["connections"] )
+
+    def test_cookies_isolated(self):
+        pool = CurlPool( pool_size=1 )
+        with pool.session() as session:
+            curl_read( session, self.url + "?set=first" )
+            self.assertEqual( "token=first", curl_read( session, self.url ) )
+        ## the same handle is reused by next job, but without cookies
+        with pool.session() as session:
+            self.assertEqual( "", curl_read( session, self.url ) )
+        pool.close()
+
+    def test_session_borrow(self):
+        pool = CurlPool( pool_size=1 )
+        with pool.session() as session1:
+            with pool.session() as session2:
+                self.assertIsNot( session1, session2 )
+        ## only one idle handle is kept - recently released
+        with pool.session() as session3:
+            self.assertIs( session2, session3 )
+        pool.close()
+
+    def test_threads(self):
+        pool = CurlPool( pool_size=4 )
+        results = {}
+
+        def job( index ):
+            for _ in range(10):
+                with pool.session() as session:
+                    curl_read( session, self.url + f"?set={index}" )
+                    results.setdefault( index, set() ).add( curl_read( session, self.url ) )
+
+        threads = [ threading.Thread( target=job, args=(index,) ) for index in range(4) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for index in range(4):
+            self.assertEqual( { f"token={index}" }, results[ index ] )
+        self.assertEqual( 80, pool.getStats()["requests"] )
+        pool.close()
@@ -0,0 +1,85 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import unittest
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from rsscast.source.httpsession import SessionPool
+
+
+class KeepAliveRequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):                     # pylint: disable=C0103
+        content = b"content"
+        self.send_response( 200 )
+        self.send_header( "Content-Length", str( len(content) ) )
+        self.end_headers()
+        self.wfile.write( content )
+
+    def log_message(self, *args):         # pylint: disable=W0221
+        pass
+
+
+class SessionPoolTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.server = HTTPServer( ("127.0.0.1", 0), KeepAliveRequestHandler )
+        self.thread = threading.Thread( target=self.server.serve_forever )
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/"
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_get_reuse(self):
+        pool = SessionPool()
+        for _ in range(5):
+            response = pool.get( self.url )
+            self.assertEqual( "content", response.text )
+
+        stats = pool.getStats()
+        self.assertEqual( 5, stats["requests"] )
+        self.assertEqual( 1, stats["connections"] )
+        self.assertEqual( 4, stats["handshakes_saved"] )
+        self.assertEqual( 5.0, stats["requests_per_connection"] )
+
+        pool.close()
+        stats = pool.getStats()
+        self.assertEqual( 5, stats["requests"] )
+        self.assertEqual( 1, stats["connections"] )
+
+    def test_session_borrow(self):
+        pool = SessionPool( pool_size=1 )
+        with pool.session() as session1:
+            with pool.session() as session2:
+                self.assertIsNot( session1, session2 )
+        ## only one idle session is kept - recently released
+        with pool.session() as session3:
+            self.assertIs( session2, session3 )
+        pool.close()
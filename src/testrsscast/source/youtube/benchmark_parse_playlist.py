@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+#
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+try:
+    ## following import success only when file is directly executed from command line
+    ## otherwise will throw exception when executing as parameter for "python -m"
+    # pylint: disable=W0611
+    import __init__
+except ImportError:
+    ## when import fails then it means that the script was executed indirectly
+    ## in this case __init__ is already loaded
+    pass
+
+import sys
+import time
+import argparse
+from unittest import mock
+
+from rsscast.source.youtube import convert_yt_dlp
+from rsscast.source.youtube.convert_yt_dlp import parse_playlist_data
+
+
+PLAYLIST_URL = "https://www.youtube.com/playlist?list=benchmark"
+
+
+## stand-in of 'fetch_info' simulating duration of yt-dlp extraction
+def create_extractor_stub(playlist_size, delay):
+    def fetch_info_stub(youtube_url, items_num=15, reduce=True, fields=None, start_pos=1):       # pylint: disable=W0613
+        if youtube_url == PLAYLIST_URL:
+            entries = [ {"url": f"https://www.youtube.com/watch?v=vid{i:04d}"} for i in range(playlist_size) ]
+            return { "title": "benchmark", "entries": entries }
+        time.sleep( delay )
+        return { "id": youtube_url[-7:], "url": youtube_url }
+
+    return fetch_info_stub
+
+
+def measure(items_num, delay, jobs):
+    stub = create_extractor_stub( items_num, delay )
+    with mock.patch.object( convert_yt_dlp, "fetch_info", stub ):
+        start_time = time.time()
+        parse_playlist_data( PLAYLIST_URL, max_fetch=items_num, fetch_jobs=jobs )
+        return time.time() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='parse_playlist_data benchmark')
+    parser.add_argument('--items', action='store', type=int, default=50, help='Number of playlist items' )
+    parser.add_argument('--delay', action='store', type=float, default=0.2, help='Duration of single extraction' )
+    parser.add_argument('--jobs', action='store', type=int, nargs="+", default=[1, 2, 4, 8],
+                        help='Number of concurrent extractions to measure' )
+    args = parser.parse_args()
+
+    print( f"items: {args.items} single extraction: {args.delay}s" )
+    serial_time = None
+    for jobs in args.jobs:
+        duration = measure( args.items, args.delay, jobs )
+        if serial_time is None:
+            serial_time = duration
+        print( f"jobs: {jobs:2d} time: {duration:6.2f}s speedup: {serial_time / duration:5.2f}x" )
+
+
+# =============================================================
+
+
+if __name__ == '__main__':
+    main()
+    sys.exit(0)
@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+#
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+try:
+    ## following import success only when file is directly executed from command line
+    ## otherwise will throw exception when executing as parameter for "python -m"
+    # pylint: disable=W0611
+    import __init__
+except ImportError:
+    ## when import fails then it means that the script was executed indirectly
+    ## in this case __init__ is already loaded
+    pass
+
+import os
+import sys
+import glob
+import time
+import argparse
+
+import feedparser
+
+from rsscast.source.youtube.ytfeedparser import parse_rss_content
+
+from testrsscast.data import get_data_path
+
+
+## previous implementation: bozo check and data read by separate parsing
+def parse_feedparser( feedContent ):
+    parsedDict = feedparser.parse( feedContent )
+    if parsedDict.get('bozo', False):
+        return None
+    return feedparser.parse( feedContent )
+
+
+def measure( function, feedContent, repeats ):
+    start_time = time.time()
+    for _ in range( repeats ):
+        function( feedContent )
+    return time.time() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='YouTube feed parser benchmark')
+    parser.add_argument('--repeats', action='store', type=int, default=50, help='Number of parses of each feed' )
+    args = parser.parse_args()
+
+    feed_files = sorted( glob.glob( get_data_path( "yt_feed_*.xml" ) ) )
+    for feed_file in feed_files:
+        with open( feed_file, "r", encoding="utf-8" ) as feed:
+            feedContent = feed.read()
+        old_time = measure( parse_feedparser, feedContent, args.repeats )
+        new_time = measure( parse_rss_content, feedContent, args.repeats )
+        feed_name = os.path.basename( feed_file )
+        print( f"{feed_name:36s} feedparser: {old_time / args.repeats * 1000:7.2f}ms"
+               f" current: {new_time / args.repeats * 1000:7.2f}ms speedup: {old_time / new_time:6.2f}x" )
+
+
+# =============================================================
+
+
+if __name__ == '__main__':
+    main()
+    sys.exit(0)
@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+#
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+try:
+    ## following import success only when file is directly executed from command line
+    ## otherwise will throw exception when executing as parameter for "python -m"
+    # pylint: disable=W0611
+    import __init__
+except ImportError:
+    ## when import fails then it means that the script was executed indirectly
+    ## in this case __init__ is already loaded
+    pass
+
+import sys
+import time
+import argparse
+
+from rsscast.source.youtube.ytdlppool import YoutubeDLPool
+
+from testrsscast.source.youtube.standinextractor import StandInIE, create_ydl, extract_info
+
+
+FLAT_PARAMS = { "skip_download": True,
+                "simulate": True,
+                "ignore_no_formats_error": True,
+                "extract_flat": True }
+
+
+## previous approach: new instance for each call
+def measure_per_call(calls_num):
+    start_time = time.time()
+    for index in range(calls_num):
+        ydl = create_ydl( FLAT_PARAMS )
+        with ydl:
+            extract_info( ydl, f"vid{index}" )
+    return time.time() - start_time
+
+
+def measure_pooled(calls_num):
+    pool = YoutubeDLPool( factory=create_ydl )
+    pool.registerProfile( "flat", FLAT_PARAMS )
+    start_time = time.time()
+    for index in range(calls_num):
+        with pool.borrow( "flat", run_params={"playlist_items": f"1:{index + 1}"} ) as ydl:
+            extract_info( ydl, f"vid{index}" )
+    duration = time.time() - start_time
+    pool.close()
+    return duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description='YoutubeDL instance setup benchmark')
+    parser.add_argument('--calls', action='store', type=int, default=100, help='Number of extractions' )
+    parser.add_argument('--initDelay', action='store', type=float, default=0.0,
+                        help='Duration of extractor initialization' )
+    args = parser.parse_args()
+
+    StandInIE.INIT_DELAY = args.initDelay
+
+    print( f"calls: {args.calls} extractor initialization: {args.initDelay}s" )
+    per_call_time = measure_per_call( args.calls )
+    pooled_time   = measure_pooled( args.calls )
+    print( f"per call: {per_call_time:6.3f}s {per_call_time / args.calls * 1000:7.2f}ms per extraction" )
+    print( f"pooled:   {pooled_time:6.3f}s {pooled_time / args.calls * 1000:7.2f}ms per extraction" )
+    print( f"speedup:  {per_call_time / pooled_time:5.2f}x" )
+
+
+# =============================================================
+
+
+if __name__ == '__main__':
+    main()
+    sys.exit(0)
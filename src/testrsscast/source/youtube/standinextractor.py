@@ -0,0 +1,123 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import time
+
+import yt_dlp
+from yt_dlp.extractor.common import InfoExtractor
+
+
+class StandInIE( InfoExtractor ):
+    """Local stand-in of YouTube extractor, does not perform any network request.
+
+    'INIT_DELAY' simulates initialization of extractor (eg. reading cookies or
+    fetching configuration), which happens once for each 'YoutubeDL' instance.
+    """
+
+    _VALID_URL = r"standin:(?P<id>[\w-]+)"
+
+    INIT_DELAY = 0.0
+    initCounter = 0
+
+    def _real_initialize(self):
+        StandInIE.initCounter += 1
+        if StandInIE.INIT_DELAY > 0.0:
+            time.sleep( StandInIE.INIT_DELAY )
+
+    def _real_extract(self, url):
+        video_id = self._match_id( url )
+        playlist_items = self.get_param( "playlist_items" )
+        return { "id": video_id,
+                 "title": f"title {video_id}",
+                 "live_status": "not_live",
+                 "description": f"playlist_items: {playlist_items}",
+                 "formats": [ { "format_id": "audio",
+                                "url": f"http://localhost/{video_id}.mp3",
+                                "ext": "mp3",
+                                "acodec": "mp3",
+                                "vcodec": "none" } ] }
+
+
+class StandInYoutubeIE( InfoExtractor ):
+    """Local stand-in of YouTube extractor handling 'watch' URLs, counts extractions."""
+
+    IE_NAME = "standinyoutube"
+    _VALID_URL = r"https://www\.youtube\.com/watch\?v=(?P<id>[\w-]+)"
+
+    extractCounter = 0
+
+    ## URL of served media, e.g. 'file://' URL to local file
+    mediaUrl = None
+
+    def _real_extract(self, url):
+        StandInYoutubeIE.extractCounter += 1
+        video_id = self._match_id( url )
+        media_url = StandInYoutubeIE.mediaUrl
+        if media_url is None:
+            media_url = f"http://localhost/{video_id}.mp3"
+        return { "id": video_id,
+                 "title": f"title {video_id}",
+                 "live_status": "not_live",
+                 "formats": [ { "format_id": "audio",
+                                "url": media_url,
+                                "ext": "mp3",
+                                "acodec": "mp3",
+                                "vcodec": "none" } ] }
+
+
+class QuietLogger:
+
+    @staticmethod
+    def error(_msg):
+        pass
+
+    @staticmethod
+    def warning(_msg):
+        pass
+
+    @staticmethod
+    def debug(_msg):
+        pass
+
+
+def create_ydl( params ):
+    """Factory of 'YoutubeDL' instances recognizing stand-in URLs."""
+    params = dict( params )
+    params[ "logger" ] = QuietLogger
+    ydl = yt_dlp.YoutubeDL( params )
+    ydl.add_info_extractor( StandInIE() )
+    return ydl
+
+
+def extract_info( ydl, video_id ):
+    return ydl.extract_info( f"standin:{video_id}", download=False, ie_key=StandInIE.ie_key() )
+
+
+def create_youtube_ydl( params ):
+    """Factory of 'YoutubeDL' instances handling YouTube URLs by stand-in extractor only."""
+    params = dict( params )
+    params[ "logger" ] = QuietLogger
+    params[ "allowed_extractors" ] = [ StandInYoutubeIE.IE_NAME ]
+    ydl = yt_dlp.YoutubeDL( params )
+    ydl.add_info_extractor( StandInYoutubeIE() )
+    return ydl
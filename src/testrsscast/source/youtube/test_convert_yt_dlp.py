@@ -0,0 +1,346 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import os
+import unittest
+import copy
+import pathlib
+import tempfile
+import threading
+from unittest import mock
+from concurrent.futures import Future
+
+from rsscast.eventloop import EVENT_LOOP
+from rsscast.downloadqueue import DownloadQueue
+from rsscast.source.youtube import convert_yt_dlp, ytconverter
+from rsscast.source.youtube.convert_yt_dlp import parse_playlist_data, fetch_playlist_info, \
+    get_video_status, convert_yt, VideoAvailableStatus, PROFILE_FLAT, PROFILE_DOWNLOAD
+from rsscast.source.youtube.ytdlppool import YoutubeDLPool
+from rsscast.source.youtube.ytinfocache import VideoInfoCache, ProbedInfoStore
+from rsscast.source.youtube.converterhealth import ConverterHealth
+
+from rsscast.transcodepool import TranscodePool
+
+from testrsscast.source.youtube.standinextractor import StandInYoutubeIE, create_youtube_ydl
+from testrsscast.test_transcodepool import create_fake_ffmpeg
+
+
+def video_url(video_id):
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+class ExtractorStub():
+    """Stand-in for 'fetch_info' serving playlist with videos and sublist."""
+
+    PLAYLIST_URL = "https://www.youtube.com/@channel/playlists"
+    SUBLIST_URL  = "https://www.youtube.com/playlist?list=sub"
+
+    def __init__(self):
+        self.requested = []
+
+    def __call__(self, youtube_url, items_num=15, reduce=True, fields=None, start_pos=1):
+        self.requested.append( youtube_url )
+        if youtube_url == self.PLAYLIST_URL:
+            entries = [ {"url": video_url("v1")}, {"url": self.SUBLIST_URL}, {"url": video_url("v2")},
+                        {"url": video_url("bad")}, {"url": video_url("v3")}, {"url": video_url("v4")} ]
+            return { "title": "channel", "entries": entries }
+        if youtube_url == self.SUBLIST_URL:
+            return { "title": "sublist", "entries": [ {"url": video_url("s1")}, {"url": video_url("s2")} ] }
+        if youtube_url.endswith( "bad" ):
+            return None
+        return { "id": youtube_url[-2:], "url": youtube_url }
+
+
+class PagedExtractorStub():
+    """Stand-in for 'fetch_info' serving flat playlist in windows.
+
+    Newest video has highest number. In case of reversed playlist items are
+    ordered from oldest (as YouTube serves playlists) and reversed by 'fetch_info'.
+    """
+
+    PLAYLIST_URL = "https://www.youtube.com/playlist?list=paged"
+
+    def __init__(self, items_num, reverse=False, fail_pos=None):
+        self.itemsNum = items_num
+        self.reverse  = reverse
+        self.failPos  = fail_pos            ## start position of page that can not be fetched
+        self.requested = []
+
+    def __call__(self, youtube_url, items_num=15, reduce=True, fields=None, start_pos=1):
+        self.requested.append( (start_pos, items_num) )
+        if start_pos == self.failPos:
+            return None
+        videos = [ {"url": video_url(f"v{i}")} for i in range(self.itemsNum) ]
+        if not self.reverse:
+            videos.reverse()
+        entries = videos[ start_pos - 1:items_num ]
+        info_dict = { "title": "playlist", "entries": entries, "playlist_count": self.itemsNum }
+        if self.reverse:
+            entries.reverse()
+            info_dict["webpage_url_basename"] = "playlist"
+        return info_dict
+
+
+class FetchPlaylistInfoTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        pass
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        pass
+
+    def fetch(self, stub, known_items, page_size=10):
+        with mock.patch.object( convert_yt_dlp, "fetch_info", stub ):
+            return fetch_playlist_info( PagedExtractorStub.PLAYLIST_URL, known_items, page_size )
+
+    def test_no_known(self):
+        stub = PagedExtractorStub( 95 )
+        info_dict = self.fetch( stub, set() )
+        self.assertEqual( len( info_dict["entries"] ), 95 )
+        self.assertEqual( stub.requested, [ (1, 999999) ] )
+
+    def test_stop_at_known_page(self):
+        stub = PagedExtractorStub( 95 )
+        known = { video_url(f"v{i}") for i in range(80) }
+        info_dict = self.fetch( stub, known )
+        self.assertEqual( stub.requested, [ (1, 10), (11, 20), (21, 30) ] )
+        links = [ item["url"] for item in info_dict["entries"] ]
+        self.assertEqual( links[0], video_url("v94") )
+        self.assertEqual( links[:15], [ video_url(f"v{i}") for i in range(94, 79, -1) ] )
+
+    def test_last_page(self):
+        stub = PagedExtractorStub( 25 )
+        info_dict = self.fetch( stub, { video_url("v0") } )
+        self.assertEqual( stub.requested, [ (1, 10), (11, 20), (21, 30) ] )
+        self.assertEqual( len( info_dict["entries"] ), 25 )
+
+    def test_reversed(self):
+        stub = PagedExtractorStub( 95, reverse=True )
+        known = { video_url(f"v{i}") for i in range(80) }
+        info_dict = self.fetch( stub, known )
+        self.assertEqual( stub.requested, [ (1, 10), (86, 95), (76, 85), (66, 75) ] )
+        links = [ item["url"] for item in info_dict["entries"] ]
+        self.assertEqual( links[:15], [ video_url(f"v{i}") for i in range(94, 79, -1) ] )
+
+    def test_reversed_first_page(self):
+        stub = PagedExtractorStub( 25, reverse=True )
+        info_dict = self.fetch( stub, { video_url("v0") } )
+        ## oldest items are not fetched again
+        self.assertEqual( stub.requested, [ (1, 10), (16, 25), (6, 15) ] )
+        links = [ item["url"] for item in info_dict["entries"] ]
+        self.assertEqual( links, [ video_url(f"v{i}") for i in range(24, -1, -1) ] )
+
+    def test_page_failed(self):
+        stub = PagedExtractorStub( 95, fail_pos=21 )
+        info_dict = self.fetch( stub, { video_url("v0") } )
+        self.assertEqual( stub.requested, [ (1, 10), (11, 20), (21, 30) ] )
+        links = [ item["url"] for item in info_dict["entries"] ]
+        self.assertEqual( links, [ video_url(f"v{i}") for i in range(94, 74, -1) ] )
+
+    def test_reversed_page_failed(self):
+        stub = PagedExtractorStub( 95, reverse=True, fail_pos=76 )
+        info_dict = self.fetch( stub, { video_url("v0") } )
+        links = [ item["url"] for item in info_dict["entries"] ]
+        self.assertEqual( links, [ video_url(f"v{i}") for i in range(94, 84, -1) ] )
+        stub = PagedExtractorStub( 95, reverse=True, fail_pos=86 )
+        self.assertIsNone( self.fetch( stub, { video_url("v0") } ) )
+
+    def test_reversed_short(self):
+        stub = PagedExtractorStub( 8, reverse=True )
+        info_dict = self.fetch( stub, { video_url("v0") } )
+        self.assertEqual( stub.requested, [ (1, 10) ] )
+        links = [ item["url"] for item in info_dict["entries"] ]
+        self.assertEqual( links, [ video_url(f"v{i}") for i in range(7, -1, -1) ] )
+
+
+class ParsePlaylistDataTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        pass
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        pass
+
+    def parse(self, fetch_jobs, known_items=None, max_fetch=10):
+        stub = ExtractorStub()
+        with mock.patch.object( convert_yt_dlp, "fetch_info", stub ):
+            info_dict = parse_playlist_data( ExtractorStub.PLAYLIST_URL, known_items=copy.copy( known_items ),
+                                             max_fetch=max_fetch, fetch_jobs=fetch_jobs )
+        return info_dict, stub
+
+    def test_parallel_equals_serial(self):
+        known = { video_url("s2"), video_url("v3") }
+        for max_fetch in range(0, 8):
+            serial_dict, _ = self.parse( 1, known, max_fetch )
+            for jobs in (2, 3, 8):
+                parallel_dict, _ = self.parse( jobs, known, max_fetch )
+                self.assertEqual( serial_dict, parallel_dict, f"max_fetch: {max_fetch} jobs: {jobs}" )
+
+    def test_fetch_once(self):
+        _, stub = self.parse( 4, {video_url("v3")}, 10 )
+        ## known item is never requested
+        self.assertNotIn( video_url("v3"), stub.requested )
+        ## items are requested only once
+        self.assertEqual( len( set( stub.requested ) ), len( stub.requested ) )
+
+    def test_fetch_failed(self):
+        info_dict, _ = self.parse( 4, None, 10 )
+        self.assertIn( {"link": video_url("bad")}, info_dict["entries"] )
+
+
+class ProbeOnceTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.tmpDir = tempfile.TemporaryDirectory()         # pylint: disable=R1732
+        pool = YoutubeDLPool( factory=create_youtube_ydl )
+        pool.registerProfile( PROFILE_FLAT, { "skip_download": True, "simulate": True } )
+        pool.registerProfile( PROFILE_DOWNLOAD, { "enable_file_urls": True } )
+        transcode_pool = TranscodePool( jobs=1 )
+        transcode_pool.ffmpeg = create_fake_ffmpeg( self.tmpDir.name )
+        media_path = os.path.join( self.tmpDir.name, "media.m4a" )
+        with open( media_path, "wb" ) as media_file:
+            media_file.write( b"audio data" )
+        StandInYoutubeIE.mediaUrl = pathlib.Path( media_path ).as_uri()
+        self.patches = [ mock.patch.object( convert_yt_dlp, "YTDL_POOL", pool ),
+                         mock.patch.object( convert_yt_dlp, "VIDEO_INFO_CACHE",
+                                            VideoInfoCache( cachePath=f"{self.tmpDir.name}/video_info.obj" ) ),
+                         mock.patch.object( convert_yt_dlp, "PROBED_INFO", ProbedInfoStore() ),
+                         mock.patch.object( convert_yt_dlp, "TRANSCODE_POOL", transcode_pool ) ]
+        for patch in self.patches:
+            patch.start()
+        StandInYoutubeIE.extractCounter = 0
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        for patch in self.patches:
+            patch.stop()
+        StandInYoutubeIE.mediaUrl = None
+        self.tmpDir.cleanup()
+
+    def test_single_extraction(self):
+        url = video_url( "abcdefghijk" )
+        status, _ = get_video_status( url )
+        self.assertEqual( status, VideoAvailableStatus.OK )
+        self.assertEqual( convert_yt_dlp.PROBED_INFO.size(), 1 )
+
+        output_path = f"{self.tmpDir.name}/abc.mp3"
+        converted = convert_yt( url, output_path )
+        self.assertTrue( converted )
+        self.assertEqual( StandInYoutubeIE.extractCounter, 1 )
+        self.assertEqual( convert_yt_dlp.PROBED_INFO.size(), 0 )
+        ## downloaded audio is transcoded and removed
+        with open( output_path, "rb" ) as output_file:
+            self.assertEqual( output_file.read(), b"audio data" )
+        self.assertFalse( os.path.exists( f"{self.tmpDir.name}/abc.source" ) )
+
+    def test_no_probe(self):
+        converted = convert_yt( video_url( "abcdefghijk" ), f"{self.tmpDir.name}/abc.mp3" )
+        self.assertTrue( converted )
+        self.assertEqual( StandInYoutubeIE.extractCounter, 1 )
+
+    def test_reduced_status_info(self):
+        url = video_url( "abcdefghijk" )
+        info_dict = convert_yt_dlp.fetch_info( url )
+        self.assertEqual( info_dict["formats"], "formats_removed" )
+        ## probed info is not reduced
+        probed = convert_yt_dlp.PROBED_INFO.take( "abcdefghijk" )
+        self.assertIsInstance( probed["formats"], list )
+
+
+class TranscodeStagePool():
+    """Stand-in for 'TranscodePool' keeping transcoding pending until finished by test."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = []
+        self.submitted = threading.Semaphore( 0 )
+
+    def submit(self, input_path, output_path, audio_format=None):      # pylint: disable=W0613
+        future = Future()
+        with self.lock:
+            self.pending.append( (input_path, output_path, future) )
+        self.submitted.release()
+        return future
+
+    def finishAll(self):
+        with self.lock:
+            pending = self.pending
+            self.pending = []
+        for input_path, output_path, future in pending:
+            with open( input_path, "rb" ) as input_file, open( output_path, "wb" ) as output_file:
+                output_file.write( input_file.read() )
+            future.set_result( None )
+
+
+class TranscodeStageTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.tmpDir = tempfile.TemporaryDirectory()         # pylint: disable=R1732
+        pool = YoutubeDLPool( factory=create_youtube_ydl )
+        pool.registerProfile( PROFILE_FLAT, { "skip_download": True, "simulate": True } )
+        pool.registerProfile( PROFILE_DOWNLOAD, { "enable_file_urls": True } )
+        media_path = os.path.join( self.tmpDir.name, "media.m4a" )
+        with open( media_path, "wb" ) as media_file:
+            media_file.write( b"audio data" )
+        StandInYoutubeIE.mediaUrl = pathlib.Path( media_path ).as_uri()
+        self.transcodePool = TranscodeStagePool()
+        self.queue = DownloadQueue( jobs=4, converter_jobs=1 )
+        health = ConverterHealth( cachePath=os.path.join( self.tmpDir.name, "health.obj" ) )
+        self.patches = [ mock.patch.object( convert_yt_dlp, "YTDL_POOL", pool ),
+                         mock.patch.object( convert_yt_dlp, "VIDEO_INFO_CACHE",
+                                            VideoInfoCache( cachePath=f"{self.tmpDir.name}/video_info.obj" ) ),
+                         mock.patch.object( convert_yt_dlp, "PROBED_INFO", ProbedInfoStore() ),
+                         mock.patch.object( convert_yt_dlp, "TRANSCODE_POOL", self.transcodePool ),
+                         mock.patch.object( ytconverter, "DOWNLOAD_QUEUE", self.queue ),
+                         mock.patch.object( ytconverter, "CONVERTERS_HEALTH", health ),
+                         mock.patch.object( ytconverter, "check_is_audio", return_value=True ) ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        for patch in self.patches:
+            patch.stop()
+        self.queue.shutdown()
+        StandInYoutubeIE.mediaUrl = None
+        self.tmpDir.cleanup()
+
+    def test_download_during_transcode(self):
+        futures = []
+        for video_id in ["abcdefghijk", "bcdefghijkl"]:
+            output_path = f"{self.tmpDir.name}/{video_id}.mp3"
+            coroutine = ytconverter.run_converter_async( ytconverter.convert_yt_yt_dlp, video_url( video_id ), output_path )
+            futures.append( EVENT_LOOP.submit( coroutine ) )
+
+        ## with single converter slot second download completes while first transcoding is pending
+        for _ in range(2):
+            self.assertTrue( self.transcodePool.submitted.acquire( timeout=10 ) )
+        self.assertFalse( any( future.done() for future in futures ) )
+
+        self.transcodePool.finishAll()
+        self.assertEqual( [ future.result( timeout=10 ) for future in futures ], [True, True] )
+        for video_id in ["abcdefghijk", "bcdefghijkl"]:
+            self.assertTrue( os.path.isfile( f"{self.tmpDir.name}/{video_id}.mp3" ) )
+            self.assertFalse( os.path.exists( f"{self.tmpDir.name}/{video_id}.source" ) )
@@ -0,0 +1,107 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import os
+import unittest
+import tempfile
+
+from rsscast.source.youtube import converterhealth
+from rsscast.source.youtube.converterhealth import ConverterHealth, FAILURE_PROCESS
+
+
+def get_name( converter ):
+    return converter
+
+
+class ConverterHealthTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.cachePath = os.path.join( self.tmpDir.name, "health.obj" )
+        self.health = ConverterHealth( cachePath=self.cachePath )
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        self.tmpDir.cleanup()
+
+    def recordFailures(self, name, times, now=0):
+        for _ in range( times ):
+            self.health.record( name, False, 1.0, FAILURE_PROCESS, now=now )
+
+    def test_order_by_health(self):
+        self.health.record( "good", True, 10.0, now=0 )
+        self.health.record( "bad", True, 10.0, now=0 )
+        self.recordFailures( "bad", 1 )
+        for _ in range( 10 ):
+            ordered = self.health.orderConverters( ["bad", "good"], get_name, now=0 )
+            self.assertEqual( ordered, ["good", "bad"] )
+
+    def test_order_by_latency(self):
+        self.health.record( "slow", True, 100.0, now=0 )
+        self.health.record( "fast", True, 10.0, now=0 )
+        ordered = self.health.orderConverters( ["slow", "fast"], get_name, now=0 )
+        self.assertEqual( ordered, ["fast", "slow"] )
+
+    def test_circuit_open(self):
+        self.recordFailures( "dead", converterhealth.FAILURE_THRESHOLD )
+        ordered = self.health.orderConverters( ["dead", "alive"], get_name, now=1 )
+        self.assertEqual( ordered, ["alive"] )
+        state = self.health.getState( "dead" )
+        self.assertEqual( state["last_failure"], FAILURE_PROCESS )
+
+    def test_probe(self):
+        self.recordFailures( "dead", converterhealth.FAILURE_THRESHOLD )
+        now = converterhealth.BASE_COOLDOWN
+        ## single probe after cooldown - tried first
+        ordered = self.health.orderConverters( ["alive", "dead"], get_name, now=now )
+        self.assertEqual( ordered, ["dead", "alive"] )
+        ordered = self.health.orderConverters( ["alive", "dead"], get_name, now=now )
+        self.assertEqual( ordered, ["alive"] )
+
+        ## failed probe extends cooldown
+        self.recordFailures( "dead", 1, now=now )
+        state = self.health.getState( "dead" )
+        self.assertEqual( state["open_until"], now + 2 * converterhealth.BASE_COOLDOWN )
+
+        ## successful probe closes circuit
+        now = state["open_until"]
+        self.health.orderConverters( ["dead"], get_name, now=now )
+        self.health.record( "dead", True, 1.0, now=now )
+        ordered = self.health.orderConverters( ["dead"], get_name, now=now )
+        self.assertEqual( ordered, ["dead"] )
+
+    def test_persist(self):
+        self.recordFailures( "dead", converterhealth.FAILURE_THRESHOLD )
+        self.assertTrue( self.health.store() )
+        loaded = ConverterHealth( cachePath=self.cachePath )
+        self.assertEqual( loaded.orderConverters( ["dead"], get_name, now=1 ), [] )
+
+    def test_persist_probe(self):
+        self.recordFailures( "dead", converterhealth.FAILURE_THRESHOLD )
+        self.assertTrue( self.health.store() )
+        now = converterhealth.BASE_COOLDOWN
+        self.health.orderConverters( ["dead"], get_name, now=now )
+        ## started probe is stored, so it is not repeated after restart
+        self.assertTrue( self.health.store() )
+        loaded = ConverterHealth( cachePath=self.cachePath )
+        self.assertEqual( loaded.orderConverters( ["dead"], get_name, now=now ), [] )
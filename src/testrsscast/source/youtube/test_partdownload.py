@@ -0,0 +1,223 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import os
+import hashlib
+import unittest
+import tempfile
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from rsscast.source.curlpool import CurlPool
+from rsscast.source.youtube.partdownload import PartialDownload, parse_content_range
+from rsscast.source.youtube.ytwebconvert import urldownload, curl_download_raw, validate_media_head, \
+    InvalidContentError
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    """Serves server's 'content' supporting 'Range' and 'If-Range' headers.
+
+    When server's 'breakNext' is set, then connection is closed in the middle of transfer.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):                     # pylint: disable=C0103
+        content = self.server.content
+        etag    = f'"{self.server.version}"'
+        self.server.requests.append( self.headers.get( "Range" ) )
+
+        start = 0
+        range_header = self.headers.get( "Range" )
+        if range_header and self.headers.get( "If-Range", etag ) == etag:
+            start = int( range_header.split( "=" )[1].split( "-" )[0] )
+        if range_header and start >= len( content ):
+            self.send_response( 416 )
+            self.send_header( "Content-Length", "0" )
+            self.end_headers()
+            return
+
+        data = content[ start: ]
+        if start > 0:
+            self.send_response( 206 )
+            self.send_header( "Content-Range", f"bytes {start}-{len(content) - 1}/{len(content)}" )
+        else:
+            self.send_response( 200 )
+        self.send_header( "ETag", etag )
+        self.send_header( "Content-Length", str( len( data ) ) )
+        self.end_headers()
+
+        if self.server.breakNext:
+            self.server.breakNext = False
+            self.wfile.write( data[ :len(data) // 2 ] )
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write( data )
+
+    def log_message(self, *args):         # pylint: disable=W0221
+        pass
+
+
+class PartDownloadTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.tmpDir = tempfile.TemporaryDirectory()         # pylint: disable=R1732
+        self.output = os.path.join( self.tmpDir.name, "audio.mp3" )
+        self.server = HTTPServer( ("127.0.0.1", 0), RangeRequestHandler )
+        self.server.content   = os.urandom( 300 * 1024 )
+        self.server.version   = 1
+        self.server.breakNext = False
+        self.server.requests  = []
+        self.thread = threading.Thread( target=self.server.serve_forever )
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/audio.mp3"
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.tmpDir.cleanup()
+
+    def read_output(self):
+        with open( self.output, "rb" ) as output_file:
+            return output_file.read()
+
+    def test_parse_content_range(self):
+        self.assertEqual( parse_content_range( "bytes 100-199/200" ), (100, 200) )
+        self.assertEqual( parse_content_range( "bytes 100-199/*" ), (100, None) )
+        self.assertEqual( parse_content_range( None ), None )
+
+    def test_urldownload_resume(self):
+        self.server.breakNext = True
+        with self.assertRaises( Exception ):
+            urldownload( self.url, self.output )
+        self.assertFalse( os.path.exists( self.output ) )
+        part_size = os.path.getsize( self.output + ".part" )
+        self.assertGreater( part_size, 0 )
+
+        urldownload( self.url, self.output )
+        self.assertEqual( self.read_output(), self.server.content )
+        self.assertEqual( self.server.requests, [ None, f"bytes={part_size}-" ] )
+        self.assertFalse( os.path.exists( self.output + ".part" ) )
+        self.assertFalse( os.path.exists( self.output + ".part.json" ) )
+
+    def test_urldownload_changed(self):
+        self.server.breakNext = True
+        with self.assertRaises( Exception ):
+            urldownload( self.url, self.output )
+        ## content changed on server - whole content is sent
+        self.server.content = os.urandom( 200 * 1024 )
+        self.server.version = 2
+        urldownload( self.url, self.output )
+        self.assertEqual( self.read_output(), self.server.content )
+
+    def test_curl_resume(self):
+        with CurlPool().session() as session:
+            self.server.breakNext = True
+            with self.assertRaises( Exception ):
+                curl_download_raw( session, self.url, self.output )
+            part_size = os.path.getsize( self.output + ".part" )
+            self.assertGreater( part_size, 0 )
+
+            curl_download_raw( session, self.url, self.output )
+        self.assertEqual( self.read_output(), self.server.content )
+        self.assertEqual( self.server.requests, [ None, f"bytes={part_size}-" ] )
+
+    def test_complete_part(self):
+        ## part file contains whole content, but was not finished
+        download = PartialDownload( self.output, self.url )
+        with download.open( 200, { "etag": '"1"', "content-length": str( len( self.server.content ) ) } ) as part:
+            part.write( self.server.content )
+        urldownload( self.url, self.output )
+        self.assertEqual( self.read_output(), self.server.content )
+        self.assertEqual( self.server.requests, [ f"bytes={len(self.server.content)}-", None ] )
+
+    def test_stale_part(self):
+        ## part without metadata is not resumed
+        with open( self.output + ".part", "wb" ) as part:
+            part.write( b"invalid" )
+        urldownload( self.url, self.output )
+        self.assertEqual( self.read_output(), self.server.content )
+        self.assertEqual( self.server.requests, [ None ] )
+
+    def test_other_url_last_modified(self):
+        ## part from other mirror with modification date only - can not prove the same content
+        download = PartialDownload( self.output, "http://mirror.example/other.mp3" )
+        with download.open( 200, { "last-modified": "Mon, 01 Jan 2024 00:00:00 GMT" } ) as part:
+            part.write( b"other file" )
+        download = PartialDownload( self.output, self.url )
+        self.assertEqual( download.offset, 0 )
+        self.assertFalse( os.path.exists( self.output + ".part" ) )
+        urldownload( self.url, self.output )
+        self.assertEqual( self.read_output(), self.server.content )
+        self.assertEqual( self.server.requests, [ None ] )
+
+    def test_same_url_no_validator(self):
+        ## range request without 'If-Range' could glue different contents - download is restarted
+        download = PartialDownload( self.output, self.url )
+        with download.open( 200, { "etag": 'W/"1"' } ) as part:
+            part.write( b"other file" )
+        download = PartialDownload( self.output, self.url )
+        self.assertEqual( download.offset, 0 )
+        self.assertFalse( os.path.exists( self.output + ".part" ) )
+        urldownload( self.url, self.output )
+        self.assertEqual( self.read_output(), self.server.content )
+        self.assertEqual( self.server.requests, [ None ] )
+
+    def test_other_url_strong_etag(self):
+        ## part from other URL guarded by strong ETag is resumed
+        download = PartialDownload( self.output, "http://mirror.example/other.mp3" )
+        with download.open( 200, { "etag": '"1"', "last-modified": "Mon, 01 Jan 2024 00:00:00 GMT" } ) as part:
+            part.write( self.server.content[ :1000 ] )
+        urldownload( self.url, self.output )
+        self.assertEqual( self.read_output(), self.server.content )
+        self.assertEqual( self.server.requests, [ "bytes=1000-" ] )
+
+    def test_urldownload_hash(self):
+        self.server.breakNext = True
+        with self.assertRaises( Exception ):
+            urldownload( self.url, self.output, hash_name="sha256" )
+        digest = urldownload( self.url, self.output, hash_name="sha256" )
+        self.assertEqual( self.server.requests[1][:6], "bytes=" )
+        self.assertEqual( digest, hashlib.sha256( self.server.content ).hexdigest() )
+
+    def test_urldownload_media(self):
+        self.server.content = b"ID3\x03\x00\x00\x00\x00\x00\x00" + os.urandom( 2048 )
+        urldownload( self.url, self.output, validate_head=validate_media_head )
+        self.assertEqual( self.read_output(), self.server.content )
+
+    def test_urldownload_invalid(self):
+        self.server.content = b"<html><body>conversion failed</body></html>" * 100
+        with self.assertRaises( InvalidContentError ):
+            urldownload( self.url, self.output, validate_head=validate_media_head )
+        self.assertFalse( os.path.exists( self.output ) )
+        self.assertFalse( os.path.exists( self.output + ".part" ) )
+        self.assertFalse( os.path.exists( self.output + ".part.json" ) )
+
+    def test_urldownload_empty(self):
+        self.server.content = b""
+        urldownload( self.url, self.output, write_empty=False, validate_head=validate_media_head )
+        self.assertFalse( os.path.exists( self.output ) )
+        self.assertFalse( os.path.exists( self.output + ".part" ) )
@@ -0,0 +1,114 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import time
+import unittest
+import threading
+from concurrent.futures import Future
+
+from rsscast.eventloop import EventLoopThread
+from rsscast.source.youtube.progresspoller import ProgressPoller, next_interval
+
+
+class StatusStub():
+    """Returns future of given responses one by one, last one is repeated."""
+
+    def __init__(self, responses):
+        self.responses = list( responses )
+        self.calls = 0
+
+    def __call__(self):
+        index = min( self.calls, len( self.responses ) - 1 )
+        self.calls += 1
+        response = self.responses[ index ]
+        ## response is delivered through future (e.g. by curl engine)
+        future = Future()
+        if isinstance( response, Exception ):
+            future.set_exception( response )
+        else:
+            future.set_result( response )
+        return future
+
+
+class ProgressPollerTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.loop = EventLoopThread( "TestLoop" )
+        self.poller = ProgressPoller( self.loop )
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        self.loop.stop()
+
+    def test_finished(self):
+        stub = StatusStub( [ {"success": 0, "progress": 100}, IOError( "network" ),
+                             {"success": 0, "progress": 500}, {"success": 1, "download_url": "url"} ] )
+        future = self.poller.poll( stub, base_interval=0.01, stall_timeout=1.0 )
+        self.assertEqual( future.result( timeout=5 ), {"success": 1, "download_url": "url"} )
+
+    def test_stalled(self):
+        stub = StatusStub( [ {"success": 0, "progress": 100} ] )
+        future = self.poller.poll( stub, base_interval=0.01, stall_timeout=0.1 )
+        self.assertIsNone( future.result( timeout=5 ) )
+        self.assertGreater( stub.calls, 2 )
+
+    def test_unhandled(self):
+        stub = StatusStub( [ {"success": 5} ] )
+        future = self.poller.poll( stub, base_interval=0.01, stall_timeout=1.0 )
+        with self.assertRaises( ValueError ):
+            future.result( timeout=5 )
+
+    def test_many_jobs(self):
+        threads_before = threading.active_count()
+        stubs = [ StatusStub( [ {"success": 0, "progress": 0}, {"success": 1} ] ) for _ in range(50) ]
+        start_time = time.time()
+        futures = [ self.poller.poll( stub, base_interval=0.2, stall_timeout=5.0 ) for stub in stubs ]
+        ## waiting conversions do not occupy threads
+        self.assertLessEqual( threading.active_count() - threads_before, 1 )
+        for future in futures:
+            self.assertEqual( future.result( timeout=10 ), {"success": 1} )
+        self.assertLess( time.time() - start_time, 3.0 )
+
+    def test_wait(self):
+        stub = StatusStub( [ {"success": 0, "progress": 100}, IOError( "network" ), {"success": 1} ] )
+        threads = []
+
+        async def convert():
+            ## awaited directly by conversion coroutine - no other loop involved
+            threads.append( threading.current_thread() )
+            return await self.poller.wait( stub, base_interval=0.01, stall_timeout=1.0 )
+
+        future = self.loop.submit( convert() )
+        self.assertEqual( future.result( timeout=5 ), {"success": 1} )
+        self.assertEqual( stub.calls, 3 )
+        self.assertEqual( len( threads ), 1 )
+        self.assertIsNot( threads[0], threading.current_thread() )
+
+    def test_next_interval(self):
+        self.assertEqual( next_interval( 3.0, None, 100, 3.0 ), 3.0 )
+        ## 100 per second - remaining 8 seconds
+        self.assertEqual( next_interval( 3.0, 100, 200, 1.0 ), 4.0 )
+        ## almost done
+        self.assertEqual( next_interval( 3.0, 100, 990, 1.0 ), 1.5 )
+        ## slow
+        self.assertEqual( next_interval( 3.0, 100, 101, 10.0 ), 12.0 )
@@ -0,0 +1,85 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import unittest
+
+import feedparser
+
+from rsscast.rss.rsschannel import RSSChannel
+from rsscast.source.youtube.ytatomparser import parse_yt_atom
+
+from testrsscast.data import read_data
+
+
+YT_FEEDS = [ "yt_feed_konfederacja.xml", "yt_feed_latino_short.xml", "yt_feed_latino_title_repeat.xml",
+             "yt_feed_playlist_gwiazdowski.xml", "yt_feed_przygody.xml" ]
+
+## feeds with entries missing alternate link and the same feeds with links
+YT_FEEDS_NO_LINK = { "yt_feed_latino_no_link.xml": "yt_feed_latino_short.xml" }
+
+
+def get_channel_data( parsedDict ):
+    channel = RSSChannel()
+    channel.parseData( parsedDict )
+    items = [ ( item.id, item.link, item.title, item.summary, item.publishDate,
+                item.thumb_url, item.thumb_width, item.thumb_height ) for item in channel.items ]
+    return ( channel.title, channel.link, channel.publishDate, items )
+
+
+class YTAtomParserTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        pass
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        pass
+
+    def test_equals_feedparser(self):
+        for feed_file in YT_FEEDS:
+            feedContent = read_data( feed_file )
+            parsedDict = parse_yt_atom( feedContent )
+            self.assertIsNotNone( parsedDict, feed_file )
+            expected = get_channel_data( feedparser.parse( feedContent ) )
+            self.assertEqual( get_channel_data( parsedDict ), expected, feed_file )
+
+    def test_missing_link(self):
+        ## link of video is built from video id
+        for feed_file, reference_file in YT_FEEDS_NO_LINK.items():
+            parsedDict = parse_yt_atom( read_data( feed_file ) )
+            self.assertIsNotNone( parsedDict, feed_file )
+            expected = get_channel_data( feedparser.parse( read_data( reference_file ) ) )
+            self.assertEqual( get_channel_data( parsedDict ), expected, feed_file )
+
+    def test_html(self):
+        feedContent = read_data( "yt_feed_404.xml" )
+        self.assertIsNone( parse_yt_atom( feedContent ) )
+
+    def test_non_youtube(self):
+        feedContent = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+ <title>Other feed</title>
+ <published>2020-12-15T20:00:30+00:00</published>
+</feed>
+"""
+        self.assertIsNone( parse_yt_atom( feedContent ) )
@@ -0,0 +1,90 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import os
+import time
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+from concurrent.futures import Future
+
+from rsscast.eventloop import EVENT_LOOP
+from rsscast.downloadqueue import DownloadQueue, get_converter_name
+from rsscast.source.youtube import ytconverter
+from rsscast.source.youtube.converterhealth import ConverterHealth
+
+
+class RunConverterTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.tmpDir = tempfile.TemporaryDirectory()         # pylint: disable=R1732
+        self.queue = DownloadQueue( jobs=1, converter_jobs=1 )
+        self.health = ConverterHealth( cachePath=os.path.join( self.tmpDir.name, "health.obj" ) )
+        self.patches = [ mock.patch.object( ytconverter, "DOWNLOAD_QUEUE", self.queue ),
+                         mock.patch.object( ytconverter, "CONVERTERS_HEALTH", self.health ),
+                         mock.patch.object( ytconverter, "check_is_audio", return_value=True ) ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        for patch in self.patches:
+            patch.stop()
+        self.queue.shutdown()
+        self.tmpDir.cleanup()
+
+    def test_remote_wait(self):
+        remote_done = Future()
+        submitted = []
+
+        async def converter( link, _output, _mimicHuman=True ):
+            submitted.append( link )
+
+            async def finish():
+                return await asyncio.wrap_future( remote_done )
+
+            return finish()
+
+        futures = [ EVENT_LOOP.submit( ytconverter.run_converter_async( converter, f"link{i}", "out.mp3" ) )
+                    for i in range( 3 ) ]
+
+        ## single converter slot is released after submission of each conversion
+        deadline = time.time() + 10
+        while len( submitted ) < 3 and time.time() < deadline:
+            time.sleep( 0.01 )
+        self.assertEqual( submitted, [ "link0", "link1", "link2" ] )
+        ## the only worker is free while conversions are pending
+        self.assertEqual( self.queue.submit( sum, [1, 2] ).result( timeout=10 ), 3 )
+        self.assertFalse( any( future.done() for future in futures ) )
+
+        remote_done.set_result( True )
+        self.assertEqual( [ future.result( timeout=10 ) for future in futures ], [True, True, True] )
+        self.assertEqual( self.health.getState( get_converter_name( converter ) )["success"], 3 )
+
+    def test_blocking_converter(self):
+        def converter( _link, _output, _mimicHuman=True ):
+            return False
+
+        self.assertFalse( ytconverter.run_converter( converter, "link", "out.mp3" ) )
+        self.assertEqual( self.health.getState( get_converter_name( converter ) )["failure"], 1 )
@@ -0,0 +1,112 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import unittest
+import threading
+
+import yt_dlp
+
+from rsscast.source.youtube.ytdlppool import YoutubeDLPool
+
+from testrsscast.source.youtube.standinextractor import StandInIE, create_ydl, extract_info
+
+
+FLAT_PARAMS = { "skip_download": True,
+                "simulate": True,
+                "extract_flat": True }
+
+
+class YoutubeDLPoolTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.pool = YoutubeDLPool( factory=create_ydl )
+        self.pool.registerProfile( "flat", FLAT_PARAMS )
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        self.pool.close()
+
+    def test_reuse(self):
+        init_counter = StandInIE.initCounter
+        for _ in range(3):
+            with self.pool.borrow( "flat" ) as ydl:
+                info = extract_info( ydl, "abc" )
+                self.assertEqual( info["title"], "title abc" )
+        self.assertEqual( self.pool.getStats(), { "created": 1, "borrowed": 3, "idle": 1 } )
+        self.assertEqual( StandInIE.initCounter - init_counter, 1 )
+
+    def test_profile_key(self):
+        with self.pool.borrow( "flat", init_params={"format": "140"} ):
+            pass
+        with self.pool.borrow( "flat", init_params={"format": "251"} ):
+            pass
+        with self.pool.borrow( "flat", init_params={"format": "140"} ):
+            pass
+        self.assertEqual( self.pool.getStats()["created"], 2 )
+
+    def test_unknown_profile(self):
+        with self.assertRaises( KeyError ):
+            with self.pool.borrow( "unknown" ):
+                pass
+
+    def test_run_params(self):
+        with self.pool.borrow( "flat", run_params={"playlist_items": "1:5", "outtmpl": "/tmp/out"} ) as ydl:
+            info = extract_info( ydl, "abc" )
+            self.assertEqual( info["description"], "playlist_items: 1:5" )
+            self.assertEqual( ydl.params["outtmpl"]["default"], "/tmp/out" )
+        with self.pool.borrow( "flat" ) as ydl:
+            self.assertEqual( ydl.params.get("playlist_items"), None )
+            self.assertNotEqual( ydl.params["outtmpl"]["default"], "/tmp/out" )
+
+    def test_broken_instance(self):
+        with self.assertRaises( ValueError ):
+            with self.pool.borrow( "flat" ):
+                raise ValueError( "broken" )
+        with self.assertRaises( yt_dlp.utils.DownloadError ):
+            with self.pool.borrow( "flat" ):
+                raise yt_dlp.utils.DownloadError( "unavailable" )
+        ## instance is discarded on unexpected error only
+        self.assertEqual( self.pool.getStats(), { "created": 2, "borrowed": 2, "idle": 1 } )
+
+    def test_threads(self):
+        borrowed = []
+        lock = threading.Lock()
+
+        def worker():
+            for _ in range(5):
+                with self.pool.borrow( "flat" ) as ydl:
+                    with lock:
+                        self.assertNotIn( ydl, borrowed )
+                        borrowed.append( ydl )
+                    extract_info( ydl, "abc" )
+                    with lock:
+                        borrowed.remove( ydl )
+
+        threads = [ threading.Thread( target=worker ) for _ in range(4) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = self.pool.getStats()
+        self.assertEqual( stats["borrowed"], 20 )
+        self.assertLessEqual( stats["created"], 4 )
@@ -23,12 +23,40 @@
 
 import unittest
 import datetime
+import os
+import tempfile
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from unittest import mock
 
-from rsscast.source.youtube.ytfeedparser import parse_rss_content
+from rsscast.cache import PersistentDict
+from rsscast.source.youtube import ytfeedparser
+from rsscast.source.youtube.ytfeedparser import parse_rss_content, parse_rss, NOT_MODIFIED
 
 from testrsscast.data import read_data
 
 
+class ETagRequestHandler(BaseHTTPRequestHandler):
+
+    ETAG = '"feed-etag"'
+
+    def do_GET(self):                     # pylint: disable=C0103
+        self.server.requests.append( self.headers.get("If-None-Match") )
+        if self.headers.get("If-None-Match") == self.ETAG:
+            self.send_response( 304 )
+            self.end_headers()
+            return
+        content = read_data( "yt_feed_latino_short.xml" ).encode( "utf-8" )
+        self.send_response( 200 )
+        self.send_header( "ETag", self.ETAG )
+        self.send_header( "Content-Length", str( len(content) ) )
+        self.end_headers()
+        self.wfile.write( content )
+
+    def log_message(self, *args):         # pylint: disable=W0221
+        pass
+
+
 class YTFeedParserTest(unittest.TestCase):
     def setUp(self):
         ## Called before testfunction is executed
@@ -127,3 +155,37 @@ class YTFeedParserTest(unittest.TestCase):
 
         self.assertEqual( "yt:video:CortTsAlPD0", items[1].id )
         self.assertEqual( "yt:video:uQnqMPe4S08", items[2].id )
+
+
+class YTFeedParserConditionalTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.tmpDir = tempfile.TemporaryDirectory()         # pylint: disable=R1732
+        self.server = HTTPServer( ("127.0.0.1", 0), ETagRequestHandler )
+        self.server.requests = []
+        self.thread = threading.Thread( target=self.server.serve_forever )
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/feeds/videos.xml"
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.tmpDir.cleanup()
+
+    def test_parse_rss_not_modified(self):
+        cache = PersistentDict( "validators", os.path.join( self.tmpDir.name, "validators.obj" ) )
+        with mock.patch.object( ytfeedparser, "VALIDATORS_CACHE", cache ):
+            channel = parse_rss( "test", self.url, write_content=False, conditional=True )
+            self.assertEqual( 3, channel.size() )
+            self.assertEqual( {"etag": ETagRequestHandler.ETAG}, cache.get( self.url ) )
+
+            channel = parse_rss( "test", self.url, write_content=False, conditional=True )
+            self.assertIs( NOT_MODIFIED, channel )
+
+            ## unconditional request always returns content
+            channel = parse_rss( "test", self.url, write_content=False )
+            self.assertEqual( 3, channel.size() )
+
+        self.assertEqual( [None, ETagRequestHandler.ETAG, None], self.server.requests )
@@ -0,0 +1,126 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import os
+import unittest
+import tempfile
+from unittest import mock
+
+from rsscast.source.youtube import convert_yt_dlp
+from rsscast.source.youtube.ytinfocache import VideoInfoCache, get_video_id
+
+
+VIDEO_ID = "Mn1Bn7WhRm4"
+
+
+def video_info(video_id=VIDEO_ID, live_status="not_live"):
+    return { "id": video_id,
+             "title": f"title {video_id}",
+             "upload_date": "20240101",
+             "live_status": live_status,
+             "formats": [ {"format_id": "140"} ],
+             "thumbnails": [ {"url": "thumb1"}, {"url": "thumb2"} ] }
+
+
+class VideoInfoCacheTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.cachePath = os.path.join( self.tmpDir.name, "video_info.obj" )
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        self.tmpDir.cleanup()
+
+    def test_get_video_id(self):
+        self.assertEqual( get_video_id( f"https://www.youtube.com/watch?v={VIDEO_ID}" ), VIDEO_ID )
+        self.assertEqual( get_video_id( f"https://www.youtube.com/watch?list=abc&v={VIDEO_ID}" ), VIDEO_ID )
+        self.assertEqual( get_video_id( f"https://www.youtube.com/shorts/{VIDEO_ID}" ), VIDEO_ID )
+        self.assertEqual( get_video_id( f"https://youtu.be/{VIDEO_ID}" ), VIDEO_ID )
+        self.assertEqual( get_video_id( "https://www.youtube.com/@channel/videos" ), None )
+        self.assertEqual( get_video_id( None ), None )
+
+    def test_get_reduced(self):
+        cache = VideoInfoCache( cachePath=self.cachePath )
+        cache.putInfo( VIDEO_ID, video_info() )
+        info = cache.getInfo( VIDEO_ID )
+        self.assertEqual( info["title"], f"title {VIDEO_ID}" )
+        self.assertNotIn( "formats", info )
+        self.assertEqual( info["thumbnails"], [ {"url": "thumb2"} ] )
+        self.assertEqual( cache.getStats(), { "hits": 1, "misses": 0, "entries": 1 } )
+
+    def test_field_ttl(self):
+        cache = VideoInfoCache( cachePath=self.cachePath )
+        cache.putInfo( VIDEO_ID, video_info(), now=0 )
+        now = 24 * 60 * 60
+        self.assertIsNotNone( cache.getInfo( VIDEO_ID, fields=(), now=now ) )
+        self.assertIsNone( cache.getInfo( VIDEO_ID, fields=("live_status",), now=now ) )
+        self.assertIsNone( cache.getInfo( VIDEO_ID, now=now ) )
+        self.assertIsNotNone( cache.getInfo( VIDEO_ID, now=60 ) )
+
+    def test_upcoming_expires(self):
+        cache = VideoInfoCache( cachePath=self.cachePath )
+        cache.putInfo( VIDEO_ID, video_info( live_status="is_upcoming" ), now=0 )
+        self.assertIsNotNone( cache.getInfo( VIDEO_ID, fields=(), now=60 ) )
+        self.assertIsNone( cache.getInfo( VIDEO_ID, fields=(), now=24 * 60 * 60 ) )
+
+    def test_upcoming_released(self):
+        cache = VideoInfoCache( cachePath=self.cachePath )
+        info = video_info( live_status="is_upcoming" )
+        info["release_timestamp"] = 100
+        cache.putInfo( VIDEO_ID, info, now=0 )
+        self.assertIsNotNone( cache.getInfo( VIDEO_ID, now=99 ) )
+        self.assertIsNone( cache.getInfo( VIDEO_ID, now=100 ) )
+
+    def test_lru_eviction(self):
+        cache = VideoInfoCache( cachePath=self.cachePath, max_entries=2 )
+        cache.putInfo( "aaaaaaaaaaa", video_info( "aaaaaaaaaaa" ) )
+        cache.putInfo( "bbbbbbbbbbb", video_info( "bbbbbbbbbbb" ) )
+        cache.getInfo( "aaaaaaaaaaa" )
+        cache.putInfo( "ccccccccccc", video_info( "ccccccccccc" ) )
+        self.assertIsNotNone( cache.getInfo( "aaaaaaaaaaa" ) )
+        self.assertIsNone( cache.getInfo( "bbbbbbbbbbb" ) )
+        self.assertIsNotNone( cache.getInfo( "ccccccccccc" ) )
+
+    def test_store_load(self):
+        cache = VideoInfoCache( cachePath=self.cachePath )
+        cache.putInfo( VIDEO_ID, video_info() )
+        self.assertTrue( cache.store() )
+        cache = VideoInfoCache( cachePath=self.cachePath )
+        self.assertIsNotNone( cache.getInfo( VIDEO_ID ) )
+
+    def test_fetch_info_cached(self):
+        cache = VideoInfoCache( cachePath=self.cachePath )
+        fetch_mock = mock.Mock( return_value=video_info() )
+        with mock.patch.object( convert_yt_dlp, "VIDEO_INFO_CACHE", cache ), \
+             mock.patch.object( convert_yt_dlp, "fetch_info_raw", fetch_mock ):
+            video_url = f"https://www.youtube.com/watch?v={VIDEO_ID}"
+            status = convert_yt_dlp.is_video_available( video_url )
+            self.assertEqual( status, convert_yt_dlp.VideoAvailableStatus.OK )
+            status = convert_yt_dlp.is_video_available( video_url )
+            self.assertEqual( status, convert_yt_dlp.VideoAvailableStatus.OK )
+            self.assertEqual( fetch_mock.call_count, 1 )
+
+            ## non-reduced info is not cached
+            convert_yt_dlp.fetch_info( video_url, reduce=False )
+            self.assertEqual( fetch_mock.call_count, 2 )
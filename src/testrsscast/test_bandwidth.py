@@ -0,0 +1,165 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import time
+import unittest
+import threading
+
+from rsscast.bandwidth import TokenBucket, BandwidthGovernor, is_night, parse_hours, SERVE_ACTIVE_TIME, \
+    OTHER_JOB, OTHER_ACTIVE_TIME
+
+
+class FakeClock():
+    """Clock advanced only by 'sleep()'."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+        self.slept = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        self.slept += seconds
+
+
+def local_timestamp( hour ):
+    return time.mktime( (2024, 6, 1, hour, 30, 0, 0, 0, -1) )
+
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        pass
+
+    def test_unlimited(self):
+        bucket = TokenBucket( 0, clock=self.clock )
+        self.assertEqual( bucket.reserve( 10 ** 9 ), 0.0 )
+
+    def test_rate(self):
+        bucket = TokenBucket( 1000, clock=self.clock )
+        ## bucket starts empty
+        self.assertAlmostEqual( bucket.reserve( 500 ), 0.5 )
+        ## reservations are queued
+        self.assertAlmostEqual( bucket.reserve( 500 ), 1.0 )
+        self.clock.sleep( 1.0 )
+        self.assertAlmostEqual( bucket.reserve( 1000 ), 1.0 )
+
+    def test_burst(self):
+        bucket = TokenBucket( 1000, clock=self.clock )
+        self.clock.sleep( 100.0 )
+        ## idle time gives at most one second of transfer
+        self.assertEqual( bucket.reserve( 1000 ), 0.0 )
+        self.assertAlmostEqual( bucket.reserve( 1000 ), 1.0 )
+
+
+class BandwidthGovernorTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.clock = FakeClock( local_timestamp( 12 ) )
+        self.governor = BandwidthGovernor( clock=self.clock, sleep=self.clock.sleep )
+        self.governor.configure( day_limit=1000, night_limit=4000, night_hours=(0, 6), serve_reserve=0.5 )
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        pass
+
+    def test_day_night(self):
+        self.assertEqual( self.governor.getLimit( local_timestamp( 12 ) ), 1000 )
+        self.assertEqual( self.governor.getLimit( local_timestamp( 3 ) ), 4000 )
+
+    def test_throttle(self):
+        for _ in range( 10 ):
+            self.governor.throttle( 500 )
+        ## 5000 bytes with 1000 B/s
+        self.assertAlmostEqual( self.clock.slept, 5.0 )
+
+    def test_reserve(self):
+        with self.governor.job( "episode" ) as meter:
+            pass
+        self.assertAlmostEqual( self.governor.reserve( 500, meter ), 0.5 )
+        self.assertAlmostEqual( self.governor.reserve( 500, meter ), 1.0 )
+        ## caller is responsible for waiting
+        self.assertEqual( self.clock.slept, 0.0 )
+        self.assertEqual( meter.total, 1000 )
+
+    def test_serve_reserve(self):
+        self.governor.noteServed( 100 )
+        self.assertEqual( self.governor.getLimit(), 500 )
+        self.clock.sleep( SERVE_ACTIVE_TIME + 1.0 )
+        self.assertEqual( self.governor.getLimit(), 1000 )
+
+    def test_job_stats(self):
+        with self.governor.job( "episode" ):
+            for _ in range( 10 ):
+                self.governor.throttle( 500 )
+            stats = self.governor.getStats()
+            self.assertEqual( list( stats["jobs"] ), [ "episode" ] )
+            self.assertAlmostEqual( stats["jobs"]["episode"], 1000.0, delta=100.0 )
+        self.assertEqual( self.governor.getStats()["jobs"], {} )
+
+    def test_other_stats(self):
+        ## downloads outside of jobs are accounted to single shared job
+        def download():
+            for _ in range( 5 ):
+                self.governor.throttle( 500 )
+
+        threads = [ threading.Thread( target=download ) for _ in range( 3 ) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = self.governor.getStats()
+        self.assertEqual( list( stats["jobs"] ), [ OTHER_JOB ] )
+        self.assertEqual( self.governor.currentJob().total, 7500 )
+        self.clock.sleep( OTHER_ACTIVE_TIME + 1.0 )
+        self.assertEqual( self.governor.getStats()["jobs"], {} )
+
+    def test_shared_limit(self):
+        ## real clock - limit is shared by concurrent downloads
+        governor = BandwidthGovernor()
+        governor.configure( day_limit=200 * 1024, night_limit=200 * 1024, serve_reserve=0.0 )
+
+        def download():
+            for _ in range( 10 ):
+                governor.throttle( 10 * 1024 )
+
+        start = time.monotonic()
+        threads = [ threading.Thread( target=download ) for _ in range( 4 ) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        ## 400 KiB in total with 200 KiB/s limit
+        self.assertGreater( time.monotonic() - start, 1.5 )
+
+    def test_is_night(self):
+        self.assertTrue( is_night( local_timestamp( 23 ), (22, 6) ) )
+        self.assertTrue( is_night( local_timestamp( 2 ), (22, 6) ) )
+        self.assertFalse( is_night( local_timestamp( 12 ), (22, 6) ) )
+        self.assertEqual( parse_hours( "22-6" ), (22, 6) )
@@ -0,0 +1,110 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import time
+import unittest
+import threading
+import contextvars
+
+from rsscast.eventloop import EventLoopThread
+from rsscast.downloadqueue import DownloadQueue, get_converter_name
+from rsscast.source.youtube.convert_yt_dlp import convert_yt
+
+
+TEST_VARIABLE = contextvars.ContextVar( "test_variable", default=None )
+
+
+class ConcurrencyCounter():
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = 0
+        self.maximum = 0
+
+    def __enter__(self):
+        with self.lock:
+            self.current += 1
+            self.maximum = max( self.maximum, self.current )
+
+    def __exit__(self, *args):
+        with self.lock:
+            self.current -= 1
+
+
+class DownloadQueueTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        pass
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        pass
+
+    def test_converter_name(self):
+        self.assertEqual( get_converter_name( convert_yt ), "convert_yt_dlp" )
+
+    def test_global_limit(self):
+        queue = DownloadQueue( jobs=3 )
+        counter = ConcurrencyCounter()
+
+        def job(value):
+            with counter:
+                time.sleep( 0.02 )
+            return value
+
+        futures = [ queue.submit( job, i ) for i in range(12) ]
+        results = [ future.result() for future in futures ]
+        queue.shutdown()
+        self.assertEqual( results, list( range(12) ) )
+        self.assertEqual( counter.maximum, 3 )
+
+    def test_converter_limit(self):
+        queue = DownloadQueue( jobs=8, converter_jobs=2 )
+        queue.configure( converter_limits={ "slow": 1 } )
+        counters = { "fast": ConcurrencyCounter(), "slow": ConcurrencyCounter() }
+
+        def job(converter_name):
+            with queue.converterSlot( converter_name ):
+                with counters[ converter_name ]:
+                    time.sleep( 0.02 )
+
+        futures = [ queue.submit( job, name ) for name in ["fast", "slow"] * 6 ]
+        for future in futures:
+            future.result()
+        queue.shutdown()
+        self.assertEqual( counters["fast"].maximum, 2 )
+        self.assertEqual( counters["slow"].maximum, 1 )
+        self.assertEqual( queue.getConverterLimit( "other" ), 2 )
+
+    def test_run_in_worker(self):
+        queue = DownloadQueue( jobs=1 )
+        loop = EventLoopThread( "TestLoop" )
+
+        async def job():
+            TEST_VARIABLE.set( "job" )
+            return await queue.runInWorker( TEST_VARIABLE.get )
+
+        ## context of coroutine is passed to worker
+        self.assertEqual( loop.submit( job() ).result( timeout=10 ), "job" )
+        loop.stop()
+        queue.shutdown()
@@ -0,0 +1,107 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import time
+import asyncio
+import unittest
+from concurrent.futures import Future
+
+from rsscast.eventloop import EventLoopThread, FutureSemaphore
+
+
+class FutureSemaphoreTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.loop = EventLoopThread( "TestLoop" )
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        self.loop.stop()
+
+    def test_order(self):
+        semaphore = FutureSemaphore( 1 )
+        first = semaphore.acquire()
+        second = semaphore.acquire()
+        third = semaphore.acquire()
+        self.assertTrue( first.done() )
+        self.assertFalse( second.done() )
+        semaphore.release()
+        self.assertTrue( second.done() )
+        self.assertFalse( third.done() )
+
+    def test_cancelled_waiter(self):
+        semaphore = FutureSemaphore( 1 )
+        semaphore.acquire()
+        cancelled = semaphore.acquire()
+        waiter = semaphore.acquire()
+        self.assertTrue( cancelled.cancel() )
+        semaphore.release()
+        ## permit skips cancelled waiter
+        self.assertTrue( waiter.done() )
+
+    def test_release_too_many(self):
+        semaphore = FutureSemaphore( 1 )
+        with self.assertRaises( ValueError ):
+            semaphore.release()
+
+    def test_hold_async(self):
+        semaphore = FutureSemaphore( 2 )
+        counter = { "current": 0, "maximum": 0 }
+
+        async def job():
+            async with semaphore.holdAsync():
+                counter["current"] += 1
+                counter["maximum"] = max( counter["maximum"], counter["current"] )
+                await asyncio.sleep( 0.01 )
+                counter["current"] -= 1
+
+        async def run_all():
+            await asyncio.gather( *[ job() for _ in range( 6 ) ] )
+
+        self.loop.submit( run_all() ).result( timeout=10 )
+        self.assertEqual( counter["maximum"], 2 )
+        ## all permits returned
+        self.assertTrue( semaphore.acquire().done() )
+        self.assertTrue( semaphore.acquire().done() )
+
+    def test_hold_async_cancel(self):
+        semaphore = FutureSemaphore( 1 )
+        semaphore.acquire()
+        started = Future()
+
+        async def job():
+            started.set_result( True )
+            async with semaphore.holdAsync():
+                pass
+
+        future = self.loop.submit( job() )
+        started.result( timeout=10 )
+        time.sleep( 0.05 )
+        future.cancel()
+        with self.assertRaises( Exception ):
+            future.result( timeout=10 )
+        ## let loop process cancellation
+        self.loop.submit( asyncio.sleep( 0.05 ) ).result( timeout=10 )
+        semaphore.release()
+        ## cancelled coroutine does not keep permit
+        self.assertTrue( semaphore.acquire().done() )
@@ -0,0 +1,128 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import unittest
+import threading
+import time
+from collections import Counter
+
+from rsscast.feedpool import FeedPool, get_host_key
+
+
+class FeedStub():
+
+    def __init__(self, url):
+        self.url = url
+
+
+class ConcurrencyCounter():
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running: Counter = Counter()
+        self.maxTotal = 0
+        self.maxHost: Counter = Counter()
+
+    def __call__(self, feed):
+        host = get_host_key( feed.url )
+        with self.lock:
+            self.running[host] += 1
+            self.maxHost[host] = max( self.maxHost[host], self.running[host] )
+            self.maxTotal = max( self.maxTotal, sum( self.running.values() ) )
+        time.sleep( 0.02 )
+        with self.lock:
+            self.running[host] -= 1
+        return feed.url
+
+
+class FeedPoolTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        pass
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        pass
+
+    def test_get_host_key(self):
+        self.assertEqual( "youtube.com", get_host_key( "https://www.youtube.com/feeds/videos.xml?channel_id=x" ) )
+        self.assertEqual( "youtube.com", get_host_key( "https://YouTube.com/@channel" ) )
+        self.assertEqual( "", get_host_key( None ) )
+
+    def test_execute_serial(self):
+        feedList = [ FeedStub( f"https://host{i}.com/feed" ) for i in range(4) ]
+        counter = ConcurrencyCounter()
+        pool = FeedPool( jobs=1 )
+        results = pool.execute( counter, feedList )
+        self.assertEqual( [ feed.url for feed in feedList ], results )
+        self.assertEqual( 1, counter.maxTotal )
+
+    def test_execute_limits(self):
+        feedList = [ FeedStub( f"https://www.youtube.com/feed{i}" ) for i in range(6) ]
+        feedList += [ FeedStub( f"https://host{i}.com/feed" ) for i in range(6) ]
+        counter = ConcurrencyCounter()
+        pool = FeedPool( jobs=4, host_jobs=2 )
+        results = pool.execute( counter, feedList )
+        self.assertEqual( [ feed.url for feed in feedList ], results )
+        self.assertLessEqual( counter.maxTotal, 4 )
+        self.assertLessEqual( counter.maxHost["youtube.com"], 2 )
+
+    def test_execute_error(self):
+        def function(feed):
+            if feed.url.endswith("1"):
+                raise ValueError( feed.url )
+            return feed.url
+
+        feedList = [ FeedStub( f"https://host{i}.com/feed{i}" ) for i in range(3) ]
+        pool = FeedPool( jobs=2 )
+        self.assertRaises( ValueError, pool.execute, function, feedList )
+
+    def test_stop_on_error_serial(self):
+        called = []
+
+        def function(feed):
+            called.append( feed.url )
+            if feed.url.endswith("1"):
+                raise ValueError( feed.url )
+            return feed.url
+
+        feedList = [ FeedStub( f"https://host{i}.com/feed{i}" ) for i in range(6) ]
+        pool = FeedPool( jobs=1 )
+        self.assertRaises( ValueError, pool.execute, function, feedList )
+        self.assertEqual( [ feed.url for feed in feedList[:2] ], called )
+
+    def test_stop_on_error_parallel(self):
+        called = []
+
+        def function(feed):
+            called.append( feed.url )
+            if feed.url.endswith("0"):
+                raise ValueError( feed.url )
+            time.sleep( 0.05 )
+            return feed.url
+
+        feedList = [ FeedStub( f"https://host{i}.com/feed{i}" ) for i in range(6) ]
+        pool = FeedPool( jobs=2 )
+        self.assertRaises( ValueError, pool.execute, function, feedList )
+        ## running job is finished, remaining feeds are not processed
+        self.assertEqual( [ feed.url for feed in feedList[:2] ], sorted( called ) )
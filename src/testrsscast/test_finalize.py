@@ -0,0 +1,111 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import os
+import errno
+import unittest
+import tempfile
+from unittest import mock
+
+from rsscast import finalize
+
+
+class FinalizeTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.tmpDir = tempfile.TemporaryDirectory()         # pylint: disable=R1732
+        self.content = os.urandom( 300 * 1024 )
+        self.sourcePath = os.path.join( self.tmpDir.name, "source.bin" )
+        with open( self.sourcePath, "wb" ) as source_file:
+            source_file.write( self.content )
+        self.destPath = os.path.join( self.tmpDir.name, "dest.bin" )
+        self.stats = finalize.FinalizeStats()
+        patcher = mock.patch.object( finalize, "FINALIZE_STATS", self.stats )
+        patcher.start()
+        self.addCleanup( patcher.stop )
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        self.tmpDir.cleanup()
+
+    def read_dest(self):
+        with open( self.destPath, "rb" ) as dest_file:
+            return dest_file.read()
+
+    def test_commit_rename(self):
+        with open( self.destPath, "wb" ) as dest_file:
+            dest_file.write( b"old content" )
+        finalize.commit( self.sourcePath, self.destPath )
+        self.assertFalse( os.path.exists( self.sourcePath ) )
+        self.assertEqual( self.read_dest(), self.content )
+        stats = self.stats.getStats()
+        self.assertEqual( stats["renamed"], 1 )
+        self.assertEqual( stats["renamed_bytes"], len( self.content ) )
+        self.assertEqual( stats["copied"], 0 )
+
+    def test_commit_cross_device(self):
+        os_replace = os.replace
+
+        def replace_stub( src, dst ):
+            if src == self.sourcePath:
+                raise OSError( errno.EXDEV, "Invalid cross-device link" )
+            os_replace( src, dst )
+
+        with mock.patch( "os.replace", side_effect=replace_stub ):
+            finalize.commit( self.sourcePath, self.destPath )
+        self.assertFalse( os.path.exists( self.sourcePath ) )
+        self.assertFalse( os.path.exists( finalize.stage_path( self.destPath ) ) )
+        self.assertEqual( self.read_dest(), self.content )
+        stats = self.stats.getStats()
+        self.assertEqual( stats["renamed"], 0 )
+        self.assertEqual( stats["copied"], 1 )
+        self.assertEqual( stats["copied_bytes"], len( self.content ) )
+
+    def test_commit_error(self):
+        with mock.patch( "os.replace", side_effect=OSError( errno.EACCES, "Permission denied" ) ):
+            self.assertRaises( OSError, finalize.commit, self.sourcePath, self.destPath )
+        self.assertTrue( os.path.exists( self.sourcePath ) )
+
+    def test_copy_file(self):
+        copied = finalize.copy_file( self.sourcePath, self.destPath )
+        self.assertEqual( copied, len( self.content ) )
+        self.assertEqual( self.read_dest(), self.content )
+
+    def test_copy_file_sendfile_fallback(self):
+        error = OSError( errno.ENOSYS, "Function not implemented" )
+        with mock.patch( "os.copy_file_range", side_effect=error, create=True ):
+            finalize.copy_file( self.sourcePath, self.destPath )
+        self.assertEqual( self.read_dest(), self.content )
+
+    def test_copy_file_userspace_fallback(self):
+        error = OSError( errno.EINVAL, "Invalid argument" )
+        with mock.patch( "os.copy_file_range", side_effect=error, create=True ), \
+             mock.patch( "os.sendfile", side_effect=error ):
+            finalize.copy_file( self.sourcePath, self.destPath )
+        self.assertEqual( self.read_dest(), self.content )
+
+    def test_copy_file_empty(self):
+        with open( self.sourcePath, "wb" ):
+            pass
+        self.assertEqual( finalize.copy_file( self.sourcePath, self.destPath ), 0 )
+        self.assertEqual( self.read_dest(), b"" )
@@ -0,0 +1,177 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import os
+import time
+import unittest
+import tempfile
+from unittest import mock
+
+from rsscast import jobjournal
+from rsscast.jobjournal import JobJournal, STATE_QUEUED, STATE_RUNNING, STATE_DONE, STATE_FAILED
+from rsscast.rss import rssgenerator
+from rsscast.rss.rsschannel import RSSItem
+from rsscast.source.youtube import convert_y2down_cc
+
+
+class JobJournalTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.tmpDir = tempfile.TemporaryDirectory()         # pylint: disable=R1732
+        self.journalPath = os.path.join( self.tmpDir.name, "data", "jobs.jsonl" )
+        self.journal = JobJournal( self.journalPath )
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        self.journal.close()
+        self.tmpDir.cleanup()
+
+    def reopen(self):
+        ## simulate restart of process
+        self.journal.close()
+        self.journal = JobJournal( self.journalPath )
+
+    def read_lines(self):
+        with open( self.journalPath, "r", encoding="utf-8" ) as journal_file:
+            return journal_file.readlines()
+
+    def test_replay(self):
+        self.journal.update( "out1.mp3", STATE_QUEUED, feed="feed1" )
+        self.journal.update( "out2.mp3", STATE_QUEUED, feed="feed1" )
+        self.journal.update( "out3.mp3", STATE_QUEUED, feed="feed1" )
+        self.journal.update( "out1.mp3", STATE_RUNNING )
+        self.journal.setRemoteJob( "out1.mp3", "convert_y2down_cc", "abc" )
+        self.journal.update( "out2.mp3", STATE_DONE )
+        self.journal.update( "out3.mp3", STATE_FAILED, error="network" )
+        self.reopen()
+
+        job = self.journal.getJob( "out1.mp3" )
+        self.assertEqual( job["state"], STATE_RUNNING )
+        self.assertEqual( job["feed"], "feed1" )
+        self.assertEqual( self.journal.getRemoteJob( "out1.mp3" ), ("convert_y2down_cc", "abc") )
+        ## finished jobs are dropped
+        self.assertIsNone( self.journal.getJob( "out2.mp3" ) )
+        self.assertEqual( self.journal.getJob( "out3.mp3" )["error"], "network" )
+        self.assertEqual( [ job["key"] for job in self.journal.getUnfinished() ], [ "out1.mp3" ] )
+        ## journal compacted - one line per job
+        self.assertEqual( len( self.read_lines() ), 2 )
+
+    def test_compact(self):
+        self.journal.update( "out1.mp3", STATE_QUEUED )
+        self.journal.update( "out2.mp3", STATE_QUEUED )
+        self.journal.update( "out1.mp3", STATE_DONE )
+        self.assertEqual( len( self.read_lines() ), 3 )
+        ## compacted without restart (e.g. in daemon mode)
+        self.journal.compact()
+        self.assertIsNone( self.journal.getJob( "out1.mp3" ) )
+        self.assertEqual( len( self.read_lines() ), 1 )
+        ## records are appended to compacted file
+        self.journal.update( "out2.mp3", STATE_RUNNING )
+        self.assertEqual( len( self.read_lines() ), 2 )
+        self.journal.compact()
+        self.assertEqual( len( self.read_lines() ), 1 )
+        ## nothing appended - file is not rewritten
+        inode = os.stat( self.journalPath ).st_ino
+        self.journal.compact()
+        self.assertEqual( os.stat( self.journalPath ).st_ino, inode )
+        self.reopen()
+        self.assertEqual( self.journal.getJob( "out2.mp3" )["state"], STATE_RUNNING )
+
+    def test_download_list_compact(self):
+        self.journal.update( "out1.mp3", STATE_QUEUED )
+        self.journal.update( "out1.mp3", STATE_DONE )
+        rssgenerator.download_list( "feed", [], self.tmpDir.name, journal=self.journal )
+        self.assertEqual( self.read_lines(), [] )
+
+    def test_requeue_keeps_remote(self):
+        self.journal.update( "out1.mp3", STATE_QUEUED )
+        self.journal.setRemoteJob( "out1.mp3", "convert_ddownr_com", 12 )
+        self.reopen()
+        self.journal.update( "out1.mp3", STATE_QUEUED )
+        self.assertEqual( self.journal.getRemoteJob( "out1.mp3" ), ("convert_ddownr_com", 12) )
+        self.journal.update( "out1.mp3", STATE_DONE )
+        self.assertIsNone( self.journal.getRemoteJob( "out1.mp3" ) )
+
+    def test_remote_expired(self):
+        self.journal.update( "out1.mp3", STATE_QUEUED )
+        self.journal.setRemoteJob( "out1.mp3", "convert_ddownr_com", 12 )
+        now = time.time() + jobjournal.REMOTE_JOB_TTL + 1
+        self.assertIsNone( self.journal.getRemoteJob( "out1.mp3", now=now ) )
+
+    def test_untracked(self):
+        self.journal.setRemoteJob( "out1.mp3", "convert_ddownr_com", 12 )
+        self.assertIsNone( self.journal.getRemoteJob( "out1.mp3" ) )
+        ## nothing to store
+        self.assertFalse( os.path.exists( self.journalPath ) )
+
+    def test_partial_record(self):
+        self.journal.update( "out1.mp3", STATE_QUEUED )
+        self.journal.close()
+        with open( self.journalPath, "a", encoding="utf-8" ) as journal_file:
+            ## crash during write
+            journal_file.write( '{"key": "out2.mp3", "sta' )
+        self.reopen()
+        self.assertEqual( self.journal.getJob( "out1.mp3" )["state"], STATE_QUEUED )
+        self.assertIsNone( self.journal.getJob( "out2.mp3" ) )
+        self.journal.update( "out3.mp3", STATE_QUEUED )
+        self.reopen()
+        self.assertEqual( self.journal.getJob( "out3.mp3" )["state"], STATE_QUEUED )
+
+    def test_download_item(self):
+        rssItem = RSSItem( "yt:video:abcdefghijk", "https://www.youtube.com/watch?v=abcdefghijk" )
+        with mock.patch.object( rssgenerator, "convert_item_async", return_value=True ):
+            rssgenerator.download_item( "feed", rssItem, "out1.mp3", journal=self.journal )
+        self.assertEqual( self.journal.getJob( "out1.mp3" )["state"], STATE_DONE )
+        self.journal.update( "out2.mp3", STATE_QUEUED )
+        with mock.patch.object( rssgenerator, "convert_item_async", side_effect=OSError( "disk full" ) ):
+            with self.assertRaises( OSError ):
+                rssgenerator.download_item( "feed", rssItem, "out2.mp3", journal=self.journal )
+        job = self.journal.getJob( "out2.mp3" )
+        self.assertEqual( job["state"], STATE_FAILED )
+        self.assertEqual( job["error"], "disk full" )
+
+    def test_converter_resume(self):
+        output = os.path.join( self.tmpDir.name, "out1.mp3" )
+        self.journal.update( output, STATE_RUNNING )
+        self.journal.setRemoteJob( output, "convert_y2down_cc", "remote1" )
+        self.reopen()
+        with mock.patch.object( convert_y2down_cc, "JOB_JOURNAL", self.journal ), \
+             mock.patch.object( convert_y2down_cc, "start_conversion" ) as start_mock, \
+             mock.patch.object( convert_y2down_cc, "wait_for_conversion", return_value="url" ) as wait_mock, \
+             mock.patch.object( convert_y2down_cc, "download_converted", return_value=True ):
+            self.assertTrue( convert_y2down_cc.convert_yt( "link", output ) )
+        ## polling resumed, conversion not resubmitted
+        start_mock.assert_not_called()
+        wait_mock.assert_called_once_with( mock.ANY, "remote1", "link" )
+
+    def test_converter_resume_expired(self):
+        output = os.path.join( self.tmpDir.name, "out1.mp3" )
+        self.journal.update( output, STATE_RUNNING )
+        self.journal.setRemoteJob( output, "convert_y2down_cc", "remote1" )
+        with mock.patch.object( convert_y2down_cc, "JOB_JOURNAL", self.journal ), \
+             mock.patch.object( convert_y2down_cc, "start_conversion", return_value="remote2" ), \
+             mock.patch.object( convert_y2down_cc, "wait_for_conversion", side_effect=[ None, "url" ] ), \
+             mock.patch.object( convert_y2down_cc, "download_converted", return_value=True ):
+            self.assertTrue( convert_y2down_cc.convert_yt( "link", output ) )
+        ## remote job not found - new conversion stored
+        self.assertEqual( self.journal.getRemoteJob( output ), ("convert_y2down_cc", "remote2") )
@@ -0,0 +1,117 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import os
+import datetime
+import unittest
+import tempfile
+from unittest import mock
+
+from rsscast.mediastore import MediaStore
+from rsscast.rss import rssgenerator
+from rsscast.rss.rsschannel import RSSItem
+from rsscast.source.youtube.convert_yt_dlp import VideoAvailableStatus
+
+
+def create_item( videoId ):
+    rssItem = RSSItem( f"yt:video:{videoId}", f"https://www.youtube.com/watch?v={videoId}" )
+    rssItem.title = f"title {videoId}"
+    rssItem.publishDate = datetime.datetime( 2024, 1, 1, tzinfo=datetime.timezone.utc )
+    return rssItem
+
+
+class MediaStoreTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.tmpDir = tempfile.TemporaryDirectory()         # pylint: disable=R1732
+        self.store = MediaStore( os.path.join( self.tmpDir.name, "media" ) )
+        self.feedDirs = []
+        for feed_name in ( "feed1", "feed2" ):
+            feed_dir = os.path.join( self.tmpDir.name, feed_name )
+            os.makedirs( feed_dir )
+            self.feedDirs.append( feed_dir )
+        self.converted = []
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        self.tmpDir.cleanup()
+
+    async def convert_stub(self, link, output, audio_format=None):
+        self.converted.append( (link, audio_format) )
+        with open( output, "wb" ) as media_file:
+            media_file.write( b"media" )
+        return True
+
+    def download(self, feed_dir, rssItem):
+        with mock.patch.object( rssgenerator, "convert_to_audio_async", self.convert_stub ), \
+                mock.patch.object( rssgenerator, "get_video_status",
+                                   lambda _link: (VideoAvailableStatus.OK, None) ):
+            rssgenerator.download_list( "feed", [ rssItem ], feed_dir, media_store=self.store )
+
+    def test_convert_once(self):
+        self.download( self.feedDirs[0], create_item( "v1" ) )
+        item = create_item( "v1" )
+        self.download( self.feedDirs[1], item )
+        self.assertEqual( len( self.converted ), 1 )
+        self.assertEqual( item.mediaSize, 5 )
+        self.assertEqual( self.store.countReferences( "yt_video_v1.mp3" ), 2 )
+        stat1 = os.stat( os.path.join( self.feedDirs[0], "yt_video_v1.mp3" ) )
+        stat2 = os.stat( os.path.join( self.feedDirs[1], "yt_video_v1.mp3" ) )
+        self.assertEqual( stat1.st_ino, stat2.st_ino )
+
+    def test_key_lock_removed(self):
+        with self.store.keyLock( "yt_video_v1.mp3" ):
+            with self.store.keyLock( "yt_video_v2.mp3" ):
+                self.assertEqual( len( self.store._locks ), 2 )   # pylint: disable=W0212
+        self.assertEqual( self.store._locks, {} )                 # pylint: disable=W0212
+        self.download( self.feedDirs[0], create_item( "v1" ) )
+        self.assertEqual( self.store._locks, {} )                 # pylint: disable=W0212
+
+    def test_release(self):
+        self.download( self.feedDirs[0], create_item( "v1" ) )
+        self.download( self.feedDirs[1], create_item( "v1" ) )
+        blob_path = self.store.getBlobPath( "yt_video_v1.mp3" )
+
+        os.remove( os.path.join( self.feedDirs[0], "yt_video_v1.mp3" ) )
+        self.store.release( "yt_video_v1.mp3" )
+        self.assertTrue( os.path.exists( blob_path ) )
+
+        os.remove( os.path.join( self.feedDirs[1], "yt_video_v1.mp3" ) )
+        self.store.release( "yt_video_v1.mp3" )
+        self.assertFalse( os.path.exists( blob_path ) )
+
+    def test_adopt_existing(self):
+        feed_file = os.path.join( self.feedDirs[0], "yt_video_v1.mp3" )
+        with open( feed_file, "wb" ) as media_file:
+            media_file.write( b"media" )
+        self.download( self.feedDirs[0], create_item( "v1" ) )
+        self.assertEqual( self.store.countReferences( "yt_video_v1.mp3" ), 1 )
+        self.download( self.feedDirs[1], create_item( "v1" ) )
+        self.assertEqual( self.converted, [] )
+
+    def test_collect_garbage(self):
+        self.download( self.feedDirs[0], create_item( "v1" ) )
+        self.download( self.feedDirs[0], create_item( "v2" ) )
+        os.remove( os.path.join( self.feedDirs[0], "yt_video_v1.mp3" ) )
+        self.assertEqual( self.store.collectGarbage(), 1 )
+        self.assertEqual( os.listdir( self.store.storeDir ), [ "yt_video_v2.mp3" ] )
@@ -0,0 +1,104 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import unittest
+import datetime
+
+from rsscast import scheduler
+from rsscast.scheduler import FeedScheduler, estimate_interval, is_feed_due, schedule_feed
+from rsscast.datatypes import FeedEntry
+from rsscast.rss.rsschannel import RSSItem
+
+
+HOUR = 60 * 60
+DAY  = 24 * HOUR
+
+
+def create_feed( feedId, publish_times ):
+    feed = FeedEntry()
+    feed.feedId = feedId
+    feed.url = f"https://www.youtube.com/feeds/videos.xml?channel_id={feedId}"
+    for index, publish_time in enumerate( publish_times ):
+        item = RSSItem( itemId=f"{feedId}:{index}" )
+        item.publishDate = datetime.datetime.fromtimestamp( publish_time, datetime.timezone.utc )
+        feed.addItem( item )
+    return feed
+
+
+class SchedulerTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        pass
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        pass
+
+    def test_interval_no_history(self):
+        feed = create_feed( "empty", [] )
+        self.assertEqual( estimate_interval( feed, now=0 ), scheduler.DEFAULT_INTERVAL )
+
+    def test_interval_busy(self):
+        now = 100 * DAY
+        feed = create_feed( "busy", [ now - i * 4 * HOUR for i in range(10) ] )
+        self.assertEqual( estimate_interval( feed, now ), HOUR )
+
+    def test_interval_dormant(self):
+        now = 100 * DAY
+        ## busy channel which stopped uploading
+        feed = create_feed( "dormant", [ now - 2 * DAY - i * 4 * HOUR for i in range(10) ] )
+        self.assertEqual( estimate_interval( feed, now ), 2 * DAY / scheduler.POLLS_PER_UPLOAD )
+        feed = create_feed( "dormant", [ now - 200 * DAY - i * 4 * HOUR for i in range(10) ] )
+        self.assertEqual( estimate_interval( feed, now ), scheduler.MAX_INTERVAL )
+
+    def test_interval_min(self):
+        now = 100 * DAY
+        feed = create_feed( "very_busy", [ now - i * 60 for i in range(10) ] )
+        self.assertEqual( estimate_interval( feed, now ), scheduler.MIN_INTERVAL )
+
+    def test_due(self):
+        feed = create_feed( "feed", [] )
+        self.assertTrue( is_feed_due( feed, now=0 ) )
+        schedule_feed( feed, now=0 )
+        self.assertFalse( is_feed_due( feed, now=scheduler.DEFAULT_INTERVAL - 1 ) )
+        self.assertTrue( is_feed_due( feed, now=scheduler.DEFAULT_INTERVAL ) )
+        feed.enabled = False
+        self.assertFalse( is_feed_due( feed, now=scheduler.DEFAULT_INTERVAL ) )
+
+    def test_process_due(self):
+        processed = []
+
+        def process( feed ):
+            processed.append( feed.feedId )
+            if feed.feedId == "bad":
+                raise RuntimeError( "broken feed" )
+
+        feed_list = [ create_feed( "feed1", [] ), create_feed( "feed2", [] ), create_feed( "bad", [] ) ]
+        feed_list[1].nextDue = 2 ** 40
+        feed_scheduler = FeedScheduler( process, jobs=2 )
+        feed_scheduler.processDue( feed_list )
+        self.assertEqual( sorted( processed ), [ "bad", "feed1" ] )
+        ## all processed feeds are rescheduled
+        for feed in feed_list:
+            self.assertIsNotNone( feed.nextDue )
+        self.assertEqual( feed_scheduler.processDue( feed_list ), [] )
@@ -0,0 +1,89 @@
+# MIT License
+#
+# Copyright (c) 2021 Arkadiusz Netczuk <dev.arnet@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import os
+import sys
+import stat
+import unittest
+import tempfile
+
+from rsscast.transcodepool import TranscodePool, TranscodeError, parse_cpu_list
+
+
+## stand-in of 'ffmpeg' copying input file to output, fails on empty input
+FAKE_FFMPEG = f"""#!{sys.executable}
+import sys, shutil, os
+args = sys.argv[1:]
+input_path = args[ args.index( "-i" ) + 1 ]
+if os.path.getsize( input_path ) < 1:
+    sys.stderr.write( "invalid data found" )
+    sys.exit( 1 )
+shutil.copyfile( input_path, args[-1] )
+"""
+
+
+def create_fake_ffmpeg( directory ):
+    script_path = os.path.join( directory, "ffmpeg" )
+    with open( script_path, "w", encoding="utf-8" ) as script_file:
+        script_file.write( FAKE_FFMPEG )
+    os.chmod( script_path, os.stat( script_path ).st_mode | stat.S_IEXEC )
+    return script_path
+
+
+class TranscodePoolTest(unittest.TestCase):
+    def setUp(self):
+        ## Called before testfunction is executed
+        self.tmpDir = tempfile.TemporaryDirectory()         # pylint: disable=R1732
+        self.pool = TranscodePool( jobs=2, nice=5, cpus=[0] )
+        self.pool.ffmpeg = create_fake_ffmpeg( self.tmpDir.name )
+
+    def tearDown(self):
+        ## Called after testfunction was executed
+        self.pool.shutdown()
+        self.tmpDir.cleanup()
+
+    def write_input(self, name, content):
+        input_path = os.path.join( self.tmpDir.name, name )
+        with open( input_path, "wb" ) as input_file:
+            input_file.write( content )
+        return input_path
+
+    def test_transcode(self):
+        output_path = os.path.join( self.tmpDir.name, "out.mp3" )
+        input_path = self.write_input( "in.m4a", b"audio data" )
+        self.pool.submit( input_path, output_path ).result()
+        with open( output_path, "rb" ) as output_file:
+            self.assertEqual( output_file.read(), b"audio data" )
+        self.assertEqual( sorted( os.listdir( self.tmpDir.name ) ), [ "ffmpeg", "in.m4a", "out.mp3" ] )
+
+    def test_failed(self):
+        output_path = os.path.join( self.tmpDir.name, "out.mp3" )
+        input_path = self.write_input( "in.m4a", b"" )
+        future = self.pool.submit( input_path, output_path )
+        with self.assertRaises( TranscodeError ):
+            future.result()
+        self.assertFalse( os.path.exists( output_path ) )
+
+    def test_parse_cpu_list(self):
+        self.assertEqual( parse_cpu_list( None ), [] )
+        self.assertEqual( parse_cpu_list( "0, 2-4" ), [ 0, 2, 3, 4 ] )